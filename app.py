@@ -1,16 +1,27 @@
 import os
+import argparse
 import logging
-from typing import List, Dict, Tuple
+import numpy as np
+from typing import Any, List, Dict, Optional, Tuple
 from pandas import DataFrame
 
+from app.analytics.candidate_planner import CandidatePlanner
+from app.analytics.context_builder import ContextBuilder
 from app.analytics.segmenter import TextSegmenter
+from app.analytics.token_index import TokenIndex
 from app.analytics.preprocessor import DataProcessor
+from app.analytics.sentiment_analyzer import SentimentAnalyzer
+from app.audio_aligner import AudioAligner
 from app.insight_extractor import InsightExtractor
+from app.services.dag_executor import DagExecutor, Stage
 from app.services.llm_service import LLM
+from app.services.registry import registry
 from app.services.youtube_service import YouTubeService
 from app.video_editor import VideoEditor
 
-from config.config import TEXTS_PATH, VIDEOS, FILE_NUMBER, RESULT_PATH
+from config.config import (TEXTS_PATH, VIDEOS, VIDEOS_PATH, FILE_NUMBER, RESULT_PATH, COMPLETION_CACHE_ENABLED,
+                           SENTIMENT_MODEL, SENTIMENT_BACKEND, SUMMARY_METHOD, TEXTRANK_NEIGHBOURS, TEXTRANK_DAMPING,
+                           AUDIO_ALIGNMENT, AUDIO_SAMPLE_RATE, AUDIO_FRAME, VAD_MARGIN, VAD_MIN_PAUSE, ALIGN_TOLERANCE)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -26,84 +37,232 @@ class VideoAnalysisPipeline:
 
         self.video_id: str = ''
         self.df: DataFrame = DataFrame()
+        self.embeddings: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self.tokens: TokenIndex = TokenIndex.from_sentences([])
+        self.preprocessor: Optional[DataProcessor] = None
         self.scripts: Dict[Tuple[int, ...], str] = {}
+        self.executor: DagExecutor = DagExecutor(self.stages())
 
-    def run(self) -> None:
+    def stages(self) -> List[Stage]:
+        """
+        Describes the pipeline as stages with their inputs and outputs. The download only
+        joins the graph at the timestamp alignment. Sentiment scoring only needs the sentences, so it
+        runs in parallel with the embeddings, and segmentation, summarization and alignment run in parallel.
+        Memoized stages declare the settings their outputs depend on. The LLM stages are not memoized,
+        so that reusing completions is left to the completion cache.
+
+        Returns:
+            List[Stage]: The pipeline stages.
+        """
+        return [
+            Stage('video_id', self.extract_video_id, ['link'], ['video_id'], pool='inline', memoize=False),
+            Stage('download', self.download_video, ['video_id'], ['video_path'], memoize=False),
+            Stage('sentences', self.read_sentences, ['transcript', 'video_id'], ['sentences'], pool='inline',
+                  memoize=False),
+            Stage('transcript', self.process_transcript, ['transcript', 'video_id', 'sentences'],
+                  ['df', 'embeddings', 'tokens'], memoize=False),
+            Stage('sentiment', self.score_sentiment, ['sentences'], ['sentiment'],
+                  config={'model': SENTIMENT_MODEL, 'backend': SENTIMENT_BACKEND}),
+            Stage('segments', self.segment, ['df', 'embeddings'], ['segments']),
+            Stage('summary', self.summarize, ['df', 'embeddings', 'tokens'], ['keywords', 'summary'],
+                  config={'method': SUMMARY_METHOD, 'neighbours': TEXTRANK_NEIGHBOURS, 'damping': TEXTRANK_DAMPING}),
+            Stage('align', self.align, ['df', 'video_path'], ['timestamps'], files=['video_path'],
+                  config={'enabled': AUDIO_ALIGNMENT, 'sample_rate': AUDIO_SAMPLE_RATE, 'frame': AUDIO_FRAME,
+                          'margin': VAD_MARGIN, 'min_pause': VAD_MIN_PAUSE, 'tolerance': ALIGN_TOLERANCE}),
+            Stage('enrich', self.enrich, ['df', 'sentiment', 'segments', 'timestamps'], ['enriched'], pool='inline',
+                  memoize=False),
+            Stage('highlights', self.find_highlights, ['enriched', 'embeddings'], ['highlights']),
+            Stage('generate', self.generate, ['enriched', 'embeddings', 'highlights', 'summary', 'keywords'],
+                  ['raws'], memoize=False),
+            Stage('validate', self.validate, ['enriched', 'raws'], ['scripts'], memoize=False),
+            Stage('save_texts', self.save_texts, ['scripts', 'video_id'], ['texts_path'], memoize=False),
+            Stage('edit_videos', self.edit_videos, ['enriched', 'scripts', 'video_id', 'video_path'], ['shorts'],
+                  memoize=False),
+        ]
+
+    def run(self, rerun_from: Optional[List[str]] = None) -> None:
         """
         Executes the video analysis pipeline.
+
+        Args:
+            rerun_from (Optional[List[str]]): Stages to recompute with everything after them,
+                instead of reusing their memoized outputs.
         """
-        self.download_video()
-        self.process_transcript()
-        self.analyze_content()
-        self.save_texts()
-        self.edit_videos()
+        values: Dict[str, Any] = self.executor.run({'link': self.link, 'transcript': self.transcript}, rerun_from)
 
-    def download_video(self) -> None:
+        self.video_id = values['video_id']
+        self.df = values['enriched']
+        self.embeddings = values['embeddings']
+        self.tokens = values['tokens']
+        self.scripts = values['scripts']
+
+    @staticmethod
+    def extract_video_id(link: str) -> str:
+        """
+        Extracts the video id from the video link.
+        """
+        return YouTubeService.extract_video_id(link)
+
+    @staticmethod
+    def download_video(video_id: str) -> str:
         """
         Downloads the video using YouTubeService.
         """
-        youtube: YouTubeService = YouTubeService()
-        self.video_id: str = youtube.extract_video_id(self.link)
-        youtube.download_video(video_id=self.video_id)
+        YouTubeService().download_video(video_id=video_id)
+        return os.path.join(VIDEOS_PATH, f"{video_id}.mp4")
+
+    @staticmethod
+    def read_sentences(transcript: str, video_id: str) -> DataFrame:
+        """
+        Reads the sentences of the video transcript.
+        """
+        return DataProcessor(TEXTS_PATH, transcript, video_id).read_sentences()
 
-    def process_transcript(self) -> None:
+    def process_transcript(self, transcript: str, video_id: str,
+                           sentences: DataFrame) -> Tuple[DataFrame, np.ndarray, TokenIndex]:
         """
         Processes the video transcript into a DataFrame.
         """
-        preprocessor: DataProcessor = DataProcessor(TEXTS_PATH, self.transcript, self.video_id)
-        self.df: DataFrame = preprocessor.create_dataframe()
+        self.preprocessor = DataProcessor(TEXTS_PATH, transcript, video_id)
+        df: DataFrame = self.preprocessor.create_dataframe(sentences=sentences)
+        return df, self.preprocessor.embeddings, self.preprocessor.tokens
 
-    def analyze_content(self) -> None:
+    @staticmethod
+    def score_sentiment(sentences: DataFrame) -> DataFrame:
         """
-        Analyzes the content to identify sentences for editing videos.
+        Scores the sentiment of every sentence.
         """
-        extractor: InsightExtractor = InsightExtractor(self.df)
-        segmenter: TextSegmenter = TextSegmenter(self.df)
-        llm: LLM = LLM()
+        columns: List[str] = ['emotion_score', 'positive_score', 'negative_score']
+        scores: DataFrame = sentences[['sentence']].copy()
+        SentimentAnalyzer(cache=registry.get('sentiment_cache')).apply_to_dataframe(scores)
+        return scores[columns]
 
-        keywords: List[str]
-        summary: List[int]
-        keywords, summary = extractor.get_summary(3)
-        highlights: List[int] = extractor.get_highlights(10)
+    @staticmethod
+    def segment(df: DataFrame, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Segments the transcript, unless the segments were loaded with the transcript.
+        """
+        columns: List[str] = [column for column in ['embedding_row', 'segment'] if column in df.columns]
+        segmented: DataFrame = df[columns].copy()
+        TextSegmenter(segmented, embeddings)
+        return segmented['segment'].to_numpy()
 
-        raws: Dict[Tuple[int, ...], str] = {}
-        for sentence_index in highlights + summary:
+    @staticmethod
+    def summarize(df: DataFrame, embeddings: np.ndarray, tokens: TokenIndex) -> Tuple[List[str], List[int]]:
+        """
+        Extracts keywords and summary sentences.
+        """
+        return InsightExtractor(df, embeddings, tokens).get_summary(3)
+
+    @staticmethod
+    def align(df: DataFrame, video_path: str) -> DataFrame:
+        """
+        Fits the sentence timestamps to the pauses in the audio of the video.
+        """
+        timestamps: DataFrame = df[['time', 'start_time', 'end_time']].copy()
+        if AUDIO_ALIGNMENT:
+            AudioAligner().apply_to_dataframe(timestamps, video_path)
+        return timestamps[['start_time', 'end_time']]
+
+    def enrich(self, df: DataFrame, sentiment: DataFrame, segments: np.ndarray, timestamps: DataFrame) -> DataFrame:
+        """
+        Joins sentiment scores, segments and aligned timestamps to the transcript and persists them with its artifact.
+        """
+        enriched: DataFrame = df.copy()
+        enriched[sentiment.columns] = sentiment
+        enriched['segment'] = segments
+        enriched[timestamps.columns] = timestamps
+
+        self.preprocessor.df = enriched
+        self.preprocessor.save_artifact()
+        return enriched
+
+    @staticmethod
+    def find_highlights(enriched: DataFrame, embeddings: np.ndarray) -> List[int]:
+        """
+        Finds emotional sentences, questions and intros.
+        """
+        return InsightExtractor(enriched, embeddings).get_highlights(10)
+
+    def generate(self, enriched: DataFrame, embeddings: np.ndarray, highlights: List[int], summary: List[int],
+                 keywords: List[str]) -> Dict[Tuple[int, ...], str]:
+        """
+        Generates candidate scripts around highlights and summary sentences.
+        """
+        segmenter: TextSegmenter = TextSegmenter(enriched, embeddings)
+        builder: ContextBuilder = ContextBuilder(enriched, embeddings)
+
+        candidates: List[int] = highlights + summary
+        closest_by_sentence: Dict[int, List[int]] = segmenter.get_n_closest_batch(candidates, n=2)
+
+        contexts: List[List[int]] = []
+        for sentence_index in candidates:
             consecutive: List[int] = segmenter.get_consecutive(sentence_index, 0, 2)
-            closest: List[int] = segmenter.get_n_closest(sentence_index, n=2)
-            context: List[int] = sorted(set(consecutive + closest))
+            closest: List[int] = closest_by_sentence[sentence_index]
+            contexts.append(sorted(set(consecutive + closest)))
 
-            generated: Tuple[int] = llm.generate(self.df, sentence_index, context, keywords)
+        planner: CandidatePlanner = CandidatePlanner(enriched)
+        requests: List[Tuple[int, List[int]]] = []
+        for sentence_index, context, members in planner.plan(candidates, contexts):
+            requests.append((sentence_index, builder.build(sentence_index, context, required=members)))
+        logging.info(f"{self.transcript}: {planner.avoided} of {len(candidates)} LLM calls avoided "
+                     f"by candidate planning.")
 
-            text: str = ' '.join(self.df.loc[list(generated), 'sentence'])
+        generations: List[Tuple[int, ...]] = LLM().generate_many(enriched, requests, keywords,
+                                                                    use_cache=COMPLETION_CACHE_ENABLED)
+
+        raws: Dict[Tuple[int, ...], str] = {}
+        for generated in generations:
+            text: str = ' '.join(enriched.loc[list(generated), 'sentence'])
 
             if generated and generated not in raws:
                 raws[tuple(generated)] = text
 
+        return raws
+
+    @staticmethod
+    def validate(enriched: DataFrame, raws: Dict[Tuple[int, ...], str]) -> Dict[Tuple[int, ...], str]:
+        """
+        Selects the best scripts.
+        """
         texts = "\n\n".join(f"{i}:\n{text}" for i, text in enumerate(raws.values()))
-        selected: List[int] = llm.validate(scripts=texts, largest=5)
+        selected: List[int] = LLM().validate(scripts=texts, largest=5, use_cache=COMPLETION_CACHE_ENABLED)
 
+        scripts: Dict[Tuple[int, ...], str] = {}
         for i, entry in enumerate(selected):
             indices: Tuple[int] = list(raws.keys())[entry]
-            text: str = ' '.join(self.df.loc[list(indices), 'sentence'])
-            self.scripts.update({indices: text})
+            text: str = ' '.join(enriched.loc[list(indices), 'sentence'])
+            scripts.update({indices: text})
 
-    def edit_videos(self) -> None:
+        return scripts
+
+    @staticmethod
+    def edit_videos(enriched: DataFrame, scripts: Dict[Tuple[int, ...], str], video_id: str,
+                    video_path: str) -> List[str]:
         """
         Creates short videos based on the selected sentences.
         """
-        for i, (indices, text) in enumerate(self.scripts.items()):
+        for text in scripts.values():
             logging.info(f"Cutting script: {text}")
-            VideoEditor.create_video(self.df, indices, self.video_id, i)
+        return VideoEditor(video_path).create_videos(enriched, list(scripts), video_id)
 
-    def save_texts(self) -> None:
+    @staticmethod
+    def save_texts(scripts: Dict[Tuple[int, ...], str], video_id: str) -> str:
         """
         Saves the generated text to a file for further reference.
         """
-        for _, text in self.scripts.items():
-            with open(os.path.join(RESULT_PATH, f"{self.video_id}.txt"), 'a') as file:
+        texts_path: str = os.path.join(RESULT_PATH, f"{video_id}.txt")
+        for _, text in scripts.items():
+            with open(texts_path, 'a') as file:
                 file.write(text + '\n')
+        return texts_path
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cuts short videos out of a transcribed YouTube video.")
+    parser.add_argument('--rerun-from', nargs='*', default=None, metavar='STAGE',
+                        help="stages to recompute with everything after them, ignoring memoized outputs")
+    arguments = parser.parse_args()
+
     pipeline: VideoAnalysisPipeline = VideoAnalysisPipeline(FILE_NUMBER)
-    pipeline.run()
+    pipeline.run(rerun_from=arguments.rerun_from)
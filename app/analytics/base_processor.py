@@ -2,17 +2,37 @@ import string
 import numpy as np
 
 from typing import List
-from sklearn.metrics.pairwise import cosine_similarity
+from pandas import DataFrame
 from openai import OpenAI
 
-from config.config import OPENAI_API_KEY, EMBEDDINGS_MODEL
+from app.services.embedding_service import EmbeddingService
+from app.services.registry import registry
+from app.services.vector_cache import VectorCache
+from config.config import OPENAI_API_KEY, EMBEDDINGS_CACHE_PATH, EMBEDDINGS_CACHE_SIZE
+
+registry.register('openai', lambda: OpenAI(api_key=OPENAI_API_KEY))
+registry.register('embedder', lambda: EmbeddingService(
+    registry.get('openai'), cache=VectorCache(EMBEDDINGS_CACHE_PATH, EMBEDDINGS_CACHE_SIZE)))
 
 
 class BaseTextProcessor:
     """
     A base class for implementing text processing functionalities.
     """
-    client = OpenAI(api_key=OPENAI_API_KEY)
+
+    @property
+    def client(self) -> OpenAI:
+        """
+        The shared OpenAI client, created on first use.
+        """
+        return registry.get('openai')
+
+    @property
+    def embedder(self) -> EmbeddingService:
+        """
+        The shared embedding service, created on first use.
+        """
+        return registry.get('embedder')
 
     def calculate_embeddings(self, text):
         """
@@ -24,8 +44,7 @@ class BaseTextProcessor:
         Returns:
             The embeddings for the given text.
         """
-        response = self.client.embeddings.create(input=text, model=EMBEDDINGS_MODEL)
-        return response.data[0].embedding
+        return self.embedder.embed([text])[0]
 
     @staticmethod
     def tokenize(text: str) -> List[str]:
@@ -44,43 +63,126 @@ class BaseTextProcessor:
         return words
 
     @staticmethod
-    def top_n_closest(target_embedding, df, n=3):
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """
+        Scales vectors to unit length, so that cosine similarity becomes a dot product.
+
+        Args:
+            vectors (np.ndarray): A vector or a matrix with one vector per row.
+
+        Returns:
+            np.ndarray: The normalized float32 vectors.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms: np.ndarray = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    @staticmethod
+    def embedding_rows(df: DataFrame, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Selects the embeddings of the DataFrame rows from the embedding matrix.
+
+        Args:
+            df (DataFrame): A DataFrame with an 'embedding_row' column pointing into the matrix.
+            embeddings (np.ndarray): The normalized embedding matrix.
+
+        Returns:
+            np.ndarray: The rows' embeddings; a view without copying when the rows are contiguous.
+        """
+        rows: np.ndarray = df['embedding_row'].to_numpy()
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows) and (np.diff(rows) == 1).all():
+            return embeddings[rows[0]:rows[-1] + 1]
+        return embeddings[rows]
+
+    @classmethod
+    def cosine_scores(cls, query_embeddings: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Computes cosine similarities of one or many queries to all embeddings in a single matrix product.
+
+        Args:
+            query_embeddings (np.ndarray): A query vector or a matrix with one query per row.
+            embeddings (np.ndarray): The normalized embedding matrix.
+
+        Returns:
+            np.ndarray: A (queries, sentences) matrix of similarities.
+        """
+        queries: np.ndarray = cls.normalize(query_embeddings).reshape(-1, embeddings.shape[1])
+        return queries @ embeddings.T
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Selects the k highest scores of each query with a partial sort.
+
+        Args:
+            scores (np.ndarray): A (queries, sentences) matrix of similarities.
+            k (int): The number of hits per query.
+
+        Returns:
+            np.ndarray: A (queries, k) matrix of row positions, most similar first.
+        """
+        k = min(k, scores.shape[1])
+        if k == 0:
+            return np.empty((scores.shape[0], 0), dtype=np.intp)
+
+        candidates: np.ndarray = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order: np.ndarray = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(candidates, order, axis=1)
+
+    @staticmethod
+    def above_threshold(scores: np.ndarray, threshold: float) -> List[np.ndarray]:
+        """
+        Selects the scores above a threshold for each query.
+
+        Args:
+            scores (np.ndarray): A (queries, sentences) matrix of similarities.
+            threshold (float): The similarity threshold.
+
+        Returns:
+            List[np.ndarray]: Row positions for each query, most similar first.
+        """
+        hits: List[np.ndarray] = []
+        for query_scores in scores:
+            positions: np.ndarray = np.flatnonzero(query_scores > threshold)
+            hits.append(positions[np.argsort(-query_scores[positions], kind='stable')])
+        return hits
+
+    @classmethod
+    def top_n_closest(cls, target_embedding, embeddings, n=3, index=None):
         """
         Identifies the top N closest sentences to a target sentence based on embeddings.
 
         Args:
             target_embedding: The embedding of the target sentence.
-            df: A DataFrame containing embeddings of other sentences to compare against.
+            embeddings: The normalized embedding matrix of sentences to compare against.
             n: The number of closest sentences to return.
+            index: An optional VectorIndex searched instead of the matrix, e.g. one spanning many videos.
 
         Returns:
-            Indices of the top N closest sentences in the DataFrame.
+            Row positions of the top N closest sentences in the matrix, or ids of the index.
         """
-        all_embeddings = np.array(df['embedding'].tolist())
-        similarities = cosine_similarity(target_embedding, all_embeddings)[0]
+        if index is not None:
+            _, ids = index.search(cls.normalize(target_embedding), n + 1)
+            return ids[0][1:]
 
-        closest_indices = np.argsort(similarities)[::-1][1:n + 1]  # + 1 excludes the target sentence
+        scores = cls.cosine_scores(target_embedding, embeddings)
+
+        closest_indices = cls.top_k(scores, n + 1)[0][1:]  # + 1 excludes the target sentence
         return closest_indices
 
-    @staticmethod
-    def threshold_closest(target_embedding, df, threshold=0.7):
+    @classmethod
+    def threshold_closest(cls, target_embedding, df, embeddings, threshold=0.7):
         """
         Finds sentences closer than a specified similarity threshold to a target sentence.
 
         Args:
             target_embedding: The embedding of the target sentence.
-            df: A DataFrame containing embeddings for comparison.
+            df: A DataFrame with sentences for comparison.
+            embeddings: The normalized embedding matrix referenced by df['embedding_row'].
             threshold: The similarity threshold for considering a sentence as close.
 
         Returns:
             A list of indices for sentences in df that are above the similarity threshold.
         """
-        sentence_similarities = []
-        for index, row in df.iterrows():
-            embedding = np.array(row['embedding']).reshape(1, -1)
-            similarity = cosine_similarity(embedding, target_embedding)[0][0]
-            if similarity > threshold:
-                sentence_similarities.append((index, similarity))
-
-        sorted_sentences = sorted(sentence_similarities, key=lambda x: x[1], reverse=True)
-        return [i for i, _ in sorted_sentences]
+        scores = cls.cosine_scores(target_embedding, cls.embedding_rows(df, embeddings))
+        return df.index[cls.above_threshold(scores, threshold)[0]].tolist()
@@ -0,0 +1,85 @@
+import logging
+import numpy as np
+from typing import List, Tuple
+from pandas import DataFrame
+
+from config.config import CANDIDATE_SEGMENT_GAP, CANDIDATE_JACCARD
+
+
+class CandidatePlanner:
+    """
+    Groups candidate sentences that would produce near-identical generation requests,
+    so that each group is sent to the model once.
+    """
+
+    def __init__(self, df: DataFrame, segment_gap: int = CANDIDATE_SEGMENT_GAP,
+                 jaccard: float = CANDIDATE_JACCARD) -> None:
+        """
+        Initializes the planner.
+
+        Args:
+            df (DataFrame): The DataFrame with a 'segment' column.
+            segment_gap (int): Candidates at most this many segments away from a central candidate join its cluster.
+            jaccard (float): Candidates whose contexts have at least this Jaccard similarity with the context
+                of a central candidate join its cluster.
+        """
+        self.df: DataFrame = df
+        self.segment_gap: int = segment_gap
+        self.jaccard: float = jaccard
+        self.avoided: int = 0
+
+    def cluster(self, candidates: List[int], contexts: List[List[int]]) -> List[List[int]]:
+        """
+        Clusters candidates around central candidates. Candidates are visited in the given order, and
+        each one joins the first cluster whose central candidate is at most segment_gap segments away
+        or has a context overlap of at least the Jaccard threshold; otherwise it becomes the central
+        candidate of a new cluster. Candidates are only compared with central candidates, so clusters
+        do not chain across the transcript.
+
+        Args:
+            candidates (List[int]): Candidate sentence indices in priority order.
+            contexts (List[List[int]]): Context indices of each candidate.
+
+        Returns:
+            List[List[int]]: Positions in candidates of each cluster, starting with its central candidate,
+                ordered by their central candidate.
+        """
+        segments: np.ndarray = self.df.loc[candidates, 'segment'].to_numpy()
+        sets: List[set] = [set(context) for context in contexts]
+
+        clusters: List[List[int]] = []
+        for i in range(len(candidates)):
+            for cluster in clusters:
+                central: int = cluster[0]
+                overlap: float = len(sets[i] & sets[central]) / max(len(sets[i] | sets[central]), 1)
+                if abs(segments[i] - segments[central]) <= self.segment_gap or overlap >= self.jaccard:
+                    cluster.append(i)
+                    break
+            else:
+                clusters.append([i])
+        return clusters
+
+    def plan(self, candidates: List[int], contexts: List[List[int]]) -> List[Tuple[int, List[int], List[int]]]:
+        """
+        Plans one generation request per cluster of candidates. The central candidate of a cluster
+        becomes its central sentence and the contexts of all members are merged.
+
+        Args:
+            candidates (List[int]): Candidate sentence indices in priority order; duplicates are allowed.
+            contexts (List[List[int]]): Context indices of each candidate.
+
+        Returns:
+            List[Tuple[int, List[int], List[int]]]: A central sentence index, its merged context and the
+                other members of its cluster, which the context has to keep, per request.
+        """
+        requests: List[Tuple[int, List[int], List[int]]] = []
+        for cluster in self.cluster(candidates, contexts):
+            context: List[int] = sorted(set().union(*(contexts[i] for i in cluster)))
+            central: int = candidates[cluster[0]]
+            members: List[int] = list(dict.fromkeys(candidates[i] for i in cluster[1:] if candidates[i] != central))
+            requests.append((central, context, members))
+
+        self.avoided = len(candidates) - len(requests)
+        logging.info(f"Planned {len(requests)} generation requests for {len(candidates)} candidates, "
+                     f"{self.avoided} LLM calls avoided.")
+        return requests
@@ -0,0 +1,83 @@
+import logging
+import numpy as np
+from typing import List, Optional
+from pandas import DataFrame
+
+from app.analytics.base_processor import BaseTextProcessor
+from config.config import CONTEXT_TOKEN_BUDGET, CONTEXT_SIMILARITY_WEIGHT, CONTEXT_DISTANCE_SCALE
+
+
+class ContextBuilder(BaseTextProcessor):
+    """
+    Selects context sentences for a prompt within a token budget.
+    """
+
+    def __init__(self, df: DataFrame, embeddings: np.ndarray, token_budget: int = CONTEXT_TOKEN_BUDGET,
+                 similarity_weight: float = CONTEXT_SIMILARITY_WEIGHT,
+                 distance_scale: float = CONTEXT_DISTANCE_SCALE) -> None:
+        """
+        Initializes the builder and estimates the prompt tokens of every sentence.
+
+        Args:
+            df (DataFrame): The DataFrame containing sentences and embedding rows.
+            embeddings (np.ndarray): The normalized embedding matrix referenced by df['embedding_row'].
+            token_budget (int): Maximum estimated tokens of the selected context.
+            similarity_weight (float): Weight of similarity to the central sentence; the rest goes to proximity.
+            distance_scale (float): Distance in sentences at which proximity drops to 1/e.
+        """
+        self.df: DataFrame = df
+        self.embeddings: np.ndarray = self.embedding_rows(df, embeddings)
+        self.token_budget: int = token_budget
+        self.similarity_weight: float = similarity_weight
+        self.distance_scale: float = distance_scale
+
+        # a sentence is rendered as "<index>: <sentence>\n", ~4 characters per token
+        lines: np.ndarray = df['sentence'].str.len().to_numpy() + df.index.astype(str).str.len().to_numpy() + 3
+        self.tokens: np.ndarray = lines // 4 + 1
+
+    def count_tokens(self, indices: List[int]) -> int:
+        """
+        Estimates the prompt tokens of a context.
+
+        Args:
+            indices (List[int]): Indices of the context sentences.
+
+        Returns:
+            int: The estimated number of tokens.
+        """
+        return int(self.tokens[self.df.index.get_indexer(indices)].sum())
+
+    def build(self, sentence_index: int, candidates: List[int], required: Optional[List[int]] = None) -> List[int]:
+        """
+        Ranks candidate sentences by similarity to the central sentence and by distance
+        in the transcript, and keeps the best ones that fit into the token budget.
+
+        Args:
+            sentence_index (int): The index of the central sentence, which is always kept.
+            candidates (List[int]): Indices of the candidate context sentences.
+            required (Optional[List[int]]): Indices ranked right after the central sentence, such as the
+                other candidates of a planned request, so that they are the last to be trimmed.
+
+        Returns:
+            List[int]: Indices of the selected sentences in transcript order.
+        """
+        central: int = self.df.index.get_loc(sentence_index)
+        positions: np.ndarray = self.df.index.get_indexer(candidates)
+        positions = positions[positions != central]
+        first: np.ndarray = self.df.index.get_indexer(list(dict.fromkeys(required or [])))
+        first = first[first != central]
+        positions = positions[~np.isin(positions, first)]
+
+        similarity: np.ndarray = self.embeddings[positions] @ self.embeddings[central]
+        proximity: np.ndarray = np.exp(-np.abs(positions - central) / self.distance_scale)
+        scores: np.ndarray = self.similarity_weight * similarity + (1 - self.similarity_weight) * proximity
+
+        ranked: np.ndarray = np.concatenate([[central], first, positions[np.argsort(-scores, kind='stable')]])
+        selected: np.ndarray = ranked[np.cumsum(self.tokens[ranked]) <= self.token_budget]
+        if not len(selected):
+            selected = ranked[:1]
+
+        context: List[int] = self.df.index[np.sort(selected)].tolist()
+        logging.info(f"Context for sentence {sentence_index}: {len(context)} of {len(candidates)} sentences, "
+                     f"~{self.tokens[selected].sum()} tokens.")
+        return context
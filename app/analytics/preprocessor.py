@@ -1,10 +1,15 @@
 import os
+import time
+import hashlib
+import numpy as np
 import pandas as pd
-import pickle
 import logging
+from typing import Dict, List, Optional
 
 from app.analytics.base_processor import BaseTextProcessor
-from config.config import EMBEDDINGS_PATH
+from app.analytics.token_index import TokenIndex
+from app.services.artifact_store import ArtifactStore
+from config.config import EMBEDDINGS_PATH, EMBEDDINGS_MODEL, SENTIMENT_MODEL, SENTIMENT_BACKEND
 
 
 class DataProcessor(BaseTextProcessor):
@@ -24,45 +29,137 @@ class DataProcessor(BaseTextProcessor):
         self.file_path: str = os.path.join(data_path, f"{file}.csv")
         self.video_id: str = video_id
         self.df: pd.DataFrame = pd.DataFrame()
+        self.embeddings: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self.tokens: TokenIndex = TokenIndex.from_sentences([])
+        self.artifacts: ArtifactStore = ArtifactStore()
+        self.artifact_file: str = ''
+        self.artifact_digest: str = ''
+        self.artifact_projected: bool = False
 
-    def create_dataframe(self) -> pd.DataFrame:
+    def read_sentences(self) -> pd.DataFrame:
         """
-        Creates and preprocesses the dataframe from the CSV file.
+        Reads the sentences and their durations from the CSV file.
+
+        Returns:
+            pd.DataFrame: The transcript with 'sentence' and 'time' columns.
+        """
+        return pd.read_csv(self.file_path).rename(columns={'length': 'time'})
+
+    def create_dataframe(self, columns: Optional[List[str]] = None,
+                         sentences: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Creates and preprocesses the dataframe from the CSV file, or loads it from the artifact
+        saved for the same CSV and models.
+
+        Args:
+            columns (Optional[List[str]]): Columns to load from a saved artifact; all by default.
+            sentences (Optional[pd.DataFrame]): The CSV contents if already read with read_sentences.
 
         Returns:
             pd.DataFrame: The preprocessed dataframe.
         """
-        self.df = pd.read_csv(self.file_path)
+        settings: Dict[str, str] = {'embeddings': EMBEDDINGS_MODEL, 'sentiment': f"{SENTIMENT_MODEL}:{SENTIMENT_BACKEND}"}
+        self.artifact_file = self.artifacts.file(self.video_id, ArtifactStore.fingerprint(self.file_path, settings))
+        if self.load_artifact(columns):
+            # the saved timestamps may be aligned to the audio with other settings, so they are estimated again
+            if 'time' in self.df.columns:
+                self.add_timestamps()
+            return self.df
+
+        timings: Dict[str, float] = {}
+        start: float = time.perf_counter()
+
+        self.df = sentences.copy() if sentences is not None else self.read_sentences()
+        timings['read'] = time.perf_counter() - start
 
-        self.df.rename(columns={'length': 'time'}, inplace=True)
         self.add_embeddings(self.video_id)
+        timings['embeddings'] = time.perf_counter() - start - sum(timings.values())
+
+        token_lists: List[List[str]] = TokenIndex.split(self.df['sentence'].tolist())
+        self.tokens = TokenIndex.from_token_lists(token_lists)
+        self.df['tokens'] = token_lists
+        timings['tokenize'] = time.perf_counter() - start - sum(timings.values())
+
+        lengths: np.ndarray = self.tokens.lengths()
+        self.df['tempo'] = lengths / self.df['time']
+        self.df['length'] = lengths
+        self.df['question'] = self.df['sentence'].str.contains('?', regex=False)
 
-        self.df['tokens'] = self.df['sentence'].apply(self.tokenize)
-        self.df['tempo'] = self.df['tokens'].apply(len) / self.df['time']
-        self.df['length'] = self.df['tokens'].apply(len)
-        self.df['question'] = self.df['sentence'].str.contains('\?')
+        self.add_timestamps()
+        timings['statistics'] = time.perf_counter() - start - sum(timings.values())
 
-        # todo: found out too late that there are pauses between phrases:(
+        logging.info("DataFrame created in " + ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in timings.items()))
+        self.save_artifact()
+        return self.df
+
+    def add_timestamps(self) -> None:
+        """
+        Estimates the start and end time of every sentence from the sentence durations.
+        """
+        # estimates without the pauses between phrases, AudioAligner fits them to the audio
         self.df['start_time'] = self.df['time'].cumsum().shift(fill_value=0)
         self.df['end_time'] = self.df['start_time'] + self.df['time']
 
-        return self.df
+    def load_artifact(self, columns: Optional[List[str]] = None) -> bool:
+        """
+        Loads the dataframe, embeddings and tokens from the saved artifact, memory-mapping the file.
+
+        Args:
+            columns (Optional[List[str]]): Columns to load; all by default.
+
+        Returns:
+            bool: Whether the artifact was found.
+        """
+        start: float = time.perf_counter()
+        table = self.artifacts.load(self.artifact_file, columns)
+        if table is None:
+            return False
+
+        self.df = ArtifactStore.to_dataframe(table)
+        if 'embedding' in table.column_names:
+            self.embeddings = ArtifactStore.to_embeddings(table)
+        if 'tokens' in table.column_names:
+            self.tokens = ArtifactStore.to_tokens(table)
+            self.df.insert(min(table.column_names.index('tokens'), len(self.df.columns)), 'tokens',
+                           self.tokens.token_lists())
+        self.artifact_digest = ArtifactStore.digest(self.df)
+        self.artifact_projected = columns is not None
+
+        logging.info(f"Loaded {self.artifact_file} in {time.perf_counter() - start:.3f}s.")
+        return True
+
+    def save_artifact(self) -> None:
+        """
+        Saves the dataframe with its embeddings and tokens, unless the saved artifact has the same contents.
+        Call it again after adding or changing columns, such as segments or sentiment scores, to persist them.
+        """
+        digest: str = ArtifactStore.digest(self.df)
+        if digest == self.artifact_digest:
+            return
+        if self.artifact_projected:
+            logging.warning(f"Not saving {self.artifact_file}: it was loaded with a column projection.")
+            return
+        self.artifacts.save(self.artifact_file, self.df, self.embeddings, self.tokens)
+        self.artifact_digest = digest
 
     def add_embeddings(self, video_id: str) -> None:
         """
-        Adds embeddings to the dataframe, either by loading from a file or calculating them.
+        Adds embeddings for the dataframe as a normalized float32 matrix memory-mapped from an .npy file.
+        The dataframe only keeps each sentence's row in the matrix. Sentences already seen in any video
+        are served from the embeddings cache, the rest are calculated.
 
         Args:
             video_id (str): The video identifier for which embeddings are added.
         """
-        embeddings_file: str = os.path.join(EMBEDDINGS_PATH, f'{video_id}.pkl')
+        sentences = self.df['sentence'].tolist()
+        digest: str = hashlib.sha1("\n".join([self.embedder.model] + sentences).encode()).hexdigest()[:12]
+        embeddings_file: str = os.path.join(EMBEDDINGS_PATH, f'{video_id}_{digest}.npy')
 
         if os.path.exists(embeddings_file):
-            logging.info(f'Embeddings for {video_id} are already cached. Loading from pickle.')
-            with open(embeddings_file, 'rb') as file:
-                self.df['embedding'] = pickle.load(file)
+            logging.info(f'Embedding matrix for {video_id} is already saved. Loading from {embeddings_file}.')
         else:
-            logging.info(f'Calculating embeddings for {video_id}.')
-            self.df['embedding'] = self.df['sentence'].apply(lambda x: self.calculate_embeddings(x))
-            with open(embeddings_file, 'wb') as file:
-                pickle.dump(self.df['embedding'].tolist(), file)
+            logging.info(f'Adding embeddings for {video_id}.')
+            np.save(embeddings_file, self.normalize(self.embedder.embed(sentences)))
+
+        self.embeddings = np.load(embeddings_file, mmap_mode='r')
+        self.df['embedding_row'] = np.arange(len(self.df))
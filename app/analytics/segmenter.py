@@ -2,12 +2,60 @@ import numpy as np
 import math
 import logging
 
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from scipy.signal import argrelextrema
-from sklearn.metrics.pairwise import cosine_similarity
 from pandas import DataFrame
 
 from app.analytics.base_processor import BaseTextProcessor
+from app.analytics.vector_index import VectorIndex, create_index
+
+
+def rev_sigmoid(x: float) -> float:
+    """
+    Reverse sigmoid function used for weighting similarities.
+
+    Args:
+        x (float): The input value.
+
+    Returns:
+        float: The output of the reverse sigmoid function.
+    """
+    return 1 / (1 + math.exp(0.5 * x))
+
+
+def activation_weights(p_size: int) -> np.ndarray:
+    """
+    Weights of the diagonals 1..p_size of the similarity matrix.
+
+    Args:
+        p_size (int): The size of the paragraph to consider.
+
+    Returns:
+        np.ndarray: The reverse sigmoid over [-10, 10] at p_size points.
+    """
+    x: np.ndarray = np.linspace(-10, 10, p_size)
+    return np.vectorize(rev_sigmoid)(x)
+
+
+def add_band(activated: np.ndarray, embeddings: np.ndarray, weights: np.ndarray, start: int = 0) -> None:
+    """
+    Adds the weighted similarities of each sentence to the len(weights) following sentences,
+    for the pairs whose later sentence is at position start or after. Only these diagonals
+    of the similarity matrix are computed, in O(N * len(weights)) memory.
+
+    Args:
+        activated (np.ndarray): Activations to update in place, one per embedding.
+        embeddings (np.ndarray): The normalized embedding matrix.
+        weights (np.ndarray): Weight of the k-th following sentence at index k - 1.
+        start (int): Position of the first sentence not yet accounted for.
+    """
+    for k in range(1, len(weights) + 1):
+        low: int = max(start - k, 0)
+        high: int = len(embeddings) - k
+        if high <= low:
+            continue
+        similarities: np.ndarray = np.einsum('ij,ij->i', embeddings[low:high], embeddings[low + k:high + k])
+        activated[low:high] += similarities.astype(np.float64) * weights[k - 1]
 
 
 class TextSegmenter(BaseTextProcessor):
@@ -15,15 +63,24 @@ class TextSegmenter(BaseTextProcessor):
     Class for segmenting text into meaningful blocks based on sentence embeddings.
     """
 
-    def __init__(self, df: DataFrame) -> None:
+    def __init__(self, df: DataFrame, embeddings: np.ndarray) -> None:
         """
-        Initializes the TextSegmenter with a DataFrame and segments the text.
+        Initializes the TextSegmenter with a DataFrame and segments the text,
+        unless the DataFrame already has segments, e.g. from a saved artifact.
 
         Args:
-            df (DataFrame): The DataFrame containing text data and embeddings.
+            df (DataFrame): The DataFrame containing text data and embedding rows.
+            embeddings (np.ndarray): The normalized embedding matrix referenced by df['embedding_row'].
         """
         self.df: DataFrame = df
-        self.segment_text(p_size=10)
+        self.embeddings: np.ndarray = self.embedding_rows(df, embeddings)
+        self.index: Optional[VectorIndex] = None
+        self.segment_offsets: np.ndarray = np.zeros(1, dtype=np.intp)
+        if 'segment' in df.columns:
+            segments: np.ndarray = df['segment'].to_numpy()
+            self.segment_offsets = np.searchsorted(segments, np.arange(segments.max() + 2)).astype(np.intp)
+        else:
+            self.segment_text(p_size=10)
 
     def get_n_closest(self, sentence_index: int, n: int) -> List[int]:
         """
@@ -36,13 +93,52 @@ class TextSegmenter(BaseTextProcessor):
         Returns:
             List[int]: List of indices for the closest sentences.
         """
-        sentence_embedding: np.ndarray = np.array(self.df.loc[sentence_index, 'embedding']).reshape(1, -1)
-        closest_indexes: List[int] = self.top_n_closest(sentence_embedding, self.df, n)
-        closest_paragraphs: List[int] = self.df.loc[closest_indexes, 'segment'].unique().tolist()
-        context_indices: List[int] = self.df[self.df['segment'].isin(closest_paragraphs)].index.tolist()
+        return self.get_n_closest_batch([sentence_index], n)[sentence_index]
+
+    def get_n_closest_batch(self, sentence_indices: List[int], n: int) -> Dict[int, List[int]]:
+        """
+        Finds n closest sentences for many sentences at once in the configured vector index,
+        which is built on the first call, and expands them to their whole segments.
+
+        Args:
+            sentence_indices (List[int]): Indices of the sentences in the DataFrame.
+            n (int): The number of closest sentences to find for each sentence.
+
+        Returns:
+            Dict[int, List[int]]: Context indices for each of the given sentences.
+        """
+        if self.index is None:
+            self.index = create_index(self.embeddings.shape[1])
+            self.index.add(self.embeddings)
 
-        logging.info(f"Context indices for sentence {sentence_index}: {context_indices}")
-        return context_indices
+        positions: np.ndarray = self.df.index.get_indexer(sentence_indices)
+        _, closest = self.index.search(self.embeddings[positions], n + 1)
+        closest = closest[:, 1:]  # + 1 excludes the target sentence
+
+        segments: np.ndarray = self.df['segment'].to_numpy()
+        contexts: Dict[int, List[int]] = {}
+        for sentence_index, closest_positions in zip(sentence_indices, closest):
+            closest_positions = closest_positions[closest_positions >= 0]  # approximate search may find fewer
+            context_positions: np.ndarray = self.expand_segments(np.unique(segments[closest_positions]))
+            contexts[sentence_index] = self.df.index[context_positions].tolist()
+            logging.info(f"Context indices for sentence {sentence_index}: {contexts[sentence_index]}")
+
+        return contexts
+
+    def expand_segments(self, segments: np.ndarray) -> np.ndarray:
+        """
+        Lists the positions of all sentences in the given segments using the segment offsets.
+
+        Args:
+            segments (np.ndarray): Sorted segment numbers.
+
+        Returns:
+            np.ndarray: Positions of the sentences of these segments, in order.
+        """
+        starts: np.ndarray = self.segment_offsets[segments]
+        lengths: np.ndarray = self.segment_offsets[segments + 1] - starts
+        shifts: np.ndarray = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return shifts + np.arange(lengths.sum())
 
     def get_consecutive(self, sentence_number: int, back: int = 2, forward: int = 2) -> List[int]:
         """
@@ -58,67 +154,150 @@ class TextSegmenter(BaseTextProcessor):
         """
         paragraph: int = self.df.loc[sentence_number, 'segment']
         start_paragraph: int = max(paragraph - back, 0)
-        end_paragraph: int = paragraph + forward
+        end_paragraph: int = min(paragraph + forward + 1, len(self.segment_offsets) - 1)
 
-        context: List[int] = self.df.loc[self.df['segment'].between(start_paragraph, end_paragraph)].index.tolist()
-        return sorted(context)
+        positions: slice = slice(self.segment_offsets[start_paragraph], self.segment_offsets[end_paragraph])
+        return self.df.index[positions].tolist()
 
-    def rev_sigmoid(self, x: float) -> float:
+    def activate_similarities(self, embeddings: np.ndarray, p_size: int = 10) -> np.ndarray:
         """
-        Reverse sigmoid function used for weighting similarities.
+        Applies an activation function to the similarities to highlight significant segments.
 
         Args:
-            x (float): The input value.
+            embeddings (np.ndarray): The normalized embedding matrix.
+            p_size (int): The size of the paragraph to consider.
 
         Returns:
-            float: The output of the reverse sigmoid function.
+            np.ndarray: Activated similarities highlighting significant text blocks.
         """
-        return 1 / (1 + math.exp(0.5 * x))
+        activated_similarities: np.ndarray = np.zeros(len(embeddings))
+        add_band(activated_similarities, embeddings, activation_weights(p_size))
+
+        return activated_similarities
 
-    def activate_similarities(self, similarities: np.ndarray, p_size: int = 10) -> np.ndarray:
+    def segment_text(self, p_size: int = 10) -> None:
         """
-        Applies an activation function to the similarities to highlight significant segments.
+        Segments the text into paragraphs based on embeddings and similarity activations.
 
         Args:
-            similarities (np.ndarray): The cosine similarity matrix.
-            p_size (int): The size of the paragraph to consider.
+            p_size (int): The size of the paragraph to consider for activation.
+        """
+        activated_similarities: np.ndarray = self.activate_similarities(self.embeddings, p_size=p_size)
+        minimas: Tuple = argrelextrema(activated_similarities, np.less, order=2)
+
+        split_points: np.ndarray = minimas[0]
+
+        # a segment starts at every split point; offsets[s]:offsets[s + 1] are the positions of segment s
+        starts: np.ndarray = np.zeros(len(self.df), dtype=int)
+        starts[split_points] = 1
+        self.df['segment'] = np.cumsum(starts)
+        self.segment_offsets = np.concatenate([[0], split_points, [len(self.df)]]).astype(np.intp)
+        logging.info("Text segmented successfully.")
+
+
+class StreamingSegmenter:
+    """
+    Segments a live transcript incrementally as new sentence embeddings arrive.
+    A split point is final once the activations it is compared with no longer change,
+    and the final split points equal those of TextSegmenter on the whole transcript.
+    """
+
+    def __init__(self, p_size: int = 10, order: int = 2) -> None:
+        """
+        Initializes an empty segmenter.
+
+        Args:
+            p_size (int): The size of the paragraph to consider for activation.
+            order (int): Number of neighbours on each side a minimum must be lower than.
+        """
+        self.p_size: int = p_size
+        self.order: int = order
+        self.weights: np.ndarray = activation_weights(p_size)
+        self.embeddings: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self.activated: np.ndarray = np.empty(0)
+        self.size: int = 0
+        self.split_points: List[int] = []
+        self.checked: int = 0
+
+    def append(self, embeddings: np.ndarray) -> List[int]:
+        """
+        Adds normalized embeddings of new sentences and updates the activations of the last
+        p_size sentences and of the new ones.
+
+        Args:
+            embeddings (np.ndarray): A (sentences, dimensions) matrix of normalized embeddings.
 
         Returns:
-            np.ndarray: Activated similarities highlighting significant text blocks.
+            List[int]: Split points that became final with these sentences.
         """
-        x: np.ndarray = np.linspace(-10, 10, p_size)
-        y: np.ndarray = np.vectorize(self.rev_sigmoid)(x)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        start: int = self.size
+        self.reserve(start + len(embeddings), embeddings.shape[1])
+        self.embeddings[start:start + len(embeddings)] = embeddings
+        self.size += len(embeddings)
 
-        activation_weights: np.ndarray = np.pad(y, (0, similarities.shape[0] - p_size), 'constant')
-        diagonals: List[np.ndarray] = [similarities.diagonal(each) for each in range(1, similarities.shape[0])]
-        diagonals: List[np.ndarray] = [np.pad(each, (0, similarities.shape[0] - len(each)), 'constant') for each in
-                                       diagonals]
-        diagonals: np.ndarray = np.stack(diagonals) * activation_weights[:len(diagonals)].reshape(-1, 1)
-        activated_similarities: np.ndarray = np.sum(diagonals, axis=0)
+        add_band(self.activated[:self.size], self.embeddings[:self.size], self.weights, start)
+        return self.find_splits(final=False)
 
-        return activated_similarities
+    def reserve(self, size: int, dimensions: int) -> None:
+        """
+        Grows the buffers geometrically so that appends are amortized O(1) per sentence.
 
-    def segment_text(self, p_size: int = 10) -> None:
+        Args:
+            size (int): Required number of sentences.
+            dimensions (int): Embedding dimensions.
         """
-        Segments the text into paragraphs based on embeddings and similarity activations.
+        if size <= len(self.activated):
+            return
+        capacity: int = max(size, 2 * len(self.activated), 64)
+        embeddings: np.ndarray = np.zeros((capacity, dimensions), dtype=np.float32)
+        if self.size:
+            embeddings[:self.size] = self.embeddings[:self.size]
+        activated: np.ndarray = np.zeros(capacity)
+        activated[:self.size] = self.activated[:self.size]
+        self.embeddings, self.activated = embeddings, activated
+
+    def find_splits(self, final: bool) -> List[int]:
+        """
+        Finds new local minima among the activations that can no longer change.
 
         Args:
-            p_size (int): The size of the paragraph to consider for activation.
+            final (bool): Whether the transcript has ended, so that all activations are final.
+
+        Returns:
+            List[int]: The new split points.
         """
-        embeddings_matrix: np.ndarray = np.array(self.df['embedding'].tolist())
-        cosine_sim_matrix: np.ndarray = cosine_similarity(embeddings_matrix)
+        # the activation of a sentence is final once p_size sentences follow it
+        stable: int = self.size if final else max(self.size - self.p_size, 0)
+        end: int = stable if final else stable - self.order
+        if end <= self.checked:
+            return []
 
-        activated_similarities: np.ndarray = self.activate_similarities(cosine_sim_matrix, p_size=p_size)
-        minimas: Tuple = argrelextrema(activated_similarities, np.less, order=2)
+        low: int = max(self.checked - self.order, 0)
+        window: np.ndarray = self.activated[low:stable]
+        minimas: np.ndarray = argrelextrema(window, np.less, order=self.order)[0] + low
+        found: List[int] = [int(each) for each in minimas if self.checked <= each < end]
 
-        split_points: List[int] = [each for each in minimas[0]]
+        self.checked = end
+        self.split_points.extend(found)
+        return found
 
-        segment_numbers: List[int] = []
-        segment_number: int = 0
-        for num in range(len(self.df)):
-            if num in split_points:
-                segment_number += 1
-            segment_numbers.append(segment_number)
+    def finish(self) -> List[int]:
+        """
+        Finalizes the split points once the transcript has ended.
 
-        self.df['segment'] = segment_numbers
-        logging.info("Text segmented successfully.")
+        Returns:
+            List[int]: Split points that became final.
+        """
+        return self.find_splits(final=True)
+
+    def segments(self) -> np.ndarray:
+        """
+        Segment numbers of the sentences received so far, based on the final split points.
+
+        Returns:
+            np.ndarray: One segment number per sentence.
+        """
+        segment_numbers: np.ndarray = np.zeros(self.size, dtype=int)
+        segment_numbers[self.split_points] = 1
+        return np.cumsum(segment_numbers)
@@ -1,25 +1,117 @@
 import logging
+import numpy as np
 import pandas as pd
 import torch
+from functools import partial
+from typing import List, Optional
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from torch.nn.functional import softmax
 
-from config.config import SENTIMENT_MODEL
+from app.services.registry import registry
+from app.services.vector_cache import VectorCache
+from config.config import (SENTIMENT_MODEL, SENTIMENT_BACKEND, SENTIMENT_BATCH_SIZE, SENTIMENT_THREADS,
+                           SENTIMENT_CACHE_PATH, SENTIMENT_CACHE_SIZE)
 
 
 class SentimentAnalyzer:
     """
     Sentiment analysis class using transformers to predict sentiment scores for texts.
     """
+    labels: List[str] = ['negative', 'neutral', 'positive']
+    backends: List[str] = ['fp32', 'int8', 'torchscript']
 
-    def __init__(self) -> None:
+    def __init__(self, backend: str = SENTIMENT_BACKEND, batch_size: int = SENTIMENT_BATCH_SIZE,
+                 cache: Optional[VectorCache] = None) -> None:
         """
         Initializes the SentimentAnalyzer with the specified sentiment model.
+        The model and tokenizer are shared by all analyzers and loaded on first use.
+
+        Args:
+            backend (str): 'fp32' for the original model, 'int8' for a dynamically quantized model
+                or 'torchscript' for a traced model.
+            batch_size (int): Number of sentences per forward pass.
+            cache (Optional[VectorCache]): Cache of scores keyed by (model, sentence).
         """
+        if backend not in self.backends:
+            raise ValueError(f"Unknown sentiment backend '{backend}', expected one of {self.backends}.")
+
         self.model_name: str = SENTIMENT_MODEL
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
-        logging.info("SentimentAnalyzer model and tokenizer loaded.")
+        self.backend: str = backend
+        self.batch_size: int = batch_size
+        self.cache: Optional[VectorCache] = cache
+
+    @property
+    def tokenizer(self):
+        """
+        The shared tokenizer of the sentiment model.
+        """
+        return registry.get('sentiment_tokenizer')
+
+    @property
+    def model(self):
+        """
+        The shared sentiment model for the selected backend.
+        """
+        return registry.get(f'sentiment_model:{self.backend}')
+
+    def warm_up(self) -> None:
+        """
+        Loads the tokenizer and the model ahead of the first prediction.
+        """
+        registry.warm_up(['sentiment_tokenizer', f'sentiment_model:{self.backend}'])
+
+    @staticmethod
+    def load_tokenizer():
+        """
+        Loads the tokenizer of the sentiment model.
+
+        Returns:
+            The tokenizer.
+        """
+        return AutoTokenizer.from_pretrained(SENTIMENT_MODEL)
+
+    @staticmethod
+    def load_model(backend: str):
+        """
+        Loads the sentiment model and converts it for the given backend. Sets the number of torch
+        intra-op threads to SENTIMENT_THREADS, unless it is 0.
+
+        Args:
+            backend (str): One of SentimentAnalyzer.backends.
+
+        Returns:
+            The model ready for inference.
+        """
+        if SENTIMENT_THREADS:
+            torch.set_num_threads(SENTIMENT_THREADS)
+
+        if backend == 'torchscript':
+            model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL, torchscript=True).eval()
+            example = registry.get('sentiment_tokenizer')(["An example sentence to trace the model."],
+                                                          return_tensors="pt")
+            with torch.inference_mode():
+                model = torch.jit.trace(model, (example['input_ids'], example['attention_mask']))
+        else:
+            model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+            if backend == 'int8':
+                model = torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+        logging.info(f"SentimentAnalyzer model ({backend}) loaded.")
+        return model
+
+    def forward(self, inputs) -> torch.Tensor:
+        """
+        Runs the model on tokenized inputs.
+
+        Args:
+            inputs: Tokenizer output with input ids and attention mask.
+
+        Returns:
+            torch.Tensor: The classification logits.
+        """
+        if self.backend == 'torchscript':
+            return self.model(inputs['input_ids'], inputs['attention_mask'])[0]
+        return self.model(**inputs).logits
 
     def predict_sentiment(self, text: str) -> dict:
         """
@@ -31,14 +123,51 @@ class SentimentAnalyzer:
         Returns:
             dict: A dictionary with sentiment scores for negative, neutral, and positive sentiments.
         """
-        inputs = self.tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-        with torch.no_grad():
-            logits = self.model(**inputs).logits
-
-        scores = softmax(logits, dim=1)
-        scores_dict = {label: score.item() for label, score in zip(['negative', 'neutral', 'positive'], scores[0])}
+        scores = self.predict_batch([text])
+        scores_dict = {label: float(score) for label, score in zip(self.labels, scores[0])}
         return scores_dict
 
+    def predict_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Predicts sentiment scores for many texts. Texts are sorted by length and split
+        into batches, so that each batch is padded only to its longest text.
+
+        Args:
+            texts (List[str]): The texts to analyze.
+
+        Returns:
+            np.ndarray: A (texts, 3) matrix of negative, neutral and positive scores in the input order.
+        """
+        order: np.ndarray = np.argsort([len(text) for text in texts], kind='stable')
+        scores: np.ndarray = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+
+        with torch.inference_mode():
+            for start in range(0, len(texts), self.batch_size):
+                positions: np.ndarray = order[start:start + self.batch_size]
+                inputs = self.tokenizer([texts[i] for i in positions], return_tensors="pt", padding=True,
+                                        truncation=True, max_length=512)
+                logits = self.forward(inputs)
+                scores[positions] = softmax(logits, dim=1).numpy()
+
+        return scores
+
+    def predict_cached(self, texts: List[str]) -> np.ndarray:
+        """
+        Predicts sentiment scores, running the model only for texts missing from the cache.
+
+        Args:
+            texts (List[str]): The texts to analyze.
+
+        Returns:
+            np.ndarray: A (texts, 3) matrix of negative, neutral and positive scores in the input order.
+        """
+        if self.cache is None:
+            return self.predict_batch(texts)
+
+        keys: List[str] = [VectorCache.key(f"{self.model_name}:{self.backend}", text) for text in texts]
+        scores: List[np.ndarray] = self.cache.fetch(keys, texts, self.predict_batch)
+        return np.array(scores, dtype=np.float32).reshape(-1, len(self.labels))
+
     def apply_to_dataframe(self, df: pd.DataFrame) -> None:
         """
         Applies sentiment analysis to all sentences in a DataFrame and adds sentiment scores.
@@ -46,15 +175,14 @@ class SentimentAnalyzer:
         Args:
             df (pd.DataFrame): The DataFrame containing the sentences to analyze.
         """
-        non_neutrals, positives, negatives = [], [], []
+        scores = self.predict_cached(df['sentence'].tolist())
 
-        for text in df['sentence']:
-            sentiment_scores = self.predict_sentiment(text)
-            non_neutrals.append(1 - sentiment_scores['neutral'])
-            positives.append(sentiment_scores['positive'])
-            negatives.append(sentiment_scores['negative'])
-
-        df['emotion_score'] = non_neutrals
-        df['positive_score'] = positives
-        df['negative_score'] = negatives
+        df[['emotion_score', 'positive_score', 'negative_score']] = np.column_stack(
+            [1 - scores[:, 1], scores[:, 2], scores[:, 0]])
         logging.info("Sentiment scores applied to DataFrame.")
+
+
+registry.register('sentiment_tokenizer', SentimentAnalyzer.load_tokenizer)
+registry.register('sentiment_cache', lambda: VectorCache(SENTIMENT_CACHE_PATH, SENTIMENT_CACHE_SIZE))
+for backend in SentimentAnalyzer.backends:
+    registry.register(f'sentiment_model:{backend}', partial(SentimentAnalyzer.load_model, backend))
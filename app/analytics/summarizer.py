@@ -1,7 +1,8 @@
 import logging
-from typing import List, Set
+from typing import List, Optional, Set
+import numpy as np
 import pandas as pd
-from collections import Counter
+from scipy.sparse import csr_matrix
 
 from sumy.parsers.plaintext import PlaintextParser
 from sumy.summarizers.text_rank import TextRankSummarizer
@@ -9,6 +10,9 @@ from sumy.nlp.tokenizers import Tokenizer
 from sumy.utils import get_stop_words
 
 from app.analytics.base_processor import BaseTextProcessor
+from app.analytics.token_index import TokenIndex
+from app.services.registry import registry
+from config.config import SUMMARY_METHOD, TEXTRANK_NEIGHBOURS, TEXTRANK_DAMPING
 
 
 class TextSummarizer(BaseTextProcessor):
@@ -16,28 +20,50 @@ class TextSummarizer(BaseTextProcessor):
     Provides functionalities for text summarization and keyword extraction.
     """
 
-    def __init__(self, language: str = 'english') -> None:
+    methods: List[str] = ['sumy', 'embedding']
+
+    def __init__(self, language: str = 'english', method: str = SUMMARY_METHOD) -> None:
         """
         Initializes the text summarizer with the specified language and its stop words.
 
         Args:
             language (str): The language of the text to be summarized. Defaults to 'english'.
+            method (str): 'sumy' for TextRank on word overlap, 'embedding' for TextRank on sentence embeddings.
         """
+        if method not in self.methods:
+            raise ValueError(f"Unknown summary method '{method}', expected one of {self.methods}.")
+
         self.language: str = language
-        self.stop_words: Set[str] = set(get_stop_words(language.upper()))
+        self.method: str = method
         logging.info(f"TextSummarizer initialized for {language} language.")
 
-    def summarize(self, df: pd.DataFrame, sentences_count: int = 10) -> List[int]:
+    @property
+    def stop_words(self) -> Set[str]:
+        """
+        The shared stop words of the summarizer's language, loaded on first use.
+        """
+        return registry.get(f'stop_words:{self.language}',
+                            lambda: frozenset(get_stop_words(self.language.upper())))
+
+    def summarize(self, df: pd.DataFrame, sentences_count: int = 10,
+                  embeddings: Optional[np.ndarray] = None) -> List[int]:
         """
         Summarizes the text contained in a DataFrame using extractive summarization.
 
         Args:
             df (pd.DataFrame): DataFrame containing sentences to summarize.
             sentences_count (int): Number of sentences for the summary.
+            embeddings (Optional[np.ndarray]): The normalized embedding matrix referenced by df['embedding_row'];
+                required by the 'embedding' method.
 
         Returns:
             List[int]: Indices of sentences included in the summary.
         """
+        if self.method == 'embedding':
+            if embeddings is None:
+                raise ValueError("The 'embedding' summary method requires the embedding matrix.")
+            return self.textrank(df, embeddings, sentences_count)
+
         text: str = ' '.join(df['sentence'].tolist())
 
         parser = PlaintextParser.from_string(text, Tokenizer(self.language))
@@ -52,25 +78,103 @@ class TextSummarizer(BaseTextProcessor):
         logging.info("Text summarized successfully.")
         return sorted(list(set(sentence_numbers)))
 
-    def get_keywords(self, df: pd.DataFrame, top_n: int = 3) -> List[str]:
+    def textrank(self, df: pd.DataFrame, embeddings: np.ndarray, sentences_count: int = 10,
+                 neighbours: int = TEXTRANK_NEIGHBOURS, damping: float = TEXTRANK_DAMPING,
+                 tolerance: float = 1e-6, max_iterations: int = 100) -> List[int]:
+        """
+        Ranks sentences with TextRank on a sparse graph that links every sentence to its
+        most similar sentences, and returns the best ones.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing sentences to summarize.
+            embeddings (np.ndarray): The normalized embedding matrix referenced by df['embedding_row'].
+            sentences_count (int): Number of sentences for the summary.
+            neighbours (int): Number of edges per sentence.
+            damping (float): Probability of following an edge instead of jumping to a sentence
+                picked in proportion to its length.
+            tolerance (float): Convergence threshold on the L1 change of the ranks.
+            max_iterations (int): Maximum number of power iterations; with 0 the sentences are ranked
+                by the jump probabilities alone.
+
+        Returns:
+            List[int]: Indices of sentences included in the summary.
+        """
+        vectors: np.ndarray = self.embedding_rows(df, embeddings)
+        size: int = len(vectors)
+        if size == 0:
+            return []
+        graph: csr_matrix = self.similarity_graph(vectors, neighbours)
+
+        # row-normalized transitions; sentences without edges always jump
+        out_weights: np.ndarray = np.asarray(graph.sum(axis=1)).ravel()
+        dangling: np.ndarray = out_weights == 0
+        transitions: csr_matrix = csr_matrix(graph.multiply(1 / np.where(dangling, 1, out_weights)[:, None])).T.tocsr()
+
+        # random jumps favour longer sentences, which carry more content than short replies
+        words: np.ndarray = df['sentence'].str.split().str.len().fillna(0).to_numpy(dtype=np.float64) + 1
+        jumps: np.ndarray = words / words.sum()
+
+        ranks: np.ndarray = jumps.copy()
+        iterations: int = 0
+        for iterations in range(1, max_iterations + 1):
+            updated: np.ndarray = (1 - damping) * jumps + damping * (transitions @ ranks + ranks[dangling].sum() * jumps)
+            change: float = np.abs(updated - ranks).sum()
+            ranks = updated
+            if change < tolerance:
+                break
+
+        best: np.ndarray = self.top_k(ranks[None, :], sentences_count)[0]
+        logging.info(f"Text summarized with embedding TextRank in {iterations} iterations.")
+        return sorted(df.index[best].tolist())
+
+    def similarity_graph(self, vectors: np.ndarray, neighbours: int, block_size: int = 1024) -> csr_matrix:
+        """
+        Builds a symmetric graph linking every sentence to its most similar sentences,
+        computing similarities in row blocks to bound memory.
+
+        Args:
+            vectors (np.ndarray): Normalized sentence embeddings.
+            neighbours (int): Number of edges per sentence.
+            block_size (int): Number of sentences per similarity block.
+
+        Returns:
+            csr_matrix: A (sentences, sentences) matrix of non-negative edge weights.
+        """
+        size: int = len(vectors)
+        k: int = min(neighbours, size - 1)
+        rows: List[np.ndarray] = []
+        columns: List[np.ndarray] = []
+        weights: List[np.ndarray] = []
+
+        for start in range(0, size, block_size):
+            scores: np.ndarray = vectors[start:start + block_size] @ vectors.T
+            block: np.ndarray = np.arange(len(scores))
+            scores[block, block + start] = -np.inf  # no self loops
+            closest: np.ndarray = self.top_k(scores, k)
+
+            rows.append(np.repeat(block + start, k))
+            columns.append(closest.ravel())
+            weights.append(np.maximum(np.take_along_axis(scores, closest, axis=1).ravel(), 0))
+
+        graph: csr_matrix = csr_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(columns))),
+                                       shape=(size, size), dtype=np.float64)
+        return graph.maximum(graph.T)
+
+    def get_keywords(self, df: pd.DataFrame, top_n: int = 3, tokens: Optional[TokenIndex] = None) -> List[str]:
         """
         Extracts keywords from the text contained in a DataFrame using a Bag-of-Words approach.
 
         Args:
             df (pd.DataFrame): DataFrame containing sentences from which to extract keywords.
             top_n (int): Number of top keywords to return.
+            tokens (Optional[TokenIndex]): Tokens of the sentences, if already computed.
 
         Returns:
             List[str]: A list of extracted keywords.
         """
-        keywords: List[str] = []
-        text: str = ' '.join(df['sentence'].tolist())
-
-        words: List[str] = self.tokenize(text)
-        words = [word for word in words if word not in self.stop_words]
-        word_counts: Counter = Counter(words)
-        most_common_words: List[tuple] = word_counts.most_common(top_n)
-        keywords.extend([word[0] for word in most_common_words])
+        if tokens is None:
+            tokens = TokenIndex.from_sentences(df['sentence'].tolist())
+        keywords: List[str] = tokens.most_common(top_n, exclude=self.stop_words)
 
         logging.info(f"Top {top_n} keywords extracted.")
         return keywords
@@ -0,0 +1,111 @@
+import string
+import numpy as np
+from itertools import chain
+from typing import Dict, Iterable, List, Sequence
+
+
+class TokenIndex:
+    """
+    Tokens of all sentences of a transcript, stored as vocabulary ids with per-sentence offsets:
+    the tokens of sentence i are vocabulary[ids[offsets[i]:offsets[i + 1]]].
+    """
+
+    def __init__(self, vocabulary: np.ndarray, ids: np.ndarray, offsets: np.ndarray) -> None:
+        """
+        Initializes the index from its arrays.
+
+        Args:
+            vocabulary (np.ndarray): Distinct tokens in the order of their first occurrence.
+            ids (np.ndarray): Vocabulary id of every token of the transcript, in order.
+            offsets (np.ndarray): Start of every sentence in ids, followed by the total number of tokens.
+        """
+        self.vocabulary: np.ndarray = vocabulary
+        self.ids: np.ndarray = ids
+        self.offsets: np.ndarray = offsets
+
+    @staticmethod
+    def split(sentences: Sequence[str]) -> List[List[str]]:
+        """
+        Tokenizes all sentences in one pass over the joined text, like BaseTextProcessor.tokenize:
+        lowercase, without punctuation, split on whitespace.
+
+        Args:
+            sentences (Sequence[str]): The sentences of the transcript.
+
+        Returns:
+            List[List[str]]: One list of tokens per sentence.
+        """
+        if not len(sentences):
+            return []
+        text: str = "\x00".join(sentences).lower().translate(str.maketrans('', '', string.punctuation))
+        return [sentence.split() for sentence in text.split("\x00")]
+
+    @classmethod
+    def from_token_lists(cls, token_lists: List[List[str]]) -> 'TokenIndex':
+        """
+        Builds the index from tokenized sentences.
+
+        Args:
+            token_lists (List[List[str]]): One list of tokens per sentence.
+
+        Returns:
+            TokenIndex: The index of the tokens.
+        """
+        vocabulary: Dict[str, int] = {}
+        ids: np.ndarray = np.fromiter((vocabulary.setdefault(token, len(vocabulary))
+                                       for token in chain.from_iterable(token_lists)), dtype=np.int32)
+        lengths: np.ndarray = np.fromiter(map(len, token_lists), dtype=np.intp, count=len(token_lists))
+        offsets: np.ndarray = np.concatenate([[0], np.cumsum(lengths)]).astype(np.intp)
+
+        return cls(np.array(list(vocabulary), dtype=str), ids, offsets)
+
+    @classmethod
+    def from_sentences(cls, sentences: Sequence[str]) -> 'TokenIndex':
+        """
+        Tokenizes sentences and builds the index.
+
+        Args:
+            sentences (Sequence[str]): The sentences of the transcript.
+
+        Returns:
+            TokenIndex: The index of the tokens.
+        """
+        return cls.from_token_lists(cls.split(sentences))
+
+    def lengths(self) -> np.ndarray:
+        """
+        Number of tokens of every sentence.
+
+        Returns:
+            np.ndarray: One count per sentence.
+        """
+        return np.diff(self.offsets)
+
+    def token_lists(self) -> List[List[str]]:
+        """
+        Tokens of every sentence as lists of strings.
+
+        Returns:
+            List[List[str]]: One list of tokens per sentence.
+        """
+        tokens: List[str] = self.vocabulary[self.ids].tolist()
+        return [tokens[start:end] for start, end in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def most_common(self, top_n: int, exclude: Iterable[str] = ()) -> List[str]:
+        """
+        Finds the most frequent tokens of the transcript. Ties are broken by the first
+        occurrence, like collections.Counter.most_common.
+
+        Args:
+            top_n (int): Number of tokens to return.
+            exclude (Iterable[str]): Tokens to ignore, such as stop words.
+
+        Returns:
+            List[str]: The most frequent tokens, most frequent first.
+        """
+        counts: np.ndarray = np.bincount(self.ids, minlength=len(self.vocabulary))
+        allowed: np.ndarray = ~np.isin(self.vocabulary, list(exclude))
+
+        candidates: np.ndarray = np.flatnonzero(allowed & (counts > 0))
+        order: np.ndarray = np.argsort(-counts[candidates], kind='stable')  # ids follow the first occurrence
+        return self.vocabulary[candidates[order[:top_n]]].tolist()
@@ -0,0 +1,255 @@
+import logging
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Type
+
+from app.analytics.base_processor import BaseTextProcessor
+from config.config import VECTOR_INDEX, IVF_LISTS, IVF_PROBES
+
+
+class VectorIndex(ABC):
+    """
+    Base class for nearest-neighbour indexes over normalized embeddings with integer ids.
+    Vectors are stored in buffers that grow geometrically, so that adding vectors one batch
+    at a time takes amortized linear time.
+    """
+    kind: str = ''
+
+    def __init__(self, dimensions: int) -> None:
+        """
+        Initializes an empty index.
+
+        Args:
+            dimensions (int): The dimensionality of the embeddings.
+        """
+        self.dimensions: int = dimensions
+        self.size: int = 0
+        self.vector_buffer: np.ndarray = np.empty((0, dimensions), dtype=np.float32)
+        self.id_buffer: np.ndarray = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.vector_buffer[:self.size]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.id_buffer[:self.size]
+
+    def add(self, vectors: np.ndarray, ids: Optional[np.ndarray] = None) -> None:
+        """
+        Adds vectors to the index.
+
+        Args:
+            vectors (np.ndarray): A matrix with one normalized vector per row.
+            ids (Optional[np.ndarray]): Ids of the vectors; consecutive numbers by default.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimensions)
+        if ids is None:
+            ids = np.arange(self.size, self.size + len(vectors))
+
+        size: int = self.size + len(vectors)
+        if size > len(self.id_buffer):
+            capacity: int = max(size, 2 * len(self.id_buffer))
+            self.vector_buffer = np.concatenate([self.vectors, np.empty((capacity - self.size, self.dimensions),
+                                                                        dtype=np.float32)])
+            self.id_buffer = np.concatenate([self.ids, np.empty(capacity - self.size, dtype=np.int64)])
+
+        self.vector_buffer[self.size:size] = vectors
+        self.id_buffer[self.size:size] = ids
+        self.size = size
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the k nearest vectors for each query.
+
+        Args:
+            queries (np.ndarray): A normalized query vector or a matrix with one query per row.
+            k (int): The number of neighbours to return.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (queries, k) matrices of similarities and ids, most similar first.
+        """
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the arrays needed to restore the index.
+        """
+        return {'vectors': self.vectors, 'ids': self.ids}
+
+    def restore(self, state: Dict[str, np.ndarray]) -> None:
+        """
+        Restores the index from arrays produced by `state`.
+        """
+        self.vector_buffer = np.asarray(state['vectors'], dtype=np.float32)
+        self.id_buffer = np.asarray(state['ids'], dtype=np.int64)
+        self.size = len(self.id_buffer)
+
+    def save(self, path: str) -> None:
+        """
+        Saves the index to an .npz file.
+
+        Args:
+            path (str): The file path.
+        """
+        np.savez(path, kind=np.array(self.kind), **self.state())
+        logging.info(f"Saved {self.kind} index with {len(self)} vectors to {path}.")
+
+    @staticmethod
+    def load(path: str) -> 'VectorIndex':
+        """
+        Loads an index saved with `save`.
+
+        Args:
+            path (str): The file path.
+
+        Returns:
+            VectorIndex: The restored index of the saved kind.
+        """
+        with np.load(path) as data:
+            state: Dict[str, np.ndarray] = {key: data[key] for key in data.files}
+        index: VectorIndex = INDEXES[str(state.pop('kind'))](state['vectors'].shape[1])
+        index.restore(state)
+        return index
+
+
+class FlatIndex(VectorIndex):
+    """
+    Exact index that scores every vector with one matrix product.
+    """
+    kind = 'flat'
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores: np.ndarray = np.asarray(queries, dtype=np.float32).reshape(-1, self.dimensions) @ self.vectors.T
+        hits: np.ndarray = BaseTextProcessor.top_k(scores, k)
+        return np.take_along_axis(scores, hits, axis=1), self.ids[hits]
+
+
+class IVFIndex(VectorIndex):
+    """
+    Approximate inverted-file index: vectors are grouped around k-means centroids
+    and a query only scores the vectors of its `probes` closest groups. Once trained, added
+    vectors are appended to the inverted list of their closest centroid.
+    """
+    kind = 'ivf'
+
+    def __init__(self, dimensions: int, lists: int = IVF_LISTS, probes: int = IVF_PROBES) -> None:
+        """
+        Initializes an empty, untrained index. It trains itself once it holds enough vectors.
+
+        Args:
+            dimensions (int): The dimensionality of the embeddings.
+            lists (int): The number of centroids.
+            probes (int): The number of centroids searched per query.
+        """
+        super().__init__(dimensions)
+        self.lists: int = lists
+        self.probes: int = probes
+        self.centroids: np.ndarray = np.empty((0, dimensions), dtype=np.float32)
+        self.members: List[List[int]] = []
+
+    def train(self, iterations: int = 10, seed: int = 0) -> None:
+        """
+        Fits centroids with spherical k-means on a sample of the vectors and reassigns all vectors.
+
+        Args:
+            iterations (int): The number of k-means iterations.
+            seed (int): Random seed for sampling.
+        """
+        self.lists = min(self.lists, len(self.vectors))
+        rng: np.random.Generator = np.random.default_rng(seed)
+        sample: np.ndarray = self.vectors[rng.permutation(len(self.vectors))[:256 * self.lists]]
+        centroids: np.ndarray = sample[:self.lists].copy()
+
+        for _ in range(iterations):
+            labels: np.ndarray = np.argmax(sample @ centroids.T, axis=1)
+            sums: np.ndarray = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty: np.ndarray = ~sums.any(axis=1)
+            sums[empty] = sample[rng.integers(len(sample), size=empty.sum())]
+            centroids = BaseTextProcessor.normalize(sums)
+
+        self.centroids = centroids
+        self.members = [[] for _ in range(self.lists)]
+        self.assign(0)
+        logging.info(f"Trained IVF index with {self.lists} lists on {len(sample)} vectors.")
+
+    def assign(self, start: int) -> None:
+        """
+        Appends the positions of the vectors from start on to the inverted lists of their closest centroids.
+
+        Args:
+            start (int): Position of the first vector to assign.
+        """
+        assignments: np.ndarray = np.argmax(self.vectors[start:] @ self.centroids.T, axis=1)
+        for position, assignment in enumerate(assignments.tolist(), start):
+            self.members[assignment].append(position)
+
+    def add(self, vectors: np.ndarray, ids: Optional[np.ndarray] = None) -> None:
+        """
+        Adds vectors; once trained, new vectors are assigned to their closest centroid.
+        """
+        start: int = self.size
+        super().add(vectors, ids)
+
+        if len(self.centroids):
+            self.assign(start)
+        elif self.size >= 32 * self.lists:
+            self.train()
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dimensions)
+        if not len(self.centroids):
+            exact: FlatIndex = FlatIndex(self.dimensions)
+            exact.restore({'vectors': self.vectors, 'ids': self.ids})
+            return exact.search(queries, k)
+
+        probed: np.ndarray = BaseTextProcessor.top_k(queries @ self.centroids.T, self.probes)
+        scores: np.ndarray = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids: np.ndarray = np.full((len(queries), k), -1, dtype=np.int64)
+
+        for i, (query, lists) in enumerate(zip(queries, probed)):
+            candidates: np.ndarray = np.concatenate([self.members[each] for each in lists], dtype=np.int64)
+            candidate_scores: np.ndarray = self.vectors[candidates] @ query
+            hits: np.ndarray = BaseTextProcessor.top_k(candidate_scores.reshape(1, -1), k)[0]
+            scores[i, :len(hits)] = candidate_scores[hits]
+            ids[i, :len(hits)] = self.ids[candidates[hits]]
+
+        return scores, ids
+
+    def state(self) -> Dict[str, np.ndarray]:
+        assignments: np.ndarray = np.full(self.size, -1, dtype=np.int64)
+        for assignment, positions in enumerate(self.members):
+            assignments[positions] = assignment
+        return {**super().state(), 'centroids': self.centroids, 'assignments': assignments,
+                'lists': np.array(self.lists), 'probes': np.array(self.probes)}
+
+    def restore(self, state: Dict[str, np.ndarray]) -> None:
+        super().restore(state)
+        self.lists = int(state['lists'])
+        self.probes = int(state['probes'])
+        self.centroids = state['centroids']
+        self.members = [[] for _ in range(len(self.centroids))]
+        if len(self.centroids):
+            for position, assignment in enumerate(state['assignments'].tolist()):
+                self.members[assignment].append(position)
+
+
+INDEXES: Dict[str, Type[VectorIndex]] = {FlatIndex.kind: FlatIndex, IVFIndex.kind: IVFIndex}
+
+
+def create_index(dimensions: int, kind: str = VECTOR_INDEX) -> VectorIndex:
+    """
+    Creates an empty index of the configured kind.
+
+    Args:
+        dimensions (int): The dimensionality of the embeddings.
+        kind (str): 'flat' for exact search or 'ivf' for approximate search.
+
+    Returns:
+        VectorIndex: The new index.
+    """
+    return INDEXES[kind](dimensions)
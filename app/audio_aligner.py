@@ -0,0 +1,178 @@
+import time
+import logging
+import subprocess
+import numpy as np
+import pandas as pd
+import imageio_ffmpeg
+from typing import List, Tuple
+
+from config.config import (AUDIO_SAMPLE_RATE, AUDIO_FRAME, AUDIO_CHUNK, VAD_MARGIN, VAD_MIN_PAUSE,
+                           ALIGN_TOLERANCE)
+
+
+class AudioAligner:
+    """
+    Fits sentence timestamps to the audio track. Sentence durations only cover speech, so
+    the transcript is laid out on a speech clock that stops during pauses, and sentence
+    boundaries are moved onto the detected pauses by a dynamic-programming aligner.
+    """
+
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE, frame: float = AUDIO_FRAME, chunk: float = AUDIO_CHUNK,
+                 margin: float = VAD_MARGIN, min_pause: float = VAD_MIN_PAUSE,
+                 tolerance: float = ALIGN_TOLERANCE) -> None:
+        """
+        Initializes the aligner.
+
+        Args:
+            sample_rate (int): Rate the audio is resampled to.
+            frame (float): Seconds per energy frame.
+            chunk (float): Seconds of audio decoded at a time, which bounds the memory use.
+            margin (float): Decibels above the noise floor that count as speech.
+            min_pause (float): Silences shorter than this many seconds are part of the speech around them.
+            tolerance (float): Seconds of speech a sentence boundary may move to land on a pause.
+        """
+        self.sample_rate: int = sample_rate
+        self.frame_size: int = round(frame * sample_rate)
+        self.frame: float = self.frame_size / sample_rate
+        self.chunk_size: int = max(1, round(chunk / self.frame)) * self.frame_size
+        self.margin: float = margin
+        self.min_pause: float = min_pause
+        self.tolerance: float = tolerance
+
+    def energy(self, source_path: str) -> np.ndarray:
+        """
+        Decodes the audio track once as mono 16-bit PCM, streamed in chunks, and measures the energy of every frame.
+
+        Args:
+            source_path (str): Path to the video or audio file.
+
+        Returns:
+            np.ndarray: Energy of every frame in decibels.
+        """
+        command: List[str] = [imageio_ffmpeg.get_ffmpeg_exe(), '-hide_banner', '-loglevel', 'error', '-i', source_path,
+                              '-vn', '-ac', '1', '-ar', str(self.sample_rate), '-f', 's16le', '-']
+        energies: List[np.ndarray] = []
+        with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+            while True:
+                data: bytes = process.stdout.read(2 * self.chunk_size)
+                if not data:
+                    break
+                samples: np.ndarray = np.frombuffer(data, dtype=np.int16)
+                # a chunk holds whole frames, except at the end of the track
+                frames: np.ndarray = samples[:len(samples) // self.frame_size * self.frame_size]
+                power: np.ndarray = np.square(frames.reshape(-1, self.frame_size), dtype=np.float32).mean(axis=1)
+                energies.append(10 * np.log10(power + 1.0, dtype=np.float32))
+        if process.returncode:
+            raise RuntimeError(f"ffmpeg failed to decode the audio of {source_path}.")
+        return np.concatenate(energies) if energies else np.empty(0, dtype=np.float32)
+
+    def speech_regions(self, energies: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Detects speech as the frames louder than the noise floor by the margin, and merges
+        regions that are separated by pauses shorter than min_pause.
+
+        Args:
+            energies (np.ndarray): Energy of every frame in decibels.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Start and end times of the speech regions in seconds.
+        """
+        voiced: np.ndarray = energies > np.percentile(energies, 10) + self.margin if len(energies) else energies > 0
+        edges: np.ndarray = np.diff(np.concatenate([[0], voiced.astype(np.int8), [0]]))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+        kept: np.ndarray = (starts[1:] - ends[:-1]) * self.frame >= self.min_pause
+        starts = np.concatenate([starts[:1], starts[1:][kept]])
+        ends = np.concatenate([ends[:-1][kept], ends[-1:]])
+        return starts * self.frame, ends * self.frame
+
+    def match_pauses(self, boundaries: np.ndarray, pauses: np.ndarray) -> np.ndarray:
+        """
+        Assigns sentence boundaries to pauses in order, minimizing the squared distance between them in
+        units of the tolerance. A boundary may also stay inside speech at a cost of one tolerance, so it
+        only moves onto a pause closer than the tolerance. Rows of the cost table are computed with
+        vectorized prefix minima.
+
+        Args:
+            boundaries (np.ndarray): Expected speech-clock position of every sentence boundary.
+            pauses (np.ndarray): Speech-clock position of every pause.
+
+        Returns:
+            np.ndarray: The pause of every boundary, or -1 for boundaries inside speech.
+        """
+        # moves: 0 keeps the boundary inside speech, 1 puts it on the pause, 2 skips the pause
+        moves: np.ndarray = np.empty((len(boundaries), len(pauses) + 1), dtype=np.int8)
+        costs: np.ndarray = np.zeros(len(pauses) + 1)  # column j: only the first j pauses are used
+        for i, boundary in enumerate(boundaries):
+            inside: np.ndarray = costs + 1.0
+            on_pause: np.ndarray = np.concatenate([[np.inf], costs[:-1] + ((pauses - boundary) / self.tolerance) ** 2])
+            best: np.ndarray = np.minimum(inside, on_pause)
+            costs = np.minimum.accumulate(best)
+            moves[i] = np.where(costs < best, 2, on_pause < inside)
+
+        matches: np.ndarray = np.full(len(boundaries), -1)
+        i, j = len(boundaries) - 1, len(pauses)
+        while i >= 0:
+            if moves[i, j] == 2:
+                j -= 1
+                continue
+            if moves[i, j] == 1:
+                j -= 1
+                matches[i] = j
+            i -= 1
+        return matches
+
+    def align(self, durations: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fits sentences with the given durations to speech regions.
+
+        Args:
+            durations (np.ndarray): Spoken duration of every sentence.
+            starts (np.ndarray): Start times of the speech regions.
+            ends (np.ndarray): End times of the speech regions.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Start and end time of every sentence.
+        """
+        lengths: np.ndarray = ends - starts
+        clock: np.ndarray = np.concatenate([[0], np.cumsum(lengths)])  # speech clock at the region starts
+        # the transcript durations are scaled to the detected speech, which absorbs the VAD threshold
+        transcript: np.ndarray = np.concatenate([[0], np.cumsum(durations)]) * clock[-1] / durations.sum()
+
+        boundaries: np.ndarray = transcript[1:-1]
+        matches: np.ndarray = self.match_pauses(boundaries, clock[1:-1])
+        matched: np.ndarray = matches >= 0
+
+        # unmatched boundaries are interpolated between the matched ones on the speech clock
+        anchors: np.ndarray = np.concatenate([[0], clock[1:-1][matches[matched]], [clock[-1]]])
+        anchor_positions: np.ndarray = np.concatenate([[0], boundaries[matched], [transcript[-1]]])
+        positions: np.ndarray = np.interp(transcript, anchor_positions, anchors)
+
+        # speech-clock positions map to time inside the speech regions
+        region: np.ndarray = np.clip(np.searchsorted(clock, positions, side='right') - 1, 0, len(lengths) - 1)
+        times: np.ndarray = starts[region] + positions - clock[region]
+
+        sentence_starts, sentence_ends = times[:-1].copy(), times[1:].copy()
+        pause: np.ndarray = matches[matched]
+        sentence_ends[:-1][matched] = ends[pause]
+        sentence_starts[1:][matched] = starts[pause + 1]
+        return sentence_starts, sentence_ends
+
+    def apply_to_dataframe(self, df: pd.DataFrame, source_path: str) -> None:
+        """
+        Replaces the estimated 'start_time' and 'end_time' of the sentences with times aligned to the audio.
+        The timestamps are kept if the audio has no detectable speech.
+
+        Args:
+            df (pd.DataFrame): The transcript with a 'time' column of sentence durations.
+            source_path (str): Path to the video or audio file.
+        """
+        start: float = time.perf_counter()
+        starts, ends = self.speech_regions(self.energy(source_path))
+        if not len(starts) or not len(df):
+            logging.warning(f"No speech detected in {source_path}, keeping the estimated timestamps.")
+            return
+
+        df['start_time'], df['end_time'] = self.align(df['time'].to_numpy(dtype=float), starts, ends)
+        logging.info(f"Aligned {len(df)} sentences to {len(starts)} speech regions "
+                     f"in {time.perf_counter() - start:.2f}s.")
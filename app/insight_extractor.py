@@ -1,11 +1,13 @@
 import logging
 import numpy as np
 import pandas as pd
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 from app.analytics.base_processor import BaseTextProcessor
 from app.analytics.sentiment_analyzer import SentimentAnalyzer
 from app.analytics.summarizer import TextSummarizer
+from app.analytics.token_index import TokenIndex
+from app.services.registry import registry
 
 
 class InsightExtractor(BaseTextProcessor):
@@ -13,16 +15,20 @@ class InsightExtractor(BaseTextProcessor):
     Extracts insights such as outstanding sentences or summaries from a given DataFrame.
     """
 
-    def __init__(self, df: pd.DataFrame) -> None:
+    def __init__(self, df: pd.DataFrame, embeddings: np.ndarray, tokens: Optional[TokenIndex] = None) -> None:
         """
         Initializes the InsightExtractor with a DataFrame and applies sentiment analysis.
 
         Args:
             df (pd.DataFrame): The DataFrame to analyze.
+            embeddings (np.ndarray): The normalized embedding matrix referenced by df['embedding_row'].
+            tokens (Optional[TokenIndex]): Tokens of the sentences, if already computed.
         """
         self.df = df
+        self.embeddings = embeddings
+        self.tokens = tokens
 
-        self.analyzer = SentimentAnalyzer()
+        self.analyzer = SentimentAnalyzer(cache=registry.get('sentiment_cache'))
         self.summarizer = TextSummarizer()
 
     def emotional_messages(self, n=10) -> List[int]:
@@ -68,9 +74,8 @@ class InsightExtractor(BaseTextProcessor):
                    "This is Maria and she is ML Engineer at Rask")
 
         request_embedding = self.calculate_embeddings(request)
-        request_embedding = np.array(request_embedding).reshape(1, -1)
 
-        indices = self.threshold_closest(request_embedding, self.df, threshold=threshold)
+        indices = self.threshold_closest(request_embedding, self.df, self.embeddings, threshold=threshold)
         return indices[:n]
 
     def get_highlights(self, n) -> List[int]:
@@ -78,16 +83,17 @@ class InsightExtractor(BaseTextProcessor):
         Combines emotional messages, questions, and intros to identify key insights.
 
         Returns:
-            List[int]: Combined list of unique indices representing key insights.
+            List[int]: Combined list of unique indices representing key insights, in priority order.
         """
-        self.analyzer.apply_to_dataframe(self.df)
-        logging.info("Sentiment analysis applied to DataFrame.")
+        if not {'emotion_score', 'positive_score', 'negative_score'} <= set(self.df.columns):
+            self.analyzer.apply_to_dataframe(self.df)
+            logging.info("Sentiment analysis applied to DataFrame.")
 
         emotionals = self.emotional_messages(n)
         questions = self.questions(n)
         intros = self.intros(n)
 
-        highlights = list(set(emotionals + questions + intros))
+        highlights = list(dict.fromkeys(emotionals + questions + intros))
         logging.info(f"Extracted {len(highlights)} highlights from the DataFrame: "
                      f"emotionals: {len(emotionals)}, questions: {len(questions)}, intros: {len(intros)}.")
 
@@ -102,7 +108,7 @@ class InsightExtractor(BaseTextProcessor):
                 - A list of keywords extracted from the text data.
                 - A list of indices of the sentences that form the summary.
         """
-        keywords: List[str] = self.summarizer.get_keywords(self.df)
-        summary: List[int] = self.summarizer.summarize(self.df, n)
+        keywords: List[str] = self.summarizer.get_keywords(self.df, tokens=self.tokens)
+        summary: List[int] = self.summarizer.summarize(self.df, n, self.embeddings)
 
         return keywords, summary
@@ -0,0 +1,166 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from typing import Any, Dict, List, Optional
+
+from app.analytics.token_index import TokenIndex
+from config.config import ARTIFACTS_PATH, ARTIFACT_VERSION
+
+
+class ArtifactStore:
+    """
+    Stores enriched transcripts as uncompressed Arrow IPC files, which are memory-mapped on load.
+    Embeddings are a fixed-size float32 list column and tokens a list of dictionary-encoded
+    strings, i.e. vocabulary ids with per-sentence offsets.
+    """
+
+    def __init__(self, path: str = ARTIFACTS_PATH) -> None:
+        """
+        Initializes the store.
+
+        Args:
+            path (str): Directory of the artifact files.
+        """
+        self.path: str = path
+
+    @staticmethod
+    def fingerprint(source_path: str, settings: Dict[str, Any]) -> str:
+        """
+        Fingerprints the inputs of an artifact, so that it is invalidated when they change.
+
+        Args:
+            source_path (str): The source file, such as the transcript CSV.
+            settings (Dict[str, Any]): Model names and other settings the artifact depends on.
+
+        Returns:
+            str: Hex digest of the source contents, the settings and the artifact version.
+        """
+        digest = hashlib.sha1()
+        with open(source_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(json.dumps({**settings, 'version': ARTIFACT_VERSION}, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def digest(df: pd.DataFrame) -> str:
+        """
+        Hashes the contents of the columns an artifact stores for a DataFrame, i.e. all but the tokens,
+        which are derived from the sentences.
+
+        Args:
+            df (pd.DataFrame): The transcript.
+
+        Returns:
+            str: Hex digest of the column names, types and values.
+        """
+        df = df.drop(columns=['tokens'], errors='ignore')
+        digest = hashlib.sha1(json.dumps([[str(name), str(dtype)] for name, dtype in df.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().data)
+        return digest.hexdigest()
+
+    def file(self, name: str, fingerprint: str) -> str:
+        """
+        Path of the artifact of a given name and fingerprint.
+
+        Args:
+            name (str): Artifact name, such as the video id.
+            fingerprint (str): The fingerprint of its inputs.
+
+        Returns:
+            str: The artifact path.
+        """
+        return os.path.join(self.path, f"{name}_{fingerprint[:16]}.arrow")
+
+    def save(self, file: str, df: pd.DataFrame, embeddings: np.ndarray, tokens: TokenIndex) -> None:
+        """
+        Writes an artifact atomically.
+
+        Args:
+            file (str): The artifact path.
+            df (pd.DataFrame): The enriched transcript; its 'tokens' column is stored from tokens.
+            embeddings (np.ndarray): The normalized embedding matrix referenced by df['embedding_row'].
+            tokens (TokenIndex): Tokens of the sentences.
+        """
+        table: pa.Table = pa.Table.from_pandas(df.drop(columns=['tokens'], errors='ignore'), preserve_index=True)
+
+        vectors: np.ndarray = np.ascontiguousarray(embeddings, dtype=np.float32)
+        table = table.append_column('embedding', pa.FixedSizeListArray.from_arrays(
+            pa.array(vectors.ravel()), vectors.shape[1]))
+        position: int = df.columns.get_loc('tokens') if 'tokens' in df.columns else table.num_columns
+        table = table.add_column(position, 'tokens', pa.ListArray.from_arrays(
+            pa.array(tokens.offsets, type=pa.int32()),
+            pa.DictionaryArray.from_arrays(pa.array(tokens.ids, type=pa.int32()), pa.array(tokens.vocabulary))))
+
+        os.makedirs(self.path, exist_ok=True)
+        tmp_file: str = f"{file}.tmp"
+        with pa.OSFile(tmp_file, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_file, file)
+        logging.info(f"Saved artifact {file} with columns {table.column_names}.")
+
+    def load(self, file: str, columns: Optional[List[str]] = None) -> Optional[pa.Table]:
+        """
+        Memory-maps an artifact and projects its columns without copying them.
+
+        Args:
+            file (str): The artifact path.
+            columns (Optional[List[str]]): Columns to keep; all by default.
+
+        Returns:
+            Optional[pa.Table]: The table, or None if the artifact does not exist.
+        """
+        if not os.path.exists(file):
+            return None
+
+        table: pa.Table = pa.ipc.open_file(pa.memory_map(file, 'r')).read_all()
+        return table.select(columns) if columns is not None else table
+
+    @staticmethod
+    def to_dataframe(table: pa.Table) -> pd.DataFrame:
+        """
+        Converts the scalar columns of an artifact into a DataFrame.
+
+        Args:
+            table (pa.Table): The artifact table.
+
+        Returns:
+            pd.DataFrame: The transcript without embeddings and tokens.
+        """
+        return table.drop_columns([name for name in ['embedding', 'tokens'] if name in table.column_names]).to_pandas()
+
+    @staticmethod
+    def to_embeddings(table: pa.Table) -> np.ndarray:
+        """
+        Views the embedding column as a matrix backed by the memory-mapped file.
+
+        Args:
+            table (pa.Table): The artifact table.
+
+        Returns:
+            np.ndarray: A read-only (sentences, dimensions) float32 matrix.
+        """
+        column: pa.FixedSizeListArray = table.column('embedding').combine_chunks()
+        values: np.ndarray = column.values.to_numpy(zero_copy_only=True)
+        return values[column.offset * column.type.list_size:].reshape(len(column), column.type.list_size)
+
+    @staticmethod
+    def to_tokens(table: pa.Table) -> TokenIndex:
+        """
+        Rebuilds the token index from the tokens column.
+
+        Args:
+            table (pa.Table): The artifact table.
+
+        Returns:
+            TokenIndex: Tokens of the sentences.
+        """
+        column: pa.ListArray = table.column('tokens').combine_chunks()
+        values: pa.DictionaryArray = column.values
+        return TokenIndex(values.dictionary.to_numpy(zero_copy_only=False).astype(str),
+                          values.indices.to_numpy(zero_copy_only=False).astype(np.int32),
+                          column.offsets.to_numpy().astype(np.intp))
@@ -0,0 +1,106 @@
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+
+class CompletionCache:
+    """
+    Persistent cache of chat completions keyed by the rendered messages and model parameters,
+    with a time-to-live and least-recently-used eviction above a size cap.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl: Optional[float] = None) -> None:
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            path (str): Path to the SQLite database file.
+            max_entries (int): Maximum number of stored completions.
+            ttl (Optional[float]): Lifetime of an entry in seconds; entries never expire if None.
+        """
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.ttl: Optional[float] = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def key(model: str, temperature: float, messages: List[Dict[str, str]]) -> str:
+        """
+        Builds a cache key from everything that is sent to the model.
+
+        Args:
+            model (str): The model name.
+            temperature (float): The sampling temperature.
+            messages (List[Dict[str, str]]): The rendered chat messages.
+
+        Returns:
+            str: Hex digest of the request.
+        """
+        request: str = json.dumps({"model": model, "temperature": temperature, "messages": messages}, sort_keys=True)
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a completion.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached response text, or None if missing or expired.
+        """
+        now: float = time.time()
+        with self.lock:
+            row = self.connection.execute("SELECT response, created FROM completions WHERE key = ?", (key,)).fetchone()
+
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                if row is not None:
+                    self.connection.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self.connection.commit()
+                self.misses += 1
+                return None
+
+            self.connection.execute("UPDATE completions SET accessed = ? WHERE key = ?", (now, key))
+            self.connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """
+        Stores a completion, evicting the least recently used ones above the size cap.
+
+        Args:
+            key (str): The cache key.
+            response (str): The response text.
+        """
+        now: float = time.time()
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)", (key, response, now, now))
+            self.connection.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+            )
+            self.connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports cache usage.
+
+        Returns:
+            Dict[str, int]: Number of hits, misses and stored entries.
+        """
+        with self.lock:
+            entries: int = self.connection.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
@@ -0,0 +1,344 @@
+import os
+import time
+import json
+import inspect
+import pickle
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from config.config import STAGES_PATH, DAG_WORKERS
+
+
+class Stage:
+    """
+    A step of a pipeline that computes named outputs from named inputs.
+    """
+    pools: List[str] = ['inline', 'thread', 'process']
+
+    def __init__(self, name: str, function: Callable[..., Any], inputs: List[str], outputs: List[str],
+                 pool: str = 'thread', memoize: bool = True, config: Optional[Dict[str, Any]] = None,
+                 files: Optional[List[str]] = None) -> None:
+        """
+        Initializes the stage.
+
+        Args:
+            name (str): Unique stage name.
+            function (Callable[..., Any]): Called with the inputs as keyword arguments. Returns the value of
+                a single output, or a tuple with one value per output.
+            inputs (List[str]): Names of the values the stage reads.
+            outputs (List[str]): Names of the values the stage produces.
+            pool (str): 'inline' to run in the scheduler thread, 'thread' or 'process' to run in a pool.
+                Functions run in the process pool must be picklable.
+            memoize (bool): Whether outputs are stored on disk and reused for the same inputs.
+                Stages with side effects, such as writing files, should not be memoized.
+            config (Optional[Dict[str, Any]]): Settings the outputs depend on, such as model names and
+                thresholds; changing them invalidates the memoized outputs.
+            files (Optional[List[str]]): Inputs that are file paths; the size and modification time of
+                the files are part of the memoization key, so that a replaced file is noticed.
+        """
+        if pool not in self.pools:
+            raise ValueError(f"Unknown pool '{pool}', expected one of {self.pools}.")
+
+        self.name: str = name
+        self.function: Callable[..., Any] = function
+        self.inputs: List[str] = inputs
+        self.outputs: List[str] = outputs
+        self.pool: str = pool
+        self.memoize: bool = memoize
+        self.config: Dict[str, Any] = config or {}
+        self.files: List[str] = files or []
+
+
+def call_stage(function: Callable[..., Any], outputs: List[str], arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs a stage function and names its outputs. Module-level so that it can run in a process pool.
+
+    Args:
+        function (Callable[..., Any]): The stage function.
+        outputs (List[str]): Names of the outputs.
+        arguments (Dict[str, Any]): The inputs.
+
+    Returns:
+        Dict[str, Any]: The outputs by name.
+    """
+    result: Any = function(**arguments)
+    return dict(zip(outputs, result if len(outputs) > 1 else (result,)))
+
+
+class DagExecutor:
+    """
+    Runs stages in dependency order, running independent stages in parallel on thread or process pools
+    and reusing stored outputs of stages whose inputs did not change.
+    """
+
+    def __init__(self, stages: List[Stage], path: str = STAGES_PATH, workers: int = DAG_WORKERS) -> None:
+        """
+        Initializes the executor and checks the graph.
+
+        Args:
+            stages (List[Stage]): The stages; each output must be produced by a single stage.
+            path (str): Directory of the memoized stage outputs.
+            workers (int): Size of each pool.
+
+        Raises:
+            ValueError: If stage names or outputs are duplicated, or the stages form a cycle.
+        """
+        self.stages: Dict[str, Stage] = {stage.name: stage for stage in stages}
+        self.path: str = path
+        self.workers: int = workers
+        self.timings: Dict[str, float] = {}
+        self.wall_clock: float = 0.0
+        self.cached: Set[str] = set()
+
+        self.producers: Dict[str, str] = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output '{output}' is produced by '{self.producers[output]}' and '{stage.name}'.")
+                self.producers[output] = stage.name
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique.")
+        self.order: List[str] = self.sort()
+
+    def dependencies(self, name: str) -> Set[str]:
+        """
+        Stages that produce the inputs of a stage.
+
+        Args:
+            name (str): The stage name.
+
+        Returns:
+            Set[str]: Names of the upstream stages.
+        """
+        return {self.producers[value] for value in self.stages[name].inputs if value in self.producers}
+
+    def sort(self) -> List[str]:
+        """
+        Orders the stages so that every stage follows the stages it depends on.
+
+        Returns:
+            List[str]: Stage names in dependency order.
+
+        Raises:
+            ValueError: If the stages form a cycle.
+        """
+        order: List[str] = []
+        remaining: Dict[str, Set[str]] = {name: self.dependencies(name) for name in self.stages}
+        while remaining:
+            ready: List[str] = [name for name, dependencies in remaining.items() if not dependencies - set(order)]
+            if not ready:
+                raise ValueError(f"Stages {sorted(remaining)} form a cycle.")
+            order.extend(ready)
+            for name in ready:
+                del remaining[name]
+        return order
+
+    def descendants(self, names: Iterable[str]) -> Set[str]:
+        """
+        Stages downstream of the given stages, including themselves.
+
+        Args:
+            names (Iterable[str]): Stage names.
+
+        Returns:
+            Set[str]: Names of the stages and everything that depends on them.
+        """
+        found: Set[str] = set(names)
+        for name in self.order:
+            if self.dependencies(name) & found:
+                found.add(name)
+        return found
+
+    @staticmethod
+    def fingerprint(value: Any) -> str:
+        """
+        Hashes the content of a value; arrays are hashed from their buffer, DataFrames column by column
+        and other values from their pickle.
+
+        Args:
+            value (Any): The value.
+
+        Returns:
+            str: Hex digest of the content.
+        """
+        digest = hashlib.sha1()
+        if isinstance(value, np.ndarray):
+            digest.update(f"{value.dtype}{value.shape}".encode())
+            digest.update(np.ascontiguousarray(value).data)
+        elif isinstance(value, pd.DataFrame):
+            # column by column, so that the hash does not depend on the internal block layout
+            digest.update(DagExecutor.fingerprint(value.index.to_numpy()).encode())
+            for column in value.columns:
+                digest.update(f"{column}:{value[column].dtype}".encode())
+                try:
+                    digest.update(pd.util.hash_pandas_object(value[column], index=False).to_numpy().data)
+                except TypeError:
+                    digest.update(pickle.dumps(value[column].tolist(), protocol=pickle.HIGHEST_PROTOCOL))
+        else:
+            digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        return digest.hexdigest()
+
+    def key(self, stage: Stage, values: Dict[str, Any]) -> str:
+        """
+        Builds the memoization key of a stage from its name, the source of its function, its config,
+        the content of its inputs and the size and modification time of its input files.
+
+        Args:
+            stage (Stage): The stage.
+            values (Dict[str, Any]): Available values by name.
+
+        Returns:
+            str: Hex digest identifying the stage run.
+        """
+        digest = hashlib.sha1(stage.name.encode())
+        try:
+            digest.update(inspect.getsource(stage.function).encode())
+        except (OSError, TypeError):
+            digest.update(getattr(stage.function, '__qualname__', repr(stage.function)).encode())
+        digest.update(json.dumps(stage.config, sort_keys=True, default=repr).encode())
+
+        for name in stage.inputs:
+            digest.update(f"{name}={self.fingerprint(values[name])}".encode())
+        for name in stage.files:
+            path: str = values[name]
+            status: str = f"{os.stat(path).st_size}:{os.stat(path).st_mtime_ns}" if os.path.exists(path) else 'missing'
+            digest.update(f"{name}:{status}".encode())
+        return digest.hexdigest()
+
+    def memo_file(self, stage: Stage, key: str) -> str:
+        """
+        Path of the memoized outputs of a stage run.
+
+        Args:
+            stage (Stage): The stage.
+            key (str): The memoization key.
+
+        Returns:
+            str: The file path.
+        """
+        return os.path.join(self.path, f"{stage.name}_{key[:16]}.pkl")
+
+    def run(self, values: Dict[str, Any], rerun_from: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Runs all stages. A stage starts as soon as its inputs are available.
+
+        Args:
+            values (Dict[str, Any]): Initial values, i.e. the inputs no stage produces.
+            rerun_from (Optional[Iterable[str]]): Stages to recompute with everything downstream of them,
+                ignoring their memoized outputs.
+
+        Returns:
+            Dict[str, Any]: The initial values and all stage outputs.
+
+        Raises:
+            ValueError: If an input is neither given nor produced by a stage.
+        """
+        values = dict(values)
+        for name in self.order:
+            missing: List[str] = [value for value in self.stages[name].inputs
+                                  if value not in values and value not in self.producers]
+            if missing:
+                raise ValueError(f"Stage '{name}' needs {missing}, which are neither given nor produced.")
+
+        forced: Set[str] = self.descendants(rerun_from or [])
+        self.timings, self.cached = {}, set()
+        pending: List[str] = list(self.order)
+        running: Dict[Future, str] = {}
+        starts: Dict[str, float] = {}
+        keys: Dict[str, str] = {}
+        start: float = time.perf_counter()
+
+        pools: Dict[str, Executor] = {'thread': ThreadPoolExecutor(self.workers),
+                                      'process': ProcessPoolExecutor(self.workers)}
+        try:
+            while pending or running:
+                waiting: Set[str] = set(pending) | set(running.values())
+                for name in [name for name in pending if not self.dependencies(name) & waiting]:
+                    pending.remove(name)
+                    stage: Stage = self.stages[name]
+                    arguments: Dict[str, Any] = {value: values[value] for value in stage.inputs}
+                    starts[name] = time.perf_counter()
+                    keys[name] = self.key(stage, values) if stage.memoize else ''
+
+                    if stage.memoize and name not in forced and self.load(stage, keys[name], values):
+                        continue
+                    if stage.pool == 'inline':
+                        outputs: Dict[str, Any] = call_stage(stage.function, stage.outputs, arguments)
+                        self.finish(stage, keys[name], values, outputs, starts[name])
+                    else:
+                        running[pools[stage.pool].submit(call_stage, stage.function, stage.outputs, arguments)] = name
+
+                if running:
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage = self.stages[running.pop(future)]
+                        self.finish(stage, keys[stage.name], values, future.result(), starts[stage.name])
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        self.wall_clock = time.perf_counter() - start
+        logging.info(self.report())
+        return values
+
+    def load(self, stage: Stage, key: str, values: Dict[str, Any]) -> bool:
+        """
+        Loads memoized outputs of a stage into values.
+
+        Args:
+            stage (Stage): The stage.
+            key (str): The memoization key.
+            values (Dict[str, Any]): Available values by name; updated in place.
+
+        Returns:
+            bool: Whether memoized outputs were found.
+        """
+        memo_file: str = self.memo_file(stage, key)
+        if not os.path.exists(memo_file):
+            return False
+
+        start: float = time.perf_counter()
+        with open(memo_file, 'rb') as file:
+            values.update(pickle.load(file))
+        self.timings[stage.name] = time.perf_counter() - start
+        self.cached.add(stage.name)
+        return True
+
+    def finish(self, stage: Stage, key: str, values: Dict[str, Any], outputs: Dict[str, Any], start: float) -> None:
+        """
+        Records the outputs of a finished stage and memoizes them.
+
+        Args:
+            stage (Stage): The stage.
+            key (str): The memoization key.
+            values (Dict[str, Any]): Available values by name; updated in place.
+            outputs (Dict[str, Any]): The outputs of the stage.
+            start (float): Start time of the stage.
+        """
+        self.timings[stage.name] = time.perf_counter() - start
+        if stage.memoize:
+            memo_file: str = self.memo_file(stage, key)
+            os.makedirs(self.path, exist_ok=True)
+            with open(f"{memo_file}.tmp", 'wb') as file:
+                pickle.dump(outputs, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{memo_file}.tmp", memo_file)
+        values.update(outputs)
+
+    def report(self) -> str:
+        """
+        Formats the timing breakdown of the last run.
+
+        Returns:
+            str: One line per stage in dependency order, followed by the wall-clock total.
+        """
+        lines: List[str] = ["Stage timings:"]
+        for name in self.order:
+            if name in self.timings:
+                lines.append(f"  {name:<16} {self.timings[name]:>8.2f}s{' (memoized)' if name in self.cached else ''}")
+        lines.append(f"  {'total':<16} {self.wall_clock:>8.2f}s wall clock, "
+                     f"{sum(self.timings.values()):.2f}s of stage time")
+        return "\n".join(lines)
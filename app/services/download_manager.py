@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config.config import DOWNLOAD_CHUNK_SIZE, DOWNLOAD_WORKERS, DOWNLOAD_RETRIES, DOWNLOAD_TIMEOUT
+
+
+class DownloadManager:
+    """
+    Downloads files in ranged chunks fetched in parallel over a pooled HTTP session. Chunks are
+    written into a .part file next to the target, and a sidecar records the checksum of every
+    finished chunk, so that an interrupted download resumes with the chunks that still verify.
+    The .part file is renamed to the target once it is complete.
+    """
+
+    def __init__(self, chunk_size: int = DOWNLOAD_CHUNK_SIZE, workers: int = DOWNLOAD_WORKERS,
+                 retries: int = DOWNLOAD_RETRIES, timeout: float = DOWNLOAD_TIMEOUT) -> None:
+        """
+        Initializes the manager and its session.
+
+        Args:
+            chunk_size (int): Bytes per ranged request.
+            workers (int): Number of chunks fetched in parallel, which is also the connection pool size.
+            retries (int): Attempts per chunk before the download fails.
+            timeout (float): Seconds to wait for a connection or for data.
+        """
+        self.chunk_size: int = chunk_size
+        self.workers: int = workers
+        self.retries: int = retries
+        self.timeout: float = timeout
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter: HTTPAdapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def probe(self, url: str) -> Tuple[Optional[int], bool]:
+        """
+        Asks the server for the size of a file and whether it serves byte ranges.
+
+        Args:
+            url (str): The file URL.
+
+        Returns:
+            Tuple[Optional[int], bool]: The size in bytes if known, and whether ranges are supported.
+        """
+        response = self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=self.timeout)
+        response.close()
+        response.raise_for_status()
+
+        if response.status_code == 206 and '/' in response.headers.get('Content-Range', ''):
+            total: str = response.headers['Content-Range'].rsplit('/', 1)[1]
+            return (int(total) if total.isdigit() else None), True
+        length: Optional[str] = response.headers.get('Content-Length')
+        return (int(length) if length is not None else None), False
+
+    def download(self, url: str, path: str, size: Optional[int] = None, sha256: Optional[str] = None) -> str:
+        """
+        Downloads a file, resuming an interrupted download of the same size.
+
+        Args:
+            url (str): The file URL.
+            path (str): The target path; it only exists once the download is complete and verified.
+            size (Optional[int]): Expected size in bytes; asked from the server if None.
+            sha256 (Optional[str]): Expected SHA-256 hex digest of the whole file, if known.
+
+        Returns:
+            str: The target path.
+
+        Raises:
+            ValueError: If the downloaded file does not have the expected size or checksum.
+        """
+        start: float = time.perf_counter()
+        part_path: str = f"{path}.part"
+        probed_size, ranged = self.probe(url)
+        size = size if size is not None else probed_size
+
+        if ranged and size:
+            self.download_chunks(url, part_path, size)
+        else:
+            self.download_whole(url, part_path)
+
+        actual_size: int = os.path.getsize(part_path)
+        if size is not None and actual_size != size:
+            raise ValueError(f"Downloaded {actual_size} bytes of {url}, expected {size}.")
+        if sha256 is not None and self.checksum(part_path) != sha256:
+            os.remove(part_path)
+            self.remove_sidecar(part_path)
+            raise ValueError(f"Checksum of {url} does not match, the partial download was discarded.")
+
+        os.replace(part_path, path)
+        self.remove_sidecar(part_path)
+        seconds: float = time.perf_counter() - start
+        logging.info(f"Downloaded {actual_size / 2 ** 20:.1f} MB to {path} in {seconds:.2f}s "
+                     f"({actual_size / 2 ** 20 / max(seconds, 1e-9):.1f} MB/s).")
+        return path
+
+    def download_chunks(self, url: str, part_path: str, size: int) -> None:
+        """
+        Fetches the missing chunks of a file in parallel into its .part file.
+
+        Args:
+            url (str): The file URL.
+            part_path (str): Path of the .part file.
+            size (int): The file size in bytes.
+        """
+        chunks: Dict[str, str] = self.resume(part_path, size)
+        missing: List[int] = [i for i in range(-(-size // self.chunk_size)) if str(i) not in chunks]
+        if len(chunks):
+            logging.info(f"Resuming {part_path}: {len(chunks)} chunks verified, {len(missing)} missing.")
+
+        def fetch(index: int) -> None:
+            digest: str = self.fetch_chunk(url, part_path, index, size)
+            with self.lock:
+                chunks[str(index)] = digest
+                self.save_sidecar(part_path, size, chunks)
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            list(pool.map(fetch, missing))
+
+    def resume(self, part_path: str, size: int) -> Dict[str, str]:
+        """
+        Verifies the chunks of an interrupted download against its sidecar, or starts a new .part file.
+
+        Args:
+            part_path (str): Path of the .part file.
+            size (int): The file size in bytes.
+
+        Returns:
+            Dict[str, str]: Checksums of the finished chunks that still verify, by chunk index.
+        """
+        chunks: Dict[str, str] = {}
+        sidecar: Dict = {}
+        if os.path.exists(f"{part_path}.json") and os.path.exists(part_path):
+            with open(f"{part_path}.json") as file:
+                sidecar = json.load(file)
+
+        if sidecar.get('size') == size and sidecar.get('chunk_size') == self.chunk_size \
+                and os.path.getsize(part_path) == size:
+            with open(part_path, 'rb') as file:
+                for index, digest in sidecar['chunks'].items():
+                    file.seek(int(index) * self.chunk_size)
+                    if hashlib.sha256(file.read(self.chunk_size)).hexdigest() == digest:
+                        chunks[index] = digest
+        else:
+            with open(part_path, 'wb') as file:
+                file.truncate(size)
+        self.save_sidecar(part_path, size, chunks)
+        return chunks
+
+    def fetch_chunk(self, url: str, part_path: str, index: int, size: int) -> str:
+        """
+        Downloads one chunk into its place in the .part file, retrying on connection errors.
+
+        Args:
+            url (str): The file URL.
+            part_path (str): Path of the .part file.
+            index (int): The chunk index.
+            size (int): The file size in bytes.
+
+        Returns:
+            str: SHA-256 hex digest of the chunk.
+
+        Raises:
+            requests.RequestException: If the chunk still fails after all retries.
+        """
+        first: int = index * self.chunk_size
+        last: int = min(first + self.chunk_size, size) - 1
+        for attempt in range(self.retries):
+            try:
+                digest = hashlib.sha256()
+                with self.session.get(url, headers={'Range': f'bytes={first}-{last}'}, stream=True,
+                                      timeout=self.timeout) as response, open(part_path, 'r+b') as file:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise requests.RequestException(f"Range request for chunk {index} returned {response.status_code}.")
+                    file.seek(first)
+                    for data in response.iter_content(1 << 16):
+                        file.write(data)
+                        digest.update(data)
+                    if file.tell() != last + 1:
+                        raise requests.RequestException(f"Chunk {index} ended after {file.tell() - first} bytes.")
+                return digest.hexdigest()
+            except requests.RequestException as error:
+                if attempt == self.retries - 1:
+                    raise
+                logging.warning(f"Chunk {index} of {url} failed ({error}), retrying.")
+                time.sleep(2 ** attempt)
+
+    def download_whole(self, url: str, part_path: str) -> None:
+        """
+        Downloads a file in one request, for servers that do not serve byte ranges.
+
+        Args:
+            url (str): The file URL.
+            part_path (str): Path of the .part file.
+        """
+        with self.session.get(url, stream=True, timeout=self.timeout) as response, open(part_path, 'wb') as file:
+            response.raise_for_status()
+            for data in response.iter_content(1 << 16):
+                file.write(data)
+
+    def save_sidecar(self, part_path: str, size: int, chunks: Dict[str, str]) -> None:
+        """
+        Records the finished chunks of a download atomically.
+
+        Args:
+            part_path (str): Path of the .part file.
+            size (int): The file size in bytes.
+            chunks (Dict[str, str]): Checksums of the finished chunks by chunk index.
+        """
+        with open(f"{part_path}.json.tmp", 'w') as file:
+            json.dump({'size': size, 'chunk_size': self.chunk_size, 'chunks': chunks}, file)
+        os.replace(f"{part_path}.json.tmp", f"{part_path}.json")
+
+    @staticmethod
+    def remove_sidecar(part_path: str) -> None:
+        """
+        Removes the sidecar of a .part file, if any.
+
+        Args:
+            part_path (str): Path of the .part file.
+        """
+        if os.path.exists(f"{part_path}.json"):
+            os.remove(f"{part_path}.json")
+
+    @staticmethod
+    def checksum(path: str) -> str:
+        """
+        Computes the SHA-256 digest of a file.
+
+        Args:
+            path (str): The file path.
+
+        Returns:
+            str: Hex digest of the contents.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for data in iter(lambda: file.read(1 << 20), b''):
+                digest.update(data)
+        return digest.hexdigest()
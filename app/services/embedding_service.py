@@ -0,0 +1,148 @@
+import time
+import random
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.services.vector_cache import VectorCache
+from config.config import (EMBEDDINGS_MODEL, EMBEDDINGS_BATCH_SIZE, EMBEDDINGS_BATCH_TOKENS, EMBEDDINGS_WORKERS,
+                           EMBEDDINGS_RETRIES)
+
+
+class EmbeddingService:
+    """
+    Computes embeddings with batched, concurrent requests to an embeddings API,
+    optionally serving repeated texts from a content-addressed cache.
+    """
+
+    def __init__(self, client: Any, model: str = EMBEDDINGS_MODEL, batch_size: int = EMBEDDINGS_BATCH_SIZE,
+                 batch_tokens: int = EMBEDDINGS_BATCH_TOKENS, workers: int = EMBEDDINGS_WORKERS,
+                 retries: int = EMBEDDINGS_RETRIES, backoff: float = 1.0,
+                 cache: Optional[VectorCache] = None) -> None:
+        """
+        Initializes the service with a client and batching parameters.
+
+        Args:
+            client: Any object exposing `embeddings.create(input=..., model=...)` like the OpenAI client.
+            model (str): The embeddings model name.
+            batch_size (int): Maximum number of texts per request.
+            batch_tokens (int): Maximum estimated number of tokens per request.
+            workers (int): Number of requests sent concurrently.
+            retries (int): Number of retries for a failed request.
+            backoff (float): Base delay in seconds for exponential backoff between retries.
+            cache (Optional[VectorCache]): Cache of embeddings keyed by (model, text).
+        """
+        self.client: Any = client
+        self.model: str = model
+        self.batch_size: int = batch_size
+        self.batch_tokens: int = batch_tokens
+        self.workers: int = workers
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.cache: Optional[VectorCache] = cache
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        Roughly estimates the number of tokens in a text, assuming ~4 characters per token.
+
+        Args:
+            text (str): The text to estimate.
+
+        Returns:
+            int: The estimated number of tokens.
+        """
+        return len(text) // 4 + 1
+
+    def make_batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """
+        Packs texts into batches limited both by count and by estimated tokens.
+
+        Args:
+            texts (Sequence[str]): The texts to pack.
+
+        Returns:
+            List[List[int]]: Positions of the texts in each batch, in original order.
+        """
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens: int = 0
+
+        for position, text in enumerate(texts):
+            tokens: int = self.estimate_tokens(text)
+            if batch and (len(batch) >= self.batch_size or batch_tokens + tokens > self.batch_tokens):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(position)
+            batch_tokens += tokens
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Sends one multi-input request, retrying with exponential backoff and jitter.
+
+        Args:
+            texts (List[str]): The texts to embed.
+
+        Returns:
+            List[List[float]]: Embeddings in the order of the input texts.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                response: Any = self.client.embeddings.create(input=texts, model=self.model)
+                data: List[Any] = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay: float = self.backoff * 2 ** attempt
+                delay += random.uniform(0, delay)
+                logging.warning(f"Embeddings request failed ({e}), retrying in {delay:.1f}s.")
+                time.sleep(delay)
+
+    def request(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Requests embeddings for all texts, sending batches concurrently through a bounded worker pool.
+
+        Args:
+            texts (Sequence[str]): The texts to embed.
+
+        Returns:
+            List[List[float]]: Embeddings in the order of the input texts.
+        """
+        batches: List[List[int]] = self.make_batches(texts)
+        embeddings: List[List[float]] = [[] for _ in texts]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(lambda batch: self.embed_batch([texts[i] for i in batch]), batches)
+            for batch, batch_embeddings in zip(batches, results):
+                for position, embedding in zip(batch, batch_embeddings):
+                    embeddings[position] = embedding
+
+        logging.info(f"Calculated {len(texts)} embeddings in {len(batches)} requests.")
+        return embeddings
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embeds texts, requesting only unique texts that are not cached yet.
+
+        Args:
+            texts (Sequence[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: A float32 matrix with one embedding per input text.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        if self.cache is None:
+            unique: List[str] = list(dict.fromkeys(texts))
+            computed: Dict[str, List[float]] = dict(zip(unique, self.request(unique)))
+            return np.array([computed[text] for text in texts], dtype=np.float32)
+
+        keys: List[str] = [VectorCache.key(self.model, text) for text in texts]
+        return np.array(self.cache.fetch(keys, texts, self.request), dtype=np.float32)
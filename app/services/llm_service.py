@@ -1,25 +1,83 @@
+import time
+import random
+import asyncio
 import logging
-from typing import Tuple, List, Any
+from typing import Tuple, List, Any, Dict, Optional, Callable, TypeVar
 from pandas import DataFrame
+from openai import AsyncOpenAI
 
 from app.analytics.base_processor import BaseTextProcessor
-from config.config import GPT_MODEL
+from app.services.completion_cache import CompletionCache
+from app.services.embedding_service import EmbeddingService
+from app.services.rate_limiter import RateLimiter
+from app.services.registry import registry
+from config.config import (OPENAI_API_KEY, GPT_MODEL, LLM_CONCURRENCY, LLM_REQUESTS_PER_MINUTE,
+                           LLM_TOKENS_PER_MINUTE, LLM_TIMEOUT, LLM_RETRIES, COMPLETION_CACHE_PATH,
+                           COMPLETION_CACHE_SIZE, COMPLETION_CACHE_TTL)
 from config.prompts import get_sentences_prompt_template, verification_prompt_template
 
+registry.register('openai_async', lambda: AsyncOpenAI(api_key=OPENAI_API_KEY))
+registry.register('completion_cache', lambda: CompletionCache(
+    COMPLETION_CACHE_PATH, COMPLETION_CACHE_SIZE, COMPLETION_CACHE_TTL))
+
+T = TypeVar('T')
+
 
 class LLM(BaseTextProcessor):
     """
     Language Model Processor class for generating and validating text.
     """
-    def __init__(self) -> None:
+    system_prompt: str = "You are a professional copywriter and text editor"
+    smallest: int = 6
+    largest: int = 10
+
+    def __init__(self, async_client: Optional[AsyncOpenAI] = None, concurrency: int = LLM_CONCURRENCY,
+                 timeout: float = LLM_TIMEOUT, retries: int = LLM_RETRIES, backoff: float = 1.0,
+                 cache: Optional[CompletionCache] = None) -> None:
         """
         Initializes the class with a specific language model.
+
+        Args:
+            async_client (Optional[AsyncOpenAI]): Client for concurrent generation; the shared one by default.
+            concurrency (int): Maximum number of completions in flight.
+            timeout (float): Timeout in seconds of a single completion.
+            retries (int): Number of retries for a failed completion.
+            backoff (float): Base delay in seconds between retries.
+            cache (Optional[CompletionCache]): Completion cache for calls with use_cache; the shared one by default.
         """
         self.model: str = GPT_MODEL
+        self.async_client: Optional[AsyncOpenAI] = async_client
+        self.concurrency: int = concurrency
+        self.timeout: float = timeout
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.cache: Optional[CompletionCache] = cache
 
-    def generate(self, df: DataFrame, sentence_number: int, context: List[int], keywords: List[str]) -> Tuple[int, ...]:
+    @property
+    def completion_cache(self) -> CompletionCache:
         """
-        Generates a list of sentence numbers based on the sentence number and its context.
+        The completion cache used by calls with use_cache.
+        """
+        return self.cache if self.cache is not None else registry.get('completion_cache')
+
+    def messages(self, prompt_text: str) -> List[Dict[str, str]]:
+        """
+        Wraps a prompt into chat messages.
+
+        Args:
+            prompt_text: The user prompt.
+
+        Returns:
+            A list of chat messages.
+        """
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt_text}
+        ]
+
+    def sentences_prompt(self, df: DataFrame, sentence_number: int, context: List[int], keywords: List[str]) -> str:
+        """
+        Renders the prompt that asks to select a story from the context sentences.
 
         Args:
             df: DataFrame containing the data.
@@ -28,33 +86,91 @@ class LLM(BaseTextProcessor):
             keywords: A list of keywords to guide the generation.
 
         Returns:
-            A list of integers representing generated sentence numbers.
+            The rendered prompt.
         """
         context_string: str = "\n".join([f"{index}: {df.loc[index, 'sentence']}" for index in context])
         theme: str = ", ".join(keywords)
-        smallest: int = 6
-        largest: int = 10
 
-        prompt_text: str = get_sentences_prompt_template.format(
-            smallest=smallest,
-            largest=largest,
+        return get_sentences_prompt_template.format(
+            smallest=self.smallest,
+            largest=self.largest,
             theme=theme,
             central=sentence_number,
             transcript=context_string
         )
 
+    def parse_sentences(self, text: str) -> Tuple[int, ...]:
+        """
+        Parses sentence numbers from the model output.
+
+        Args:
+            text: The model output.
+
+        Returns:
+            The sentence numbers, or an empty tuple if their count is out of bounds.
+
+        Raises:
+            ValueError: If the output is not a comma-separated list of numbers.
+        """
+        sentences: Tuple[int, ...] = tuple(map(int, text.split(",")))
+
+        if self.smallest <= len(sentences) <= self.largest:
+            return sentences
+        else:
+            return ()
+
+    def complete(self, prompt_text: str, temperature: float, parse: Callable[[str], T], use_cache: bool = False) -> T:
+        """
+        Requests a completion and parses it. With use_cache, a completion cached for the same
+        model, temperature and messages is reused, and new completions are cached once parsed.
+
+        Args:
+            prompt_text: The rendered prompt.
+            temperature: The sampling temperature.
+            parse: Converts the response text into the result; may raise ValueError.
+            use_cache: Whether to use the completion cache.
+
+        Returns:
+            The parsed completion.
+        """
+        messages: List[Dict[str, str]] = self.messages(prompt_text)
+        key: str = CompletionCache.key(self.model, temperature, messages)
+
+        cached: Optional[str] = self.completion_cache.get(key) if use_cache else None
+        if cached is not None:
+            return parse(cached)
+
+        response: Any = self.client.chat.completions.create(
+            model=self.model,
+            temperature=temperature,
+            messages=messages
+        )
+
+        text: str = response.choices[0].message.content
+        result: T = parse(text)
+        if use_cache:
+            self.completion_cache.put(key, text)
+        return result
+
+    def generate(self, df: DataFrame, sentence_number: int, context: List[int], keywords: List[str],
+                 use_cache: bool = False) -> Tuple[int, ...]:
+        """
+        Generates a list of sentence numbers based on the sentence number and its context.
+
+        Args:
+            df: DataFrame containing the data.
+            sentence_number: The central sentence number to focus on.
+            context: A list of indices representing the context sentences.
+            keywords: A list of keywords to guide the generation.
+            use_cache: Whether to reuse a cached completion of the same prompt.
+
+        Returns:
+            A list of integers representing generated sentence numbers.
+        """
+        prompt_text: str = self.sentences_prompt(df, sentence_number, context, keywords)
+
         try:
-            response: Any = self.client.chat.completions.create(
-                model=self.model,
-                temperature=0.5,
-                messages=[
-                    {"role": "system", "content": "You are a professional copywriter and text editor"},
-                    {"role": "user", "content": prompt_text}
-                ]
-            )
-
-            text: str = response.choices[0].message.content
-            sentences: Tuple[int] = tuple(map(int, text.split(",")))
+            return self.complete(prompt_text, 0.5, self.parse_sentences, use_cache)
         except ValueError as e:
             logging.error(f"Error processing model output: {e}")
             return ()
@@ -62,18 +178,125 @@ class LLM(BaseTextProcessor):
             logging.error(f"Unexpected error: {e}")
             return ()
 
-        if smallest <= len(sentences) <= largest:
-            return sentences
-        else:
-            return ()
+    def generate_many(self, df: DataFrame, requests: List[Tuple[int, List[int]]],
+                      keywords: List[str], use_cache: bool = False) -> List[Tuple[int, ...]]:
+        """
+        Generates sentence numbers for many (sentence number, context) pairs concurrently.
+
+        Args:
+            df: DataFrame containing the data.
+            requests: Pairs of a central sentence number and its context indices.
+            keywords: A list of keywords to guide the generation.
+            use_cache: Whether to reuse cached completions of the same prompts.
+
+        Returns:
+            Generated sentence numbers for each request, in the order of the requests.
+        """
+        return asyncio.run(self.agenerate_many(df, requests, keywords, use_cache))
+
+    async def agenerate_many(self, df: DataFrame, requests: List[Tuple[int, List[int]]],
+                             keywords: List[str], use_cache: bool = False) -> List[Tuple[int, ...]]:
+        """
+        Sends all generation requests at once, bounded by the concurrency cap and rate limits.
+
+        Args:
+            df: DataFrame containing the data.
+            requests: Pairs of a central sentence number and its context indices.
+            keywords: A list of keywords to guide the generation.
+            use_cache: Whether to reuse cached completions of the same prompts.
+
+        Returns:
+            Generated sentence numbers for each request, in the order of the requests.
+        """
+        client: AsyncOpenAI = self.async_client or registry.get('openai_async')
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(self.concurrency)
+        limiter: RateLimiter = RateLimiter(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
+        prompts: List[str] = [self.sentences_prompt(df, number, context, keywords) for number, context in requests]
+
+        prompt_tokens: List[int] = [EmbeddingService.estimate_tokens(self.system_prompt + prompt_text)
+                                    for prompt_text in prompts]
+        if prompts:
+            logging.info(f"Sending {len(prompts)} prompts of ~{sum(prompt_tokens) // len(prompts)} tokens on average "
+                         f"(max {max(prompt_tokens)}, total {sum(prompt_tokens)}).")
+
+        start: float = time.perf_counter()
+        results: List[Tuple[Tuple[int, ...], float]] = await asyncio.gather(
+            *(self.agenerate(client, prompt_text, semaphore, limiter, use_cache) for prompt_text in prompts))
+        wall_clock: float = time.perf_counter() - start
+
+        sequential: float = sum(latency for _, latency in results)
+        logging.info(f"Generated {len(results)} completions in {wall_clock:.1f}s, "
+                     f"{sequential:.1f}s if sent one by one ({sequential - wall_clock:.1f}s saved).")
+        return [sentences for sentences, _ in results]
+
+    async def agenerate(self, client: AsyncOpenAI, prompt_text: str, semaphore: asyncio.Semaphore,
+                        limiter: RateLimiter, use_cache: bool = False) -> Tuple[Tuple[int, ...], float]:
+        """
+        Requests one completion with a timeout, retrying failed requests with jittered backoff.
+
+        Args:
+            client: The asynchronous OpenAI client.
+            prompt_text: The rendered prompt.
+            semaphore: Semaphore bounding the completions in flight.
+            limiter: Requests and tokens per minute limiter.
+            use_cache: Whether to reuse a cached completion of the same prompt.
+
+        Returns:
+            The generated sentence numbers and the time spent on requests in seconds.
+        """
+        messages: List[Dict[str, str]] = self.messages(prompt_text)
+        key: str = CompletionCache.key(self.model, 0.5, messages)
+        cached: Optional[str] = self.completion_cache.get(key) if use_cache else None
+        if cached is not None:
+            try:
+                return self.parse_sentences(cached), 0.0
+            except ValueError as e:
+                logging.error(f"Error processing model output: {e}")
+                return (), 0.0
+
+        tokens: int = EmbeddingService.estimate_tokens(self.system_prompt + prompt_text) + 4 * self.largest
+        latency: float = 0.0
+
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                await limiter.acquire(tokens)
+                start: float = time.perf_counter()
+                try:
+                    response: Any = await asyncio.wait_for(client.chat.completions.create(
+                        model=self.model,
+                        temperature=0.5,
+                        messages=messages
+                    ), self.timeout)
+                    latency += time.perf_counter() - start
+                    usage: Any = getattr(response, 'usage', None)
+                    logging.info(f"Completion took {latency:.1f}s with "
+                                 f"{usage.prompt_tokens if usage else tokens - 4 * self.largest} prompt tokens.")
+
+                    text: str = response.choices[0].message.content
+                    sentences: Tuple[int, ...] = self.parse_sentences(text)
+                    if use_cache:
+                        self.completion_cache.put(key, text)
+                    return sentences, latency
+                except ValueError as e:
+                    logging.error(f"Error processing model output: {e}")
+                    return (), latency
+                except Exception as e:
+                    latency += time.perf_counter() - start
+                    if attempt == self.retries:
+                        logging.error(f"Unexpected error: {e}")
+                        return (), latency
+                    delay: float = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                    logging.warning(f"Completion failed ({e!r}), retrying in {delay:.1f}s.")
+                    await asyncio.sleep(delay)
 
-    def validate(self, scripts: str, largest: int) -> List[int]:
+    def validate(self, scripts: str, largest: int, use_cache: bool = False) -> List[int]:
         """
         Validates a given list of scripts against a specified number using the model.
 
         Args:
             scripts: A list of scripts to be validated.
             largest: The number against which the validation is to be performed.
+            use_cache: Whether to reuse a cached completion of the same prompt.
 
         Returns:
             A list of integers representing validation results.
@@ -81,17 +304,8 @@ class LLM(BaseTextProcessor):
         prompt_text: str = verification_prompt_template.format(scripts=scripts, n=largest)
 
         try:
-            response: Any = self.client.chat.completions.create(
-                model=self.model,
-                temperature=1,
-                messages=[
-                    {"role": "system", "content": "You are a professional copywriter and text editor"},
-                    {"role": "user", "content": prompt_text}
-                ]
-            )
-
-            text: str = response.choices[0].message.content
-            numbers: List[int] = list(map(int, text.split(",")))
+            numbers: List[int] = self.complete(prompt_text, 1, lambda text: list(map(int, text.split(","))),
+                                               use_cache)
         except ValueError as e:
             logging.error(f"Error processing model output: {e}")
             return []
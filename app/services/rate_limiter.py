@@ -0,0 +1,68 @@
+import time
+import asyncio
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Asynchronous token bucket that refills continuously at a per-minute rate.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        """
+        Initializes a full bucket.
+
+        Args:
+            per_minute (float): Refill rate in tokens per minute.
+            capacity (Optional[float]): Maximum burst size; one minute of tokens by default.
+        """
+        self.rate: float = per_minute / 60
+        self.capacity: float = capacity if capacity is not None else per_minute
+        self.tokens: float = self.capacity
+        self.updated: float = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1) -> None:
+        """
+        Waits until the requested amount is available and takes it.
+
+        Args:
+            amount (float): Number of tokens to take; capped at the bucket capacity.
+        """
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            while True:
+                now: float = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """
+    Limits requests per minute and tokens per minute at the same time.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float) -> None:
+        """
+        Initializes the limiter with one bucket per limit.
+
+        Args:
+            requests_per_minute (float): Allowed requests per minute.
+            tokens_per_minute (float): Allowed tokens per minute.
+        """
+        self.requests: TokenBucket = TokenBucket(requests_per_minute)
+        self.tokens: TokenBucket = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, tokens: int) -> None:
+        """
+        Waits until one more request with the given number of tokens is allowed.
+
+        Args:
+            tokens (int): Estimated tokens of the request.
+        """
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
@@ -0,0 +1,86 @@
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class ResourceRegistry:
+    """
+    Process-wide registry of heavy resources such as models and API clients.
+    Each resource is created by its factory once, on first use, and shared afterwards.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty registry.
+        """
+        self.factories: Dict[str, Callable[[], Any]] = {}
+        self.resources: Dict[str, Any] = {}
+        self.load_times: Dict[str, float] = {}
+        self.locks: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """
+        Registers a factory for a resource without creating it.
+
+        Args:
+            name (str): The resource name.
+            factory (Callable[[], Any]): A function that creates the resource.
+        """
+        with self.lock:
+            self.factories[name] = factory
+            self.locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str, factory: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Returns a resource, creating it on first use. Concurrent callers wait for a single load.
+
+        Args:
+            name (str): The resource name.
+            factory (Optional[Callable[[], Any]]): Factory to register if the name is not registered yet.
+
+        Returns:
+            Any: The shared resource.
+        """
+        if name in self.resources:
+            return self.resources[name]
+
+        with self.lock:
+            if factory is not None:
+                self.factories.setdefault(name, factory)
+            lock: threading.Lock = self.locks.setdefault(name, threading.Lock())
+
+        with lock:
+            if name not in self.resources:
+                start: float = time.perf_counter()
+                self.resources[name] = self.factories[name]()
+                self.load_times[name] = time.perf_counter() - start
+                logging.info(f"Loaded {name} in {self.load_times[name]:.2f}s.")
+
+        return self.resources[name]
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Loads resources ahead of their first use.
+
+        Args:
+            names (Optional[Iterable[str]]): Resources to load; all registered ones by default.
+
+        Returns:
+            Dict[str, float]: Load times in seconds of all loaded resources.
+        """
+        for name in list(names if names is not None else self.factories):
+            self.get(name)
+        return dict(self.load_times)
+
+    def clear(self) -> None:
+        """
+        Drops all loaded resources, keeping the registered factories.
+        """
+        with self.lock:
+            self.resources.clear()
+            self.load_times.clear()
+
+
+registry = ResourceRegistry()
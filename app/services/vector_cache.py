@@ -0,0 +1,151 @@
+import os
+import hashlib
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class VectorCache:
+    """
+    Persistent content-addressed cache of float32 vectors with least-recently-used eviction.
+
+    Entries are stored in a single .npz file as a keys array and a float32 matrix,
+    ordered from the least to the most recently used.
+    """
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        """
+        Initializes the cache. The file is loaded lazily on first access.
+
+        Args:
+            path (str): Path to the .npz file backing the cache.
+            max_entries (int): Maximum number of vectors kept; older entries are evicted first.
+        """
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.loaded: bool = False
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        """
+        Builds a cache key from a model name and a text.
+
+        Args:
+            model (str): The model that produced the vector.
+            text (str): The input text.
+
+        Returns:
+            str: Hex digest identifying the (model, text) pair.
+        """
+        return hashlib.sha1(f"{model}\x00{text}".encode()).hexdigest()
+
+    def load(self) -> None:
+        """
+        Loads cached vectors from disk if the file exists.
+        """
+        if self.loaded:
+            return
+        self.loaded = True
+
+        if not os.path.exists(self.path):
+            return
+
+        with np.load(self.path) as data:
+            keys: np.ndarray = data['keys']
+            vectors: np.ndarray = data['vectors']
+        self.entries = OrderedDict(zip(keys.astype(str), vectors))
+        logging.info(f"Loaded {len(self.entries)} cached vectors from {self.path}.")
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Looks up vectors for several keys at once.
+
+        Args:
+            keys (Sequence[str]): Cache keys.
+
+        Returns:
+            List[Optional[np.ndarray]]: Cached vectors, or None for keys that are not cached.
+        """
+        with self.lock:
+            self.load()
+            vectors: List[Optional[np.ndarray]] = []
+            for key in keys:
+                vector: Optional[np.ndarray] = self.entries.get(key)
+                if vector is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self.entries.move_to_end(key)
+                vectors.append(vector)
+            return vectors
+
+    def put_many(self, keys: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        """
+        Stores vectors, evicting the least recently used ones above the size cap.
+
+        Args:
+            keys (Sequence[str]): Cache keys.
+            vectors (Sequence[np.ndarray]): Vectors to store, one per key.
+        """
+        with self.lock:
+            self.load()
+            for key, vector in zip(keys, vectors):
+                self.entries[key] = np.asarray(vector, dtype=np.float32)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def fetch(self, keys: Sequence[str], items: Sequence[Any],
+              compute: Callable[[List[Any]], Sequence[np.ndarray]]) -> List[np.ndarray]:
+        """
+        Returns vectors for all items, computing only the unique items that are not cached
+        and saving them to disk.
+
+        Args:
+            keys (Sequence[str]): Cache keys, one per item.
+            items (Sequence[Any]): The items the vectors are computed from.
+            compute (Callable[[List[Any]], Sequence[np.ndarray]]): Computes vectors for a list of items.
+
+        Returns:
+            List[np.ndarray]: One vector per item, in order.
+        """
+        cached: List[Optional[np.ndarray]] = self.get_many(keys)
+        missing: Dict[str, Any] = {key: item for key, item, vector in zip(keys, items, cached) if vector is None}
+
+        computed: Dict[str, np.ndarray] = {}
+        if missing:
+            computed = dict(zip(missing, compute(list(missing.values()))))
+            self.put_many(list(computed.keys()), list(computed.values()))
+            self.save()
+
+        logging.info(f"{os.path.basename(self.path)}: {len(keys) - len(missing)} of {len(keys)} served from cache.")
+        return [computed[key] if vector is None else vector for key, vector in zip(keys, cached)]
+
+    def save(self) -> None:
+        """
+        Writes the cache to disk atomically.
+        """
+        with self.lock:
+            if not self.entries:
+                return
+            keys: np.ndarray = np.array(list(self.entries.keys()), dtype='S40')
+            vectors: np.ndarray = np.stack(list(self.entries.values())).astype(np.float32, copy=False)
+
+            tmp_path: str = f"{self.path}.tmp.npz"
+            np.savez(tmp_path, keys=keys, vectors=vectors)
+            os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports cache usage.
+
+        Returns:
+            Dict[str, int]: Number of hits, misses and stored entries.
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
@@ -5,6 +5,7 @@ from typing import List, Dict, Optional
 from googleapiclient.discovery import build
 from pytube import YouTube
 
+from app.services.download_manager import DownloadManager
 from config.config import YOUTUBE_API_KEY, VIDEOS_PATH
 
 
@@ -12,8 +13,9 @@ class YouTubeService:
     """Service class to interact with YouTube API and download videos."""
 
     def __init__(self) -> None:
-        """Initializes the YouTube API client and sets video URL prefix."""
+        """Initializes the YouTube API client, the download manager and sets video URL prefix."""
         self.youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+        self.downloader = DownloadManager()
         self.video_prefix = "https://www.youtube.com/watch?v="
 
     def get_comments(self, video_id: str) -> List[Dict[str, any]]:
@@ -68,7 +70,8 @@ class YouTubeService:
 
     def download_video(self, video_id: str, save_path: str = VIDEOS_PATH) -> None:
         """
-        Downloads a YouTube video to a specified path.
+        Downloads a YouTube video to a specified path in parallel chunks. The file only appears at its
+        path once it is complete, and an interrupted download resumes from its .part file.
 
         Args:
             video_id (str): Unique identifier of the YouTube video.
@@ -86,7 +89,8 @@ class YouTubeService:
         stream = yt.streams.filter(progressive=True, file_extension='mp4').order_by('resolution').desc().first()
 
         if stream:
-            stream.download(output_path=save_path, filename=filename)
+            os.makedirs(save_path, exist_ok=True)
+            self.downloader.download(stream.url, file_path, size=stream.filesize)
             logging.info(f'Video {video_id} has been downloaded successfully.')
         else:
             logging.warning('No suitable stream found for downloading.')
@@ -1,29 +1,295 @@
 import os
+import re
+import time
 import logging
+import tempfile
+import subprocess
+import multiprocessing
+import numpy as np
+import imageio_ffmpeg
 from pandas import DataFrame
-from typing import Tuple, List
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Tuple, List, Optional, Sequence
 from moviepy.editor import VideoFileClip, concatenate_videoclips
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 
-from config.config import VIDEOS_PATH, SHORTS_PATH
+from config.config import (VIDEOS_PATH, SHORTS_PATH, RENDER_WORKERS, SHORTS_FPS, FAST_CUT, KEYFRAME_TOLERANCE,
+                           CUT_MERGE_GAP)
+
+Cut = Tuple[float, float]
+Piece = Tuple[float, float, bool]  # start, end and whether the piece is stream-copied
+
+# the source clip opened once per worker process by open_source
+source: Optional[VideoFileClip] = None
+
+
+def open_source(source_path: str) -> None:
+    """
+    Opens the source video of a worker process, so that all shorts it renders share one decoder.
+
+    Args:
+        source_path (str): Path to the source video.
+    """
+    global source
+    source = VideoFileClip(source_path)
+
+
+def render_short(cuts: List[Cut], result_path: str, fps: int) -> Dict[str, float]:
+    """
+    Renders one short from the source video opened by open_source.
+
+    Args:
+        cuts (List[Cut]): (start, end) times in seconds, in playback order.
+        result_path (str): Path of the rendered short.
+        fps (int): Frame rate of the short.
+
+    Returns:
+        Dict[str, float]: Encode time in seconds, number of frames and frames per second of the encode.
+    """
+    start: float = time.perf_counter()
+    # subclips of one source share its size, so they can be chained without compositing
+    final_clip: VideoFileClip = concatenate_videoclips([source.subclip(*cut) for cut in cuts], method="chain")
+    final_clip.write_videofile(result_path, codec="libx264", fps=fps, audio_codec="aac", logger=None)
+
+    seconds: float = time.perf_counter() - start
+    frames: int = round(final_clip.duration * fps)
+    return {"seconds": seconds, "frames": frames, "fps": frames / seconds}
+
+
+def run_ffmpeg(arguments: List[str]) -> str:
+    """
+    Runs the ffmpeg binary bundled with imageio-ffmpeg.
+
+    Args:
+        arguments (List[str]): Command line arguments after the binary.
+
+    Returns:
+        str: The log ffmpeg wrote to stderr.
+    """
+    command: List[str] = [imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-hide_banner', *arguments]
+    return subprocess.run(command, check=True, capture_output=True, text=True).stderr
 
 
 class VideoEditor:
+    """
+    Cuts shorts out of a source video, rendering them in parallel worker processes.
+    """
+
+    def __init__(self, source_path: str, workers: int = RENDER_WORKERS, fps: int = SHORTS_FPS,
+                 fast_cut: bool = FAST_CUT, keyframe_tolerance: float = KEYFRAME_TOLERANCE) -> None:
+        """
+        Initializes the editor.
+
+        Args:
+            source_path (str): Path to the source video.
+            workers (int): Number of rendering processes; shorts are rendered in this process if 1.
+            fps (int): Frame rate of re-encoded shorts.
+            fast_cut (bool): Whether to stream-copy the shorts between keyframes with ffmpeg and only
+                re-encode their edges. Fast cuts keep the frame rate of the source.
+            keyframe_tolerance (float): Seconds a cut may move to start or end on a keyframe in fast cut mode.
+        """
+        self.source_path: str = source_path
+        self.workers: int = workers
+        self.fps: int = fps
+        self.fast_cut: bool = fast_cut
+        self.keyframe_tolerance: float = keyframe_tolerance
+        self.keyframes: Optional[np.ndarray] = None
+        self.stats: Dict[str, Dict[str, float]] = {}
+
     @staticmethod
-    def create_video(df: DataFrame, sentence_numbers: Tuple[int], video_id: str, index: int) -> None:
-        # todo add docstring
-        source_path: str = os.path.join(VIDEOS_PATH, f'{video_id}.mp4')
-        result_path: str = os.path.join(SHORTS_PATH, f'{video_id}_{index}.mp4')
+    def plan(df: DataFrame, sentence_numbers: Sequence[int], gap: float = CUT_MERGE_GAP) -> List[Cut]:
+        """
+        Looks up the time ranges of the sentences of a short by index and merges them into spans.
+
+        Args:
+            df (DataFrame): The transcript with 'start_time' and 'end_time' columns.
+            sentence_numbers (Sequence[int]): Index labels of the sentences, in playback order.
+            gap (float): Sentences that follow each other within this many seconds are cut as one span.
+
+        Returns:
+            List[Cut]: (start, end) times in seconds of the merged spans.
+        """
+        times: np.ndarray = df.loc[list(sentence_numbers), ['start_time', 'end_time']].to_numpy(dtype=float)
+        return VideoEditor.coalesce(times, gap)
+
+    @staticmethod
+    def coalesce(times: np.ndarray, gap: float) -> List[Cut]:
+        """
+        Merges time ranges into spans. A range joins the span before it if it starts at most
+        gap seconds after the span ends; ranges that jump back start a new span.
+
+        Args:
+            times (np.ndarray): (ranges, 2) start and end times in playback order.
+            gap (float): Seconds of pause that are kept inside a span.
 
-        video: VideoFileClip = VideoFileClip(source_path)
-        clips: List[VideoFileClip] = []
+        Returns:
+            List[Cut]: (start, end) times of the spans.
+        """
+        spans: List[List[float]] = []
+        for start, end in times.tolist():
+            if spans and spans[-1][1] <= start <= spans[-1][1] + gap:
+                spans[-1][1] = end
+            else:
+                spans.append([start, end])
+        return [(start, end) for start, end in spans]
 
-        for number in sentence_numbers:
-            start_time: float = df.loc[df.index == number, 'start_time'].values[0]
-            end_time: float = df.loc[df.index == number, 'end_time'].values[0]
-            clip: VideoFileClip = video.subclip(start_time, end_time)
-            clips.append(clip)
+    def render(self, cut_lists: List[List[Cut]], result_paths: List[str]) -> List[str]:
+        """
+        Renders shorts from their cut lists. Every worker opens the source once and renders
+        several shorts from it.
 
-        final_clip: VideoFileClip = concatenate_videoclips(clips, method="compose")
-        final_clip.write_videofile(result_path, codec="libx264", fps=24, audio_codec="aac")
+        Args:
+            cut_lists (List[List[Cut]]): The cuts of every short.
+            result_paths (List[str]): Path of every short.
+
+        Returns:
+            List[str]: The paths of the rendered shorts.
+        """
+        self.stats = {}
+        if not cut_lists:
+            return []
+
+        workers: int = min(self.workers, len(cut_lists))
+        if self.fast_cut:
+            self.probe_keyframes()
+            # the work happens in ffmpeg subprocesses, so threads suffice
+            with ThreadPoolExecutor(workers) as pool:
+                stats: List[Dict[str, float]] = list(pool.map(self.cut, cut_lists, result_paths))
+        elif workers <= 1:
+            open_source(self.source_path)
+            stats = [render_short(cuts, path, self.fps) for cuts, path in zip(cut_lists, result_paths)]
+        else:
+            # spawned rather than forked, since the pipeline renders from a thread next to torch
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=open_source, initargs=(self.source_path,)) as pool:
+                stats = list(pool.map(render_short, cut_lists, result_paths, [self.fps] * len(cut_lists)))
+
+        for path, short in zip(result_paths, stats):
+            self.stats[path] = short
+            logging.info(f"Video saved to {path}: {short['frames']} frames encoded in "
+                         f"{short['seconds']:.2f}s ({short['fps']:.1f} fps)")
+        return list(result_paths)
+
+    def probe_keyframes(self) -> np.ndarray:
+        """
+        Finds the keyframe timestamps of the source by decoding only its keyframes. The result is cached.
+
+        Returns:
+            np.ndarray: Sorted keyframe times in seconds.
+        """
+        if self.keyframes is None:
+            log: str = run_ffmpeg(['-skip_frame', 'nokey', '-i', self.source_path, '-an', '-vf', 'showinfo',
+                                   '-f', 'null', '-'])
+            self.keyframes = np.unique(np.array(re.findall(r'pts_time:\s*([-\d.]+)', log), dtype=float))
+        return self.keyframes
+
+    @staticmethod
+    def split_cut(cut: Cut, keyframes: np.ndarray, tolerance: float) -> List[Piece]:
+        """
+        Splits a cut into a stream-copied span between keyframes and re-encoded edges. Boundaries
+        within the tolerance of a keyframe are moved onto it, which removes the edge on that side,
+        unless the moved start passes the original end, the moved end the original start, or the
+        cut loses its length; then the whole cut is re-encoded with its original boundaries.
+
+        Args:
+            cut (Cut): (start, end) time in seconds.
+            keyframes (np.ndarray): Sorted keyframe times in seconds.
+            tolerance (float): Seconds a boundary may move to land on a keyframe.
+
+        Returns:
+            List[Piece]: Consecutive (start, end, copied) pieces covering the cut.
+        """
+        def snap(moment: float) -> float:
+            if not len(keyframes):
+                return moment
+            nearest: float = float(keyframes[np.abs(keyframes - moment).argmin()])
+            return nearest if abs(nearest - moment) <= tolerance else moment
+
+        start, end = snap(cut[0]), snap(cut[1])
+        if start > cut[1] or end < cut[0] or end <= start:
+            return [(cut[0], cut[1], False)]
+        inside: np.ndarray = keyframes[(keyframes >= start) & (keyframes <= end)]
+        if len(inside) < 2:
+            return [(start, end, False)]
+
+        copy_start, copy_end = float(inside[0]), float(inside[-1])
+        pieces: List[Piece] = [(start, copy_start, False)] if copy_start > start else []
+        pieces.append((copy_start, copy_end, True))
+        if end > copy_end:
+            pieces.append((copy_end, end, False))
+        return pieces
+
+    def cut(self, cuts: List[Cut], result_path: str) -> Dict[str, float]:
+        """
+        Cuts one short with ffmpeg: spans between keyframes are stream-copied, the edges re-encoded
+        with the frame rate and size of the source, and all pieces joined with the concat demuxer.
+        The pieces share one video time base, so that they join without timestamp gaps.
+
+        Args:
+            cuts (List[Cut]): (start, end) times in seconds, in playback order.
+            result_path (str): Path of the short.
+
+        Returns:
+            Dict[str, float]: Cut time in seconds, number of frames, frames per second of the cut
+                and the share of the short that was stream-copied.
+        """
+        start: float = time.perf_counter()
+        infos: Dict[str, Any] = ffmpeg_parse_infos(self.source_path)
+        pieces: List[Piece] = [piece for cut in cuts
+                               for piece in self.split_cut(cut, self.probe_keyframes(), self.keyframe_tolerance)]
+
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(result_path))) as directory:
+            files: List[str] = []
+            for i, (piece_start, piece_end, copied) in enumerate(pieces):
+                files.append(os.path.join(directory, f'{i}.mp4'))
+                # copied pieces end right before a keyframe, so whole GOPs are counted in frames
+                frames: int = round((piece_end - piece_start) * infos['video_fps'])
+                codecs: List[str] = ['-frames:v', str(frames), '-c', 'copy'] if copied else [
+                    '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-r', str(infos['video_fps']), '-c:a', 'aac']
+                run_ffmpeg(['-ss', f'{piece_start:.6f}', '-i', self.source_path, '-t', f'{piece_end - piece_start:.6f}',
+                            *codecs, '-video_track_timescale', '90000', files[-1]])
+
+            list_path: str = os.path.join(directory, 'pieces.txt')
+            with open(list_path, 'w') as file:
+                file.writelines(f"file '{path}'\n" for path in files)
+            run_ffmpeg(['-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', '-movflags', '+faststart',
+                        result_path])
+
+        seconds: float = time.perf_counter() - start
+        duration: float = sum(end - begin for begin, end, _ in pieces)
+        frames = round(duration * infos['video_fps'])
+        copied: float = sum(end - begin for begin, end, copied in pieces if copied)
+        return {"seconds": seconds, "frames": frames, "fps": frames / seconds, "copied": copied / duration if duration > 0 else 0.0}
+
+    def create_videos(self, df: DataFrame, shorts: List[Sequence[int]], video_id: str,
+                      save_path: str = SHORTS_PATH) -> List[str]:
+        """
+        Plans and renders several shorts of a video.
+
+        Args:
+            df (DataFrame): The transcript with 'start_time' and 'end_time' columns.
+            shorts (List[Sequence[int]]): Index labels of the sentences of every short.
+            video_id (str): The video id, used to name the shorts.
+            save_path (str): Directory of the shorts.
+
+        Returns:
+            List[str]: The paths of the shorts, named {video_id}_{index}.mp4.
+        """
+        result_paths: List[str] = [os.path.join(save_path, f'{video_id}_{i}.mp4') for i in range(len(shorts))]
+        cut_lists: List[List[Cut]] = [self.plan(df, numbers) for numbers in shorts]
+        logging.info(f"Cutting {sum(map(len, shorts))} sentences as {sum(map(len, cut_lists))} spans.")
+        return self.render(cut_lists, result_paths)
+
+    @staticmethod
+    def create_video(df: DataFrame, sentence_numbers: Tuple[int], video_id: str, index: int) -> None:
+        """
+        Renders a single short of a downloaded video.
 
-        logging.info(f"Video saved to {result_path}")
+        Args:
+            df (DataFrame): The transcript with 'start_time' and 'end_time' columns.
+            sentence_numbers (Tuple[int]): Index labels of the sentences of the short.
+            video_id (str): The video id.
+            index (int): Number of the short, used to name it.
+        """
+        editor: VideoEditor = VideoEditor(os.path.join(VIDEOS_PATH, f'{video_id}.mp4'), workers=1)
+        editor.render([editor.plan(df, sentence_numbers)], [os.path.join(SHORTS_PATH, f'{video_id}_{index}.mp4')])
@@ -0,0 +1,58 @@
+"""
+Compares prompt sizes of the full generation contexts with contexts packed by ContextBuilder.
+
+Each transcript is paired with random-walk embeddings from benchmarks.synthetic.
+Candidates are sampled sentences, and contexts are built as in VideoAnalysisPipeline.analyze_content.
+Prompt sizes are estimated tokens per request; generation latency is not measured.
+
+Usage:
+    python -m benchmarks.context_benchmark
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.analytics.context_builder import ContextBuilder
+from app.analytics.segmenter import TextSegmenter
+from app.services.embedding_service import EmbeddingService
+from app.services.llm_service import LLM
+from benchmarks.synthetic import load_transcript
+from config.config import VIDEOS
+
+DIMENSIONS = 1536
+CANDIDATES = 13
+
+
+def prompt_tokens(llm: LLM, df: pd.DataFrame, requests) -> np.ndarray:
+    return np.array([EmbeddingService.estimate_tokens(llm.system_prompt + llm.sentences_prompt(df, i, context, []))
+                     for i, context in requests])
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    llm = LLM()
+    print(f"{'transcript':<34} {'full tok':>9} {'packed tok':>10} {'max packed':>10} {'saved':>6} {'build ms':>9}")
+
+    for transcript, _ in VIDEOS:
+        df, embeddings = load_transcript(transcript, 'walk', DIMENSIONS, rng)
+
+        segmenter = TextSegmenter(df, embeddings)
+        candidates = sorted(rng.choice(len(df), CANDIDATES, replace=False).tolist())
+        closest = segmenter.get_n_closest_batch(candidates, n=2)
+        full = [(i, sorted(set(segmenter.get_consecutive(i, 0, 2) + closest[i]))) for i in candidates]
+
+        start = time.perf_counter()
+        builder = ContextBuilder(df, embeddings)
+        packed = [(i, builder.build(i, context)) for i, context in full]
+        build_time = time.perf_counter() - start
+
+        full_tokens = prompt_tokens(llm, df, full)
+        packed_tokens = prompt_tokens(llm, df, packed)
+        saved = 1 - packed_tokens.sum() / full_tokens.sum()
+        print(f"{transcript:<34} {full_tokens.mean():>9.0f} {packed_tokens.mean():>10.0f} {packed_tokens.max():>10} "
+              f"{saved:>6.0%} {build_time * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
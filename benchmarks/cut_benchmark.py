@@ -0,0 +1,80 @@
+"""
+Compares the wall-clock time of cutting shorts with the moviepy re-encoding path and with
+the keyframe-aware stream-copy path of VideoEditor, cutting every sentence separately and
+cutting the spans that VideoEditor.coalesce merges them into.
+
+Without a source video, a 3-minute 640x360 test pattern with a keyframe every 2 seconds is
+generated with the bundled ffmpeg. The cuts imitate shorts of consecutive sentences with
+short pauses between them.
+
+Usage:
+    python -m benchmarks.cut_benchmark [source.mp4]
+"""
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+from app.video_editor import VideoEditor, run_ffmpeg
+from config.config import KEYFRAME_TOLERANCE, CUT_MERGE_GAP
+
+SECONDS = 180
+SHORTS = 3
+SENTENCES = 8
+
+
+def make_source(path: str) -> None:
+    run_ffmpeg(['-f', 'lavfi', '-i', 'testsrc2=size=640x360:rate=30', '-f', 'lavfi', '-i', 'sine=frequency=440',
+                '-t', str(SECONDS), '-c:v', 'libx264', '-g', '60', '-pix_fmt', 'yuv420p', '-c:a', 'aac', path])
+
+
+def make_cuts(rng: np.random.Generator, duration: float):
+    cut_lists = []
+    for _ in range(SHORTS):
+        lengths = rng.uniform(2, 6, SENTENCES)
+        pauses = rng.uniform(0.1, 0.8, SENTENCES)
+        start = rng.uniform(0, duration - lengths.sum() - pauses.sum())
+        starts = start + np.concatenate([[0], np.cumsum(lengths + pauses)[:-1]])
+        cut_lists.append([(float(begin), float(begin + length)) for begin, length in zip(starts, lengths)])
+    return cut_lists
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(directory, 'source.mp4')
+        if len(sys.argv) <= 1:
+            make_source(source_path)
+
+        editors = {
+            "moviepy": VideoEditor(source_path, workers=1),
+            "fast cut": VideoEditor(source_path, workers=1, fast_cut=True),
+        }
+        probe_start = time.perf_counter()
+        keyframes = editors["fast cut"].probe_keyframes()
+        probe = time.perf_counter() - probe_start
+        cut_lists = make_cuts(np.random.default_rng(0), float(keyframes[-1]))
+        print(f"{len(keyframes)} keyframes probed in {probe:.2f}s, tolerance {KEYFRAME_TOLERANCE}s, "
+              f"{SHORTS} shorts of {SENTENCES} sentences")
+
+        plans = {
+            "sentences": cut_lists,
+            "spans": [VideoEditor.coalesce(np.array(cuts), CUT_MERGE_GAP) for cuts in cut_lists],
+        }
+
+        print(f"{'mode':<10} {'cuts':<10} {'clips':>5} {'seconds':>8} {'fps':>8} {'copied':>7}")
+        for name, editor in editors.items():
+            for plan, cuts in plans.items():
+                paths = [os.path.join(directory, f"{name.replace(' ', '_')}_{plan}_{i}.mp4") for i in range(SHORTS)]
+                start = time.perf_counter()
+                editor.render(cuts, paths)
+                seconds = time.perf_counter() - start
+
+                frames = sum(short['frames'] for short in editor.stats.values())
+                copied = np.mean([short.get('copied', 0.0) for short in editor.stats.values()])
+                print(f"{name:<10} {plan:<10} {sum(map(len, cuts)):>5} {seconds:>8.2f} {frames / seconds:>8.1f} {copied:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measures embedding throughput of EmbeddingService against a local fake client with simulated latency.
+
+Usage:
+    python -m benchmarks.embedding_benchmark
+"""
+import os
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.services.embedding_service import EmbeddingService
+from config.config import TEXTS_PATH
+
+REQUEST_LATENCY = 0.2  # seconds per HTTP round trip
+INPUT_LATENCY = 0.001  # seconds per embedded input
+DIMENSIONS = 1536
+
+
+class LatencyEmbeddingsClient:
+    """Fake embeddings client that sleeps like a remote API would."""
+
+    def __init__(self):
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    @staticmethod
+    def create(input, model):
+        time.sleep(REQUEST_LATENCY + INPUT_LATENCY * len(input))
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[0.0] * DIMENSIONS) for i in range(len(input))])
+
+
+def main() -> None:
+    sentences = pd.read_csv(os.path.join(TEXTS_PATH, "George Hotz.csv"))['sentence'].tolist()
+    client = LatencyEmbeddingsClient()
+
+    print(f"{len(sentences)} sentences, {REQUEST_LATENCY}s per request")
+    print(f"{'batch':>6} {'workers':>8} {'seconds':>8} {'sent/s':>8}")
+    for batch_size in (16, 64, 256):
+        for workers in (1, 4, 8):
+            service = EmbeddingService(client, batch_size=batch_size, batch_tokens=10 ** 6, workers=workers)
+            start = time.perf_counter()
+            service.embed(sentences)
+            elapsed = time.perf_counter() - start
+            print(f"{batch_size:>6} {workers:>8} {elapsed:>8.2f} {len(sentences) / elapsed:>8.0f}")
+
+    # the old path: one request per sentence, sequentially
+    sample = sentences[:50]
+    start = time.perf_counter()
+    for sentence in sample:
+        client.create(input=[sentence], model="")
+    elapsed = time.perf_counter() - start
+    print(f"{1:>6} {1:>8} {elapsed * len(sentences) / len(sample):>8.2f} {len(sample) / elapsed:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
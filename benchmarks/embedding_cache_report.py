@@ -0,0 +1,55 @@
+"""
+Reports how many embedding API inputs the sentence-level cache saves across the bundled transcripts.
+
+Runs every transcript twice through EmbeddingService with a fresh cache and a local fake client,
+so no API key is needed.
+
+Usage:
+    python -m benchmarks.embedding_cache_report
+"""
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_cache import VectorCache
+from config.config import TEXTS_PATH, VIDEOS, EMBEDDINGS_CACHE_SIZE
+
+
+class CountingEmbeddingsClient:
+    """Fake embeddings client that counts embedded inputs."""
+
+    def __init__(self):
+        self.inputs = 0
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    def create(self, input, model):
+        self.inputs += len(input)
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[0.0] * 8) for i in range(len(input))])
+
+
+def main() -> None:
+    client = CountingEmbeddingsClient()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = VectorCache(os.path.join(directory, "cache.npz"), EMBEDDINGS_CACHE_SIZE)
+        service = EmbeddingService(client, cache=cache)
+
+        print(f"{'run':>4} {'transcript':<34} {'sentences':>9} {'api inputs':>10}")
+        total = 0
+        for run in (1, 2):
+            for transcript, _ in VIDEOS:
+                sentences = pd.read_csv(os.path.join(TEXTS_PATH, f"{transcript}.csv"))['sentence'].tolist()
+                before = client.inputs
+                service.embed(sentences)
+                total += len(sentences)
+                print(f"{run:>4} {transcript:<34} {len(sentences):>9} {client.inputs - before:>10}")
+
+    print(f"\n{total} sentences embedded, {client.inputs} sent to the API "
+          f"({1 - client.inputs / total:.1%} saved), cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
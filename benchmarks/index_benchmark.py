@@ -0,0 +1,83 @@
+"""
+Measures recall and latency of the approximate IVF index against exact search.
+
+Uses the embedding matrices saved in EMBEDDINGS_PATH by DataProcessor when there are any,
+otherwise clustered random vectors of the bundled transcripts' total size. A second corpus of
+SCALE times that size is drawn independently from the same kind of clustered random vectors
+to approximate hundreds of ingested podcasts. Queries are held out of the indexed vectors.
+
+Usage:
+    python -m benchmarks.index_benchmark
+"""
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.analytics.base_processor import BaseTextProcessor
+from app.analytics.vector_index import FlatIndex, IVFIndex
+from config.config import EMBEDDINGS_PATH, TEXTS_PATH, VIDEOS
+
+DIMENSIONS = 1536
+QUERIES = 200
+K = 10
+SCALE = 20
+
+
+def synthetic(size: int, rng: np.random.Generator) -> np.ndarray:
+    topics = rng.normal(size=(max(size // 20, 1), DIMENSIONS)).astype(np.float32)
+    return BaseTextProcessor.normalize(topics[rng.integers(len(topics), size=size)]
+                                       + 2 * rng.normal(size=(size, DIMENSIONS)).astype(np.float32))
+
+
+def corpus_embeddings() -> np.ndarray:
+    files = glob.glob(os.path.join(EMBEDDINGS_PATH, "*.npy"))
+    if files:
+        print(f"Using {len(files)} saved embedding matrices.")
+        return np.concatenate([np.load(file) for file in files])
+
+    sentences = sum(len(pd.read_csv(os.path.join(TEXTS_PATH, f"{transcript}.csv"))) for transcript, _ in VIDEOS)
+    print(f"No saved embeddings, using {sentences} synthetic vectors.")
+    return synthetic(sentences, np.random.default_rng(0))
+
+
+def timed_search(index, queries):
+    start = time.perf_counter()
+    _, ids = index.search(queries, K)
+    return ids, (time.perf_counter() - start) / len(queries)
+
+
+def run(vectors: np.ndarray) -> None:
+    held_out = np.zeros(len(vectors), dtype=bool)
+    held_out[np.random.default_rng(1).choice(len(vectors), QUERIES, replace=False)] = True
+    queries, vectors = vectors[held_out], vectors[~held_out]
+
+    flat = FlatIndex(vectors.shape[1])
+    flat.add(vectors)
+    exact, flat_latency = timed_search(flat, queries)
+    print(f"\n{len(vectors)} vectors")
+    print(f"{'index':<16} {'recall@10':>9} {'ms/query':>9}")
+    print(f"{'flat':<16} {1:>9.3f} {flat_latency * 1000:>9.3f}")
+
+    for lists in (int(np.sqrt(len(vectors))), 2 * int(np.sqrt(len(vectors)))):
+        ivf = IVFIndex(vectors.shape[1], lists=lists)
+        ivf.add(vectors)
+        if not len(ivf.centroids):  # add trains the index once it holds enough vectors
+            ivf.train()
+        for probes in (1, 2, 4, 8, 16):
+            ivf.probes = probes
+            ids, latency = timed_search(ivf, queries)
+            recall = np.mean([len(set(a) & set(b)) / K for a, b in zip(ids, exact)])
+            print(f"{f'ivf {lists}/{probes}':<16} {recall:>9.3f} {latency * 1000:>9.3f}")
+
+
+def main() -> None:
+    vectors = corpus_embeddings()
+    run(vectors)
+    run(synthetic(len(vectors) * SCALE, np.random.default_rng(2)))
+
+
+if __name__ == "__main__":
+    main()
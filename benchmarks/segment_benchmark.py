@@ -0,0 +1,89 @@
+"""
+Compares segment assignment and segment lookups of TextSegmenter with the former
+list-scanning loop and DataFrame filters, on the largest bundled transcript.
+
+The transcript is paired with random-walk embeddings from benchmarks.synthetic.
+
+Usage:
+    python -m benchmarks.segment_benchmark
+"""
+import time
+import timeit
+
+import numpy as np
+
+from app.analytics.segmenter import TextSegmenter
+from benchmarks.synthetic import load_transcript
+
+TRANSCRIPT = "George Hotz"
+DIMENSIONS = 1536
+QUERIES = 200
+
+
+def legacy_segments(size, split_points):
+    split_points = list(split_points)
+    segment_numbers = []
+    segment_number = 0
+    for num in range(size):
+        if num in split_points:
+            segment_number += 1
+        segment_numbers.append(segment_number)
+    return segment_numbers
+
+
+def indexed_segments(size, split_points):
+    starts = np.zeros(size, dtype=int)
+    starts[split_points] = 1
+    return np.cumsum(starts)
+
+
+def legacy_consecutive(df, sentence_number, back, forward):
+    paragraph = df.loc[sentence_number, 'segment']
+    context = df.loc[df['segment'].between(max(paragraph - back, 0), paragraph + forward)].index.tolist()
+    return sorted(context)
+
+
+def legacy_expand(df, segments):
+    return df[df['segment'].isin(segments)].index.tolist()
+
+
+def timed(function, number=1) -> float:
+    return timeit.timeit(function, number=number) / number
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    df, embeddings = load_transcript(TRANSCRIPT, 'walk', DIMENSIONS, rng)
+
+    start = time.perf_counter()
+    segmenter = TextSegmenter(df, embeddings)
+    print(f"{TRANSCRIPT}: {len(df)} sentences, {df['segment'].max() + 1} segments, "
+          f"segmented in {time.perf_counter() - start:.2f}s")
+
+    split_points = segmenter.segment_offsets[1:-1]
+    assert legacy_segments(len(df), split_points) == df['segment'].tolist()
+    sentences = rng.choice(len(df), QUERIES).tolist()
+    segment_sets = [np.unique(rng.choice(df['segment'].max() + 1, 3)) for _ in range(QUERIES)]
+    for sentence, segments in zip(sentences, segment_sets):
+        assert legacy_consecutive(df, sentence, 0, 2) == segmenter.get_consecutive(sentence, 0, 2)
+        assert legacy_expand(df, segments) == df.index[segmenter.expand_segments(segments)].tolist()
+
+    rows = [
+        ("segment assignment",
+         timed(lambda: legacy_segments(len(df), split_points)),
+         timed(lambda: indexed_segments(len(df), split_points), 100)),
+        ("get_consecutive",
+         timed(lambda: [legacy_consecutive(df, i, 0, 2) for i in sentences]) / QUERIES,
+         timed(lambda: [segmenter.get_consecutive(i, 0, 2) for i in sentences], 10) / QUERIES),
+        ("segment expansion",
+         timed(lambda: [legacy_expand(df, segments) for segments in segment_sets]) / QUERIES,
+         timed(lambda: [segmenter.expand_segments(segments) for segments in segment_sets], 10) / QUERIES),
+    ]
+
+    print(f"{'operation':<20} {'legacy ms':>10} {'indexed ms':>11} {'speedup':>8}")
+    for name, legacy, indexed in rows:
+        print(f"{name:<20} {legacy * 1000:>10.3f} {indexed * 1000:>11.3f} {legacy / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
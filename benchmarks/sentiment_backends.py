@@ -0,0 +1,55 @@
+"""
+Compares SentimentAnalyzer backends against the fp32 model on the bundled transcripts:
+score drift, label agreement and throughput. Suggests the fastest backend within tolerance.
+
+Downloads SENTIMENT_MODEL on first run.
+
+Usage:
+    python -m benchmarks.sentiment_backends [tolerance]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.analytics.sentiment_analyzer import SentimentAnalyzer
+from config.config import TEXTS_PATH, VIDEOS
+
+SENTENCES_PER_TRANSCRIPT = 200
+
+
+def main() -> None:
+    tolerance = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+    sentences = []
+    for transcript, _ in VIDEOS:
+        df = pd.read_csv(os.path.join(TEXTS_PATH, f"{transcript}.csv"))
+        sentences.extend(df['sentence'].tolist()[:SENTENCES_PER_TRANSCRIPT])
+
+    results = {}
+    for backend in SentimentAnalyzer.backends:
+        analyzer = SentimentAnalyzer(backend=backend)
+        analyzer.predict_batch(sentences[:8])  # warm-up
+        start = time.perf_counter()
+        scores = analyzer.predict_batch(sentences)
+        results[backend] = (scores, len(sentences) / (time.perf_counter() - start))
+
+    reference = results['fp32'][0]
+    print(f"{len(sentences)} sentences, tolerance {tolerance}")
+    print(f"{'backend':<12} {'sent/s':>8} {'max drift':>10} {'mean drift':>11} {'labels':>7}")
+
+    accepted = []
+    for backend, (scores, throughput) in results.items():
+        drift = np.abs(scores - reference)
+        emotion_drift = np.abs((1 - scores[:, 1]) - (1 - reference[:, 1])).max()
+        agreement = (scores.argmax(axis=1) == reference.argmax(axis=1)).mean()
+        print(f"{backend:<12} {throughput:>8.1f} {drift.max():>10.4f} {drift.mean():>11.5f} {agreement:>7.1%}")
+        if emotion_drift <= tolerance:
+            accepted.append((throughput, backend))
+
+    print(f"\nFastest backend within tolerance: {max(accepted)[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Reports sentiment inference throughput of SentimentAnalyzer for batch sizes from 1 to 64.
+
+Downloads SENTIMENT_MODEL on first run.
+
+Usage:
+    python -m benchmarks.sentiment_benchmark [threads]
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+import torch
+
+from app.analytics.sentiment_analyzer import SentimentAnalyzer
+from config.config import TEXTS_PATH
+
+SENTENCES = 512
+
+
+def main() -> None:
+    sentences = pd.read_csv(os.path.join(TEXTS_PATH, "George Hotz.csv"))['sentence'].tolist()[:SENTENCES]
+    analyzer = SentimentAnalyzer()
+    analyzer.predict_batch(sentences[:8])  # warm-up, which loads the model and sets SENTIMENT_THREADS
+    if len(sys.argv) > 1:
+        torch.set_num_threads(int(sys.argv[1]))
+
+    print(f"{len(sentences)} sentences")
+    print(f"{'batch':>6} {'seconds':>8} {'sent/s':>8}")
+    for batch_size in (1, 2, 4, 8, 16, 32, 64):
+        analyzer.batch_size = batch_size
+        start = time.perf_counter()
+        analyzer.predict_batch(sentences)
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>6} {elapsed:>8.2f} {len(sentences) / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
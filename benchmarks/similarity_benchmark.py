@@ -0,0 +1,56 @@
+"""
+Compares the vectorized similarity search with the former iterrows implementation of threshold_closest.
+
+Each transcript is paired with random embeddings from benchmarks.synthetic.
+
+Usage:
+    python -m benchmarks.similarity_benchmark
+"""
+import timeit
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.analytics.base_processor import BaseTextProcessor
+from benchmarks.synthetic import load_transcript
+from config.config import VIDEOS
+
+DIMENSIONS = 1536
+
+
+def legacy_threshold_closest(target_embedding, df, threshold=0.7):
+    sentence_similarities = []
+    for index, row in df.iterrows():
+        embedding = np.array(row['embedding']).reshape(1, -1)
+        similarity = cosine_similarity(embedding, target_embedding)[0][0]
+        if similarity > threshold:
+            sentence_similarities.append((index, similarity))
+
+    sorted_sentences = sorted(sentence_similarities, key=lambda x: x[1], reverse=True)
+    return [i for i, _ in sorted_sentences]
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'transcript':<34} {'sentences':>9} {'legacy ms':>10} {'vector ms':>10} {'speedup':>8} {'same':>5}")
+
+    for transcript, _ in VIDEOS:
+        df, embeddings = load_transcript(transcript, 'random', DIMENSIONS, rng)
+        df['embedding'] = [vector.tolist() for vector in embeddings]
+        target = embeddings[:1] + embeddings[1:2] * 0.9  # unequal weights, so that sentences 0 and 1 do not tie
+        threshold = 0.05
+
+        legacy = legacy_threshold_closest(target, df, threshold)
+        vectorized = BaseTextProcessor.threshold_closest(target, df, embeddings, threshold)
+
+        legacy_time = timeit.timeit(lambda: legacy_threshold_closest(target, df, threshold), number=1)
+        runs = 50
+        vector_time = timeit.timeit(
+            lambda: BaseTextProcessor.threshold_closest(target, df, embeddings, threshold), number=runs) / runs
+
+        print(f"{transcript:<34} {len(df):>9} {legacy_time * 1000:>10.1f} {vector_time * 1000:>10.2f} "
+              f"{legacy_time / vector_time:>7.0f}x {str(legacy == vectorized):>5}")
+
+
+if __name__ == "__main__":
+    main()
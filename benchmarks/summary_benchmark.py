@@ -0,0 +1,51 @@
+"""
+Compares the sumy TextRank summaries with the embedding TextRank of TextSummarizer
+in runtime and in agreement of the selected sentences: the share of sumy sentences that are
+selected exactly, and that have a selected sentence at most two sentences away.
+
+Sentences are embedded with TF-IDF vectors from benchmarks.synthetic, which capture the word
+overlap that sumy's TextRank is built on.
+
+Usage:
+    python -m benchmarks.summary_benchmark
+"""
+import time
+
+import numpy as np
+
+from app.analytics.summarizer import TextSummarizer
+from benchmarks.synthetic import load_transcript
+from config.config import VIDEOS
+
+DIMENSIONS = 256
+SENTENCES = 10
+NEAR = 2
+
+
+def main() -> None:
+    sumy = TextSummarizer(method='sumy')
+    embedding = TextSummarizer(method='embedding')
+    print(f"{'transcript':<34} {'sentences':>9} {'sumy s':>7} {'textrank s':>10} "
+          f"{'speedup':>8} {'overlap':>8} {'near':>5}")
+
+    for transcript, _ in VIDEOS:
+        df, embeddings = load_transcript(transcript, 'tfidf', DIMENSIONS)
+
+        start = time.perf_counter()
+        expected = sumy.summarize(df, SENTENCES)
+        sumy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summary = embedding.summarize(df, SENTENCES, embeddings)
+        textrank_time = time.perf_counter() - start
+
+        overlap = len(set(expected) & set(summary)) / max(len(expected), 1)
+        # share of sumy sentences with an embedding TextRank sentence at most NEAR sentences away
+        distances = np.abs(np.subtract.outer(expected, summary)) if summary else np.full((len(expected), 1), NEAR + 1)
+        near = (distances.min(axis=1) <= NEAR).mean() if expected else 0.0
+        print(f"{transcript:<34} {len(df):>9} {sumy_time:>7.2f} {textrank_time:>10.3f} "
+              f"{sumy_time / textrank_time:>7.0f}x {overlap:>8.0%} {near:>5.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Loads bundled transcripts with synthetic sentence embeddings for the benchmarks.
+
+The bundled transcripts have no embeddings, and the benchmarks should not call the embedding
+API, so each transcript is paired with vectors of one of these kinds:
+
+    random  independent Gaussian vectors, for timing similarity searches.
+    walk    a random walk with noise, which keeps neighbouring sentences similar like real
+            transcripts do, for segmentation and context selection.
+    tfidf   TF-IDF reduced by truncated SVD, which captures the word overlap of the sentences,
+            for comparing with word-based methods such as sumy's TextRank.
+"""
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.analytics.base_processor import BaseTextProcessor
+from config.config import TEXTS_PATH
+
+KINDS = ['random', 'walk', 'tfidf']
+
+
+def load_transcript(transcript: str, kind: str = 'walk', dimensions: int = 1536,
+                    rng: Optional[np.random.Generator] = None) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Reads a bundled transcript and embeds its sentences synthetically.
+
+    Args:
+        transcript (str): Name of the transcript in TEXTS_PATH, without the extension.
+        kind (str): One of KINDS.
+        dimensions (int): Dimensionality of the embeddings; tfidf uses at most the vocabulary size - 1.
+        rng (Optional[np.random.Generator]): Source of the random vectors; seeded with 0 by default.
+
+    Returns:
+        Tuple[pd.DataFrame, np.ndarray]: The transcript with an 'embedding_row' column and the
+            normalized float32 embedding matrix.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown embedding kind '{kind}', expected one of {KINDS}.")
+
+    rng = rng if rng is not None else np.random.default_rng(0)
+    df = pd.read_csv(os.path.join(TEXTS_PATH, f"{transcript}.csv"))
+    if kind == 'random':
+        vectors = rng.normal(size=(len(df), dimensions))
+    elif kind == 'walk':
+        vectors = np.cumsum(rng.normal(size=(len(df), dimensions)), axis=0) + rng.normal(size=(len(df), dimensions)) * 5
+    else:
+        tfidf = TfidfVectorizer(stop_words='english').fit_transform(df['sentence'])
+        vectors = TruncatedSVD(min(dimensions, tfidf.shape[1] - 1), random_state=0).fit_transform(tfidf)
+
+    df['embedding_row'] = np.arange(len(df))
+    return df, BaseTextProcessor.normalize(vectors.astype(np.float32))
@@ -5,7 +5,67 @@ EMBEDDINGS_MODEL = "text-embedding-ada-002"
 GPT_MODEL = "gpt-4-turbo-preview"
 SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment"
 
+EMBEDDINGS_BATCH_SIZE = 256  # inputs per embeddings request
+EMBEDDINGS_BATCH_TOKENS = 8000  # estimated tokens per embeddings request
+EMBEDDINGS_WORKERS = 4  # concurrent embeddings requests
+EMBEDDINGS_RETRIES = 3
+EMBEDDINGS_CACHE_SIZE = 50000  # cached sentence embeddings, ~300 MB as float32
+
+CONTEXT_TOKEN_BUDGET = 600  # estimated tokens of context sentences per generate prompt
+CONTEXT_SIMILARITY_WEIGHT = 0.7  # share of similarity vs transcript distance in context ranking
+CONTEXT_DISTANCE_SCALE = 20  # sentences; proximity weight decays as exp(-distance / scale)
+
+SUMMARY_METHOD = "sumy"  # "sumy" for word-overlap TextRank, "embedding" for TextRank on sentence embeddings
+TEXTRANK_NEIGHBOURS = 30  # edges per sentence in the embedding similarity graph
+TEXTRANK_DAMPING = 0.85
+
+CANDIDATE_SEGMENT_GAP = 0  # candidates at most this many segments from a central candidate share its request
+CANDIDATE_JACCARD = 0.5  # candidates whose contexts overlap a central candidate's this much share its request
+
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # bytes per ranged request
+DOWNLOAD_WORKERS = 4  # chunks fetched in parallel
+DOWNLOAD_RETRIES = 3  # attempts per chunk
+DOWNLOAD_TIMEOUT = 30  # seconds per request
+
+LLM_CONCURRENCY = 8  # simultaneous chat completions
+LLM_REQUESTS_PER_MINUTE = 500
+LLM_TOKENS_PER_MINUTE = 300000
+LLM_TIMEOUT = 60  # seconds per completion
+LLM_RETRIES = 3
+COMPLETION_CACHE_ENABLED = False  # reuse completions of identical prompts across runs
+COMPLETION_CACHE_SIZE = 10000
+COMPLETION_CACHE_TTL = 30 * 24 * 3600  # seconds
+
+SENTIMENT_BACKEND = "fp32"  # "fp32", "int8" (dynamically quantized) or "torchscript"
+SENTIMENT_BATCH_SIZE = 32
+SENTIMENT_THREADS = 0  # torch intra-op threads, 0 keeps the torch default
+SENTIMENT_CACHE_SIZE = 500000  # cached sentence scores
+
+VECTOR_INDEX = "flat"  # index of TextSegmenter.get_n_closest_batch: "flat" for exact search, "ivf" for approximate
+IVF_LISTS = 64
+IVF_PROBES = 8
+
 EMBEDDINGS_PATH = "data/embeddings/"
+EMBEDDINGS_CACHE_PATH = "data/embeddings/cache.npz"
+SENTIMENT_CACHE_PATH = "data/sentiment_cache.npz"
+COMPLETION_CACHE_PATH = "data/completions.sqlite"
+ARTIFACTS_PATH = "data/artifacts/"
+ARTIFACT_VERSION = 1  # bump when the derived columns change
+STAGES_PATH = "data/stages/"
+DAG_WORKERS = 4
+RENDER_WORKERS = 2  # processes rendering shorts, each decodes the source once
+SHORTS_FPS = 24
+FAST_CUT = False  # stream-copy shorts between keyframes instead of re-encoding them
+KEYFRAME_TOLERANCE = 0.5  # seconds a cut may move to start or end on a keyframe
+CUT_MERGE_GAP = 1.0  # seconds; sentences closer than this are cut as one span, keeping the pause
+
+AUDIO_ALIGNMENT = True  # fit sentence timestamps to the pauses in the audio track
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_FRAME = 0.02  # seconds per energy frame
+AUDIO_CHUNK = 60  # seconds of audio decoded at a time
+VAD_MARGIN = 12  # dB above the noise floor that count as speech
+VAD_MIN_PAUSE = 0.2  # seconds; shorter silences are part of the speech around them
+ALIGN_TOLERANCE = 2.0  # seconds of speech a sentence boundary may move to land on a pause
 SHORTS_PATH = "data/shorts/"
 TEXTS_PATH = "data/transcripts/"
 VIDEOS_PATH = "data/videos/"
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from app.analytics.token_index import TokenIndex
+from app.services.artifact_store import ArtifactStore
+
+
+class TestArtifactStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ArtifactStore(os.path.join(self.directory.name, 'artifacts'))
+
+        sentences = ["Hello there.", "Is this cached?", "Yes, it is."]
+        self.tokens = TokenIndex.from_sentences(sentences)
+        self.df = pd.DataFrame({'sentence': sentences, 'time': [1.0, 2.0, 1.5], 'segment': [0, 0, 1],
+                                'tokens': self.tokens.token_lists()})
+        self.embeddings = np.arange(12, dtype=np.float32).reshape(3, 4)
+        self.file = self.store.file('video', 'f' * 40)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        self.store.save(self.file, self.df, self.embeddings, self.tokens)
+        table = self.store.load(self.file)
+
+        pd.testing.assert_frame_equal(ArtifactStore.to_dataframe(table), self.df.drop(columns=['tokens']))
+        np.testing.assert_array_equal(ArtifactStore.to_embeddings(table), self.embeddings)
+        self.assertEqual(ArtifactStore.to_tokens(table).token_lists(), self.df['tokens'].tolist())
+
+    def test_projection(self):
+        self.store.save(self.file, self.df, self.embeddings, self.tokens)
+        table = self.store.load(self.file, columns=['segment', 'embedding'])
+
+        self.assertEqual(table.column_names, ['segment', 'embedding'])
+        self.assertEqual(ArtifactStore.to_embeddings(table).shape, (3, 4))
+
+    def test_missing_artifact(self):
+        self.assertIsNone(self.store.load(self.file))
+
+    def test_fingerprint_changes_with_inputs(self):
+        source = os.path.join(self.directory.name, 'transcript.csv')
+        with open(source, 'w') as file:
+            file.write("index,sentence,length\n0,Hello.,1.0\n")
+        fingerprint = ArtifactStore.fingerprint(source, {'embeddings': 'a'})
+
+        self.assertEqual(fingerprint, ArtifactStore.fingerprint(source, {'embeddings': 'a'}))
+        self.assertNotEqual(fingerprint, ArtifactStore.fingerprint(source, {'embeddings': 'b'}))
+        with open(source, 'a') as file:
+            file.write("1,Bye.,1.0\n")
+        self.assertNotEqual(fingerprint, ArtifactStore.fingerprint(source, {'embeddings': 'a'}))
+
+    def test_digest_changes_with_contents(self):
+        digest = ArtifactStore.digest(self.df)
+        changed = self.df.assign(segment=[0, 1, 1])
+
+        self.assertEqual(digest, ArtifactStore.digest(self.df.drop(columns=['tokens'])))
+        self.assertNotEqual(digest, ArtifactStore.digest(changed))
+
+
+if __name__ == '__main__':
+    unittest.main()
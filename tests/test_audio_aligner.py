@@ -0,0 +1,69 @@
+import os
+import wave
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from app.audio_aligner import AudioAligner
+
+
+def make_audio(path, pieces, sample_rate=16000):
+    """Writes a WAV file of (seconds, voiced) pieces: a tone for speech, faint noise for pauses."""
+    rng = np.random.default_rng(0)
+    signal = []
+    for seconds, voiced in pieces:
+        t = np.arange(round(seconds * sample_rate)) / sample_rate
+        signal.append(8000 * np.sin(2 * np.pi * 220 * t) if voiced else rng.normal(0, 20, len(t)))
+    with wave.open(path, 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(sample_rate)
+        file.writeframes(np.concatenate(signal).astype(np.int16).tobytes())
+
+
+class TestAudioAligner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.audio_path = os.path.join(cls.directory.name, 'audio.wav')
+        # the second sentence has a short breath inside, the last two sentences run together
+        make_audio(cls.audio_path, [(0.5, False), (1.0, True), (0.4, False), (0.7, True), (0.1, False), (0.8, True),
+                                    (0.6, False), (0.8, True), (0.3, False), (1.2, True), (0.9, True), (0.5, False)])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_energy_is_independent_of_chunks(self):
+        whole = AudioAligner(chunk=600).energy(self.audio_path)
+        chunked = AudioAligner(chunk=0.3).energy(self.audio_path)
+
+        self.assertEqual(len(whole), round(7.8 / 0.02))
+        np.testing.assert_allclose(whole, chunked)
+
+    def test_speech_regions(self):
+        aligner = AudioAligner()
+        starts, ends = aligner.speech_regions(aligner.energy(self.audio_path))
+
+        np.testing.assert_allclose(starts, [0.5, 1.9, 4.1, 5.2], atol=0.03)
+        np.testing.assert_allclose(ends, [1.5, 3.5, 4.9, 7.3], atol=0.03)
+
+    def test_match_pauses(self):
+        aligner = AudioAligner(tolerance=1.0)
+        matches = aligner.match_pauses(np.array([1.0, 2.2, 3.0, 5.0]), np.array([0.9, 2.0, 2.5, 8.0]))
+        np.testing.assert_array_equal(matches, [0, 1, 2, -1])
+
+    def test_apply_to_dataframe(self):
+        # sentence durations of a transcript that speaks 5% faster than the audio
+        df = pd.DataFrame({'time': [1.0, 1.5, 0.8, 1.2, 0.9]}) * 0.95
+        df['start_time'] = df['time'].cumsum().shift(fill_value=0)
+        df['end_time'] = df['start_time'] + df['time']
+        AudioAligner(tolerance=0.5).apply_to_dataframe(df, self.audio_path)
+
+        np.testing.assert_allclose(df['start_time'], [0.5, 1.9, 4.1, 5.2, 6.4], atol=0.05)
+        np.testing.assert_allclose(df['end_time'], [1.5, 3.5, 4.9, 6.4, 7.3], atol=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.analytics.base_processor import BaseTextProcessor
+
+
+class TestBaseTextProcessor(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.raw = rng.normal(size=(200, 16))
+        self.embeddings = BaseTextProcessor.normalize(self.raw)
+        self.df = pd.DataFrame({'embedding_row': np.arange(200)})
+
+    def test_threshold_closest_matches_pairwise_loop(self):
+        target = self.raw[7].reshape(1, -1)
+        expected = [(i, cosine_similarity(self.raw[i].reshape(1, -1), target)[0][0]) for i in range(200)]
+        expected = [i for i, s in sorted(expected, key=lambda x: x[1], reverse=True) if s > 0.2]
+
+        result = BaseTextProcessor.threshold_closest(target, self.df, self.embeddings, threshold=0.2)
+
+        self.assertEqual(result, expected)
+
+    def test_threshold_closest_on_subset(self):
+        subset = self.df.iloc[50:60]
+        result = BaseTextProcessor.threshold_closest(self.raw[55], subset, self.embeddings, threshold=0.99)
+
+        self.assertEqual(result, [55])
+
+    def test_top_k_matches_full_sort(self):
+        scores = BaseTextProcessor.cosine_scores(self.raw[:5], self.embeddings)
+
+        hits = BaseTextProcessor.top_k(scores, 4)
+
+        np.testing.assert_array_equal(hits, np.argsort(-scores, axis=1)[:, :4])
+        np.testing.assert_array_equal(hits[:, 0], np.arange(5))
+
+    def test_top_n_closest_excludes_target(self):
+        closest = BaseTextProcessor.top_n_closest(self.raw[3], self.embeddings, n=3)
+
+        self.assertEqual(len(closest), 3)
+        self.assertNotIn(3, closest)
+
+
+if __name__ == '__main__':
+    unittest.main()
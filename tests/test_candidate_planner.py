@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.analytics.candidate_planner import CandidatePlanner
+from app.analytics.segmenter import TextSegmenter
+
+
+class TestCandidatePlanner(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'sentence': [f's{i}' for i in range(40)], 'segment': [i // 5 for i in range(40)]})
+
+    def test_groups_around_central_candidate(self):
+        planner = CandidatePlanner(self.df, segment_gap=1, jaccard=1.0)
+        candidates = [2, 7, 12, 30, 31]
+        contexts = [[0, 1, 2], [5, 6, 7], [10, 11, 12], [30], [31]]
+
+        requests = planner.plan(candidates, contexts)
+
+        # 12 is two segments from the central candidate 2, so it does not chain through 7
+        self.assertEqual(requests, [(2, [0, 1, 2, 5, 6, 7], [7]), (12, [10, 11, 12], []), (30, [30, 31], [31])])
+        self.assertEqual(planner.avoided, 2)
+
+    def test_groups_overlapping_contexts(self):
+        planner = CandidatePlanner(self.df, segment_gap=0, jaccard=0.5)
+        candidates = [0, 20, 39]
+        contexts = [[0, 1, 2, 3], [1, 2, 3, 20], [39]]
+
+        self.assertEqual(planner.cluster(candidates, contexts), [[0, 1], [2]])
+
+    def test_keeps_priority_order(self):
+        planner = CandidatePlanner(self.df, segment_gap=0, jaccard=1.0)
+        candidates = [33, 4, 31, 0]
+        contexts = [[33], [4], [31], [0]]
+
+        self.assertEqual(planner.plan(candidates, contexts), [(33, [31, 33], [31]), (4, [0, 4], [0])])
+
+    def test_distinct_candidates_are_kept(self):
+        planner = CandidatePlanner(self.df, segment_gap=1, jaccard=0.5)
+        candidates = [0, 15, 35]
+        contexts = [[0], [15], [35]]
+
+        self.assertEqual(planner.plan(candidates, contexts), [(0, [0], []), (15, [15], []), (35, [35], [])])
+        self.assertEqual(planner.avoided, 0)
+
+    def test_duplicate_candidates(self):
+        planner = CandidatePlanner(self.df, segment_gap=0, jaccard=1.0)
+
+        self.assertEqual(planner.plan([12, 12], [[12], [12]]), [(12, [12], [])])
+
+    def test_segmented_transcript(self):
+        df = pd.read_csv('data/transcripts/Why is LinkedIn so weird.csv', index_col='index')
+        df['embedding_row'] = np.arange(len(df))
+        vectors = TruncatedSVD(32, random_state=0).fit_transform(TfidfVectorizer().fit_transform(df['sentence']))
+        segmenter = TextSegmenter(df, TextSegmenter.normalize(vectors))
+
+        candidates = list(range(0, len(df), 4))
+        closest = segmenter.get_n_closest_batch(candidates, n=2)
+        contexts = [sorted(set(segmenter.get_consecutive(index, 0, 2) + closest[index])) for index in candidates]
+        requests = CandidatePlanner(df).plan(candidates, contexts)
+
+        # 22 candidates in 15 segments; clustering around central candidates without chaining gives 13 requests
+        self.assertEqual(len(requests), 13)
+        self.assertEqual([central for central, _, _ in requests], [index for index in candidates
+                                                                   if index in {central for central, _, _ in requests}])
+        for central, context, members in requests:
+            for member in members:
+                overlap = set(contexts[candidates.index(member)]) & set(contexts[candidates.index(central)])
+                self.assertTrue(df.loc[member, 'segment'] == df.loc[central, 'segment'] or len(overlap) > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
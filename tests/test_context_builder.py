@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from app.analytics.context_builder import ContextBuilder
+
+
+class TestContextBuilder(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.embeddings = ContextBuilder.normalize(rng.normal(size=(50, 16)))
+        self.df = pd.DataFrame({'sentence': ['word ' * 10] * 50, 'embedding_row': np.arange(50)})
+
+    def test_keeps_everything_within_budget(self):
+        builder = ContextBuilder(self.df, self.embeddings, token_budget=10000)
+        candidates = list(range(10, 30))
+
+        self.assertEqual(builder.build(20, candidates), candidates)
+
+    def test_packs_into_budget_and_keeps_central(self):
+        builder = ContextBuilder(self.df, self.embeddings, token_budget=80)
+        context = builder.build(25, list(range(50)))
+
+        self.assertIn(25, context)
+        self.assertEqual(context, sorted(context))
+        self.assertLessEqual(builder.count_tokens(context), 80)
+        self.assertGreater(builder.count_tokens(context), 80 - builder.tokens.max())
+
+    def test_prefers_similar_sentences(self):
+        embeddings = self.embeddings.copy()
+        embeddings[40] = embeddings[5]
+        builder = ContextBuilder(self.df, embeddings, token_budget=30, similarity_weight=1.0)
+
+        self.assertEqual(builder.build(5, [6, 7, 40]), [5, 40])
+
+    def test_keeps_required_sentences(self):
+        embeddings = self.embeddings.copy()
+        embeddings[40] = embeddings[5]
+        builder = ContextBuilder(self.df, embeddings, token_budget=30, similarity_weight=1.0)
+
+        self.assertEqual(builder.build(5, [6, 7, 40], required=[7]), [5, 7])
+
+    def test_central_sentence_over_budget(self):
+        builder = ContextBuilder(self.df, self.embeddings, token_budget=1)
+
+        self.assertEqual(builder.build(3, [2, 4]), [3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import time
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from app.services.dag_executor import DagExecutor, Stage
+
+
+def square(x):
+    return x * x
+
+
+class TestDagExecutor(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.calls = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def stage(self, name, inputs, outputs, function, **kwargs):
+        def call(**arguments):
+            self.calls.append(name)
+            return function(**arguments)
+        return Stage(name, call, inputs, outputs, **kwargs)
+
+    def executor(self):
+        return DagExecutor([
+            self.stage('sum', ['left', 'right'], ['total'], lambda left, right: left + right),
+            self.stage('left', ['x'], ['left'], lambda x: time.sleep(0.3) or x + 1),
+            self.stage('right', ['x'], ['right', 'twice'], lambda x: (time.sleep(0.3) or x + 2, 2 * x)),
+        ], path=self.directory.name)
+
+    def test_runs_in_dependency_order_and_in_parallel(self):
+        executor = self.executor()
+        start = time.perf_counter()
+        values = executor.run({'x': 1})
+
+        self.assertEqual(values['total'], 5)
+        self.assertEqual(values['twice'], 2)
+        self.assertEqual(self.calls[-1], 'sum')
+        self.assertLess(time.perf_counter() - start, 0.55)
+        self.assertEqual(set(executor.timings), {'left', 'right', 'sum'})
+        self.assertGreater(sum(executor.timings.values()), executor.wall_clock)
+
+    def test_memoizes_by_input_content(self):
+        self.executor().run({'x': 1})
+        self.calls.clear()
+
+        executor = self.executor()
+        self.assertEqual(executor.run({'x': 1})['total'], 5)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(executor.cached, {'left', 'right', 'sum'})
+
+        self.assertEqual(executor.run({'x': 2})['total'], 7)
+        self.assertEqual(sorted(self.calls), ['left', 'right', 'sum'])
+
+    def test_rerun_from_stage(self):
+        self.executor().run({'x': 1})
+        self.calls.clear()
+
+        executor = self.executor()
+        executor.run({'x': 1}, rerun_from=['left'])
+        self.assertEqual(sorted(self.calls), ['left', 'sum'])
+        self.assertEqual(executor.cached, {'right'})
+
+    def test_memoizes_by_config_and_files(self):
+        path = os.path.join(self.directory.name, 'video.mp4')
+        with open(path, 'wb') as file:
+            file.write(b'video')
+
+        def executor(threshold):
+            return DagExecutor([self.stage('size', ['path'], ['size'], lambda path: os.path.getsize(path),
+                                           config={'threshold': threshold}, files=['path'])],
+                               path=self.directory.name)
+
+        executor(1).run({'path': path})
+        self.assertEqual(executor(1).run({'path': path})['size'], 5)
+        self.assertEqual(self.calls, ['size'])
+
+        executor(2).run({'path': path})
+        self.assertEqual(self.calls, ['size', 'size'])
+
+        with open(path, 'wb') as file:
+            file.write(b'new video')
+        self.assertEqual(executor(2).run({'path': path})['size'], 9)
+        self.assertEqual(self.calls, ['size', 'size', 'size'])
+
+    def test_process_pool(self):
+        executor = DagExecutor([Stage('square', square, ['x'], ['y'], pool='process', memoize=False)],
+                               path=self.directory.name, workers=1)
+        self.assertEqual(executor.run({'x': 7})['y'], 49)
+
+    def test_invalid_graphs(self):
+        with self.assertRaises(ValueError):
+            DagExecutor([Stage('a', square, ['b'], ['a']), Stage('b', square, ['a'], ['b'])])
+        with self.assertRaises(ValueError):
+            DagExecutor([Stage('a', square, ['x'], ['y']), Stage('b', square, ['x'], ['y'])])
+        with self.assertRaises(ValueError):
+            DagExecutor([Stage('a', square, ['x'], ['y'])], path=self.directory.name).run({})
+
+    def test_fingerprint_ignores_dataframe_layout(self):
+        df = pd.DataFrame({'a': [1, 2], 'b': [0.5, 1.5]})
+        copy = pd.DataFrame({'a': [1, 2]})
+        copy['b'] = [0.5, 1.5]
+
+        self.assertEqual(DagExecutor.fingerprint(df), DagExecutor.fingerprint(copy))
+        self.assertNotEqual(DagExecutor.fingerprint(df), DagExecutor.fingerprint(df.assign(b=[0.5, 2.5])))
+        self.assertNotEqual(DagExecutor.fingerprint(np.zeros(2)), DagExecutor.fingerprint(np.zeros(3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
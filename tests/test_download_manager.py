@@ -0,0 +1,107 @@
+import os
+import re
+import hashlib
+import tempfile
+import threading
+import unittest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.download_manager import DownloadManager
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves the server's content, with byte ranges if enabled, and fails requests for chosen offsets."""
+
+    def do_GET(self):
+        content = self.server.content
+        self.server.requests.append(self.headers.get('Range'))
+        match = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range') or '')
+
+        if match and self.server.ranges:
+            first, last = int(match.group(1)), min(int(match.group(2)), len(content) - 1)
+            if first in self.server.failing:
+                self.send_error(503)
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {first}-{last}/{len(content)}')
+            body = content[first:last + 1]
+        else:
+            self.send_response(200)
+            body = content
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadManager(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'video.mp4')
+        self.content = os.urandom(300_000)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+        self.server.content, self.server.ranges, self.server.failing, self.server.requests = self.content, True, set(), []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/video.mp4'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def manager(self):
+        return DownloadManager(chunk_size=65536, workers=3, retries=1, timeout=5)
+
+    def read(self, path):
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def test_probe(self):
+        self.assertEqual(self.manager().probe(self.url), (len(self.content), True))
+        self.server.ranges = False
+        self.assertEqual(self.manager().probe(self.url), (len(self.content), False))
+
+    def test_download_in_chunks(self):
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(self.manager().download(self.url, self.path, sha256=sha256), self.path)
+
+        self.assertEqual(self.read(self.path), self.content)
+        self.assertEqual(os.listdir(self.directory.name), ['video.mp4'])
+        self.assertEqual(len(self.server.requests), 1 + 5)  # probe and 5 chunks
+
+    def test_resume_interrupted_download(self):
+        self.server.failing = {65536 * 2, 65536 * 4}
+        with self.assertRaises(requests.RequestException):
+            self.manager().download(self.url, self.path)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(os.path.exists(f'{self.path}.part'))
+
+        # a finished chunk that was damaged on disk is fetched again
+        with open(f'{self.path}.part', 'r+b') as file:
+            file.seek(10)
+            file.write(b'damaged')
+        self.server.failing, self.server.requests = set(), []
+        self.manager().download(self.url, self.path)
+
+        self.assertEqual(self.read(self.path), self.content)
+        self.assertEqual(sorted(self.server.requests[1:]),
+                         ['bytes=0-65535', 'bytes=131072-196607', 'bytes=262144-299999'])
+        self.assertFalse(os.path.exists(f'{self.path}.part.json'))
+
+    def test_download_without_ranges(self):
+        self.server.ranges = False
+        self.manager().download(self.url, self.path)
+        self.assertEqual(self.read(self.path), self.content)
+
+    def test_checksum_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.manager().download(self.url, self.path, sha256='0' * 64)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
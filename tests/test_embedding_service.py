@@ -0,0 +1,90 @@
+import random
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_cache import VectorCache
+
+
+class FakeEmbeddingsClient:
+    """Local stand-in for the OpenAI client: embeds text as [len, first char code] and shuffles the response."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.requests = []
+        self.lock = threading.Lock()
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    def create(self, input, model):
+        with self.lock:
+            self.requests.append(list(input))
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("rate limited")
+
+        data = [SimpleNamespace(index=i, embedding=[float(len(text)), float(ord(text[0]))])
+                for i, text in enumerate(input)]
+        random.shuffle(data)
+        return SimpleNamespace(data=data)
+
+
+class TestEmbeddingService(unittest.TestCase):
+    def setUp(self):
+        self.texts = [f"{chr(97 + i % 26)} sentence number {i}" for i in range(50)]
+
+    def test_embed_preserves_order(self):
+        client = FakeEmbeddingsClient()
+        service = EmbeddingService(client, batch_size=7, workers=3)
+
+        embeddings = service.embed(self.texts)
+
+        expected = [[float(len(text)), float(ord(text[0]))] for text in self.texts]
+        self.assertEqual(embeddings.tolist(), expected)
+        self.assertEqual(len(client.requests), 8)
+
+    def test_cache_skips_known_and_repeated_texts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            client = FakeEmbeddingsClient()
+            service = EmbeddingService(client, cache=VectorCache(f"{directory}/cache.npz", max_entries=100))
+
+            first = service.embed(["Yeah.", "Right.", "Yeah."])
+            second = EmbeddingService(client, cache=VectorCache(f"{directory}/cache.npz", max_entries=100)).embed(
+                ["Right.", "Yeah.", "New one."])
+
+        self.assertEqual(client.requests, [["Yeah.", "Right."], ["New one."]])
+        self.assertEqual(first[0].tolist(), first[2].tolist())
+        self.assertEqual(second[0].tolist(), first[1].tolist())
+
+    def test_batches_respect_token_budget(self):
+        service = EmbeddingService(FakeEmbeddingsClient(), batch_size=100, batch_tokens=20)
+
+        batches = service.make_batches(self.texts)
+
+        self.assertEqual(sum(batches, []), list(range(len(self.texts))))
+        for batch in batches:
+            tokens = sum(service.estimate_tokens(self.texts[i]) for i in batch)
+            self.assertTrue(len(batch) == 1 or tokens <= 20)
+
+    @patch('app.services.embedding_service.time.sleep')
+    def test_retries_failed_requests(self, mock_sleep):
+        client = FakeEmbeddingsClient(failures=2)
+        service = EmbeddingService(client, batch_size=100, retries=2)
+
+        embeddings = service.embed(self.texts)
+
+        self.assertEqual(len(embeddings), len(self.texts))
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    @patch('app.services.embedding_service.time.sleep')
+    def test_gives_up_after_retries(self, mock_sleep):
+        service = EmbeddingService(FakeEmbeddingsClient(failures=5), retries=1)
+
+        with self.assertRaises(ConnectionError):
+            service.embed(self.texts)
+
+
+if __name__ == '__main__':
+    unittest.main()
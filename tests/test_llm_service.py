@@ -0,0 +1,168 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+from openai import AsyncOpenAI
+
+from app.services.completion_cache import CompletionCache
+from app.services.llm_service import LLM
+from app.services.rate_limiter import TokenBucket
+
+LATENCY = 0.2
+
+
+class FakeChatCompletionsHandler(BaseHTTPRequestHandler):
+    """Answers chat completions with six sentence numbers starting at the central sentence."""
+    failures = 0
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.lock:
+            FakeChatCompletionsHandler.requests += 1
+        time.sleep(LATENCY)
+
+        with self.lock:
+            fail = FakeChatCompletionsHandler.failures > 0
+            FakeChatCompletionsHandler.failures -= int(fail)
+        if fail:
+            self.send_response(500)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{"error": {"message": "overloaded"}}')
+            return
+
+        central = int(re.search(r"sentence number (\d+)", body['messages'][1]['content']).group(1))
+        content = ", ".join(str(central + i) for i in range(6))
+        response = {
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": body['model'],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+        }
+        payload = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestLLM(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeChatCompletionsHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FakeChatCompletionsHandler.failures = 0
+        FakeChatCompletionsHandler.requests = 0
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = CompletionCache(os.path.join(self.directory.name, 'completions.sqlite'), max_entries=100)
+        client = AsyncOpenAI(api_key='test', base_url=f'http://127.0.0.1:{self.server.server_port}/v1',
+                             max_retries=0)
+        self.llm = LLM(async_client=client, concurrency=4, backoff=0.01, cache=self.cache)
+        self.df = pd.DataFrame({'sentence': [f'Sentence {i}.' for i in range(100)]})
+        self.requests = [(number, list(range(number, number + 8))) for number in range(0, 80, 10)]
+
+    def tearDown(self):
+        self.cache.connection.close()
+        self.directory.cleanup()
+
+    def test_generate_many_is_concurrent_and_ordered(self):
+        start = time.perf_counter()
+        results = self.llm.generate_many(self.df, self.requests, ['keyword'])
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, [tuple(range(number, number + 6)) for number, _ in self.requests])
+        self.assertLess(elapsed, LATENCY * len(self.requests) / 2)
+
+    def test_generate_many_retries_failures(self):
+        FakeChatCompletionsHandler.failures = 3
+
+        results = self.llm.generate_many(self.df, self.requests, ['keyword'])
+
+        self.assertTrue(all(results))
+
+    def test_generate_many_times_out(self):
+        self.llm.timeout = LATENCY / 4
+        self.llm.retries = 0
+
+        results = self.llm.generate_many(self.df, self.requests[:2], ['keyword'])
+
+        self.assertEqual(results, [(), ()])
+
+    def test_generate_many_uses_cache_when_asked(self):
+        first = self.llm.generate_many(self.df, self.requests, ['keyword'], use_cache=True)
+        second = self.llm.generate_many(self.df, self.requests, ['keyword'], use_cache=True)
+        self.llm.generate_many(self.df, self.requests[:1], ['keyword'])
+
+        self.assertEqual(first, second)
+        self.assertEqual(FakeChatCompletionsHandler.requests, len(self.requests) + 1)
+        self.assertEqual(self.cache.stats(), {'hits': len(self.requests), 'misses': len(self.requests),
+                                              'entries': len(self.requests)})
+
+
+class TestCompletionCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'completions.sqlite')
+        self.messages = [{"role": "user", "content": "prompt"}]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key_covers_model_parameters(self):
+        key = CompletionCache.key('gpt', 0.5, self.messages)
+
+        self.assertEqual(key, CompletionCache.key('gpt', 0.5, [dict(message) for message in self.messages]))
+        self.assertNotEqual(key, CompletionCache.key('gpt', 1, self.messages))
+        self.assertNotEqual(key, CompletionCache.key('other', 0.5, self.messages))
+
+    def test_ttl_and_size_cap(self):
+        cache = CompletionCache(self.path, max_entries=2, ttl=60)
+        cache.put('a', '1, 2')
+        cache.put('b', '3, 4')
+        cache.get('a')
+        cache.put('c', '5, 6')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), '1, 2')
+
+        cache.ttl = -1
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 2, 'entries': 1})
+        cache.connection.close()
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_acquire_waits_for_refill(self):
+        async def acquire_three():
+            bucket = TokenBucket(per_minute=600, capacity=1)
+            for _ in range(3):
+                await bucket.acquire()
+
+        start = time.perf_counter()
+        asyncio.run(acquire_three())
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.19)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,15 @@
 import os
+import tempfile
 import unittest
+import importlib.util
 from unittest.mock import patch
 
+import numpy as np
+import pandas as pd
+
 from app.analytics.preprocessor import DataProcessor
+from app.audio_aligner import AudioAligner
+from app.services.artifact_store import ArtifactStore
 
 
 class TestDataProcessor(unittest.TestCase):
@@ -52,5 +59,71 @@ class TestDataProcessor(unittest.TestCase):
     # Additional tests for other functionalities can be added here
 
 
+class TestArtifactWarmStart(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # app.py is shadowed by the app package, so the pipeline module is loaded from its path
+        path = os.path.join(os.path.dirname(__file__), '..', 'app.py')
+        spec = importlib.util.spec_from_file_location('pipeline', path)
+        cls.pipeline = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cls.pipeline)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        pd.DataFrame({'index': range(4), 'sentence': ['One.', 'Two?', 'Three.', 'Four.'],
+                      'length': [1.0, 2.0, 1.5, 0.5]}).to_csv(os.path.join(self.directory.name, 'transcript.csv'),
+                                                            index=False)
+        self.estimates = np.array([0.0, 1.0, 3.0, 4.5])
+
+        def add_embeddings(processor, video_id):
+            processor.embeddings = np.eye(4, dtype=np.float32)
+            processor.df['embedding_row'] = np.arange(4)
+
+        self.patches = [patch.object(DataProcessor, 'add_embeddings', add_embeddings),
+                        patch.object(AudioAligner, 'apply_to_dataframe', self.shift_timestamps)]
+        for each in self.patches:
+            each.start()
+
+    def tearDown(self):
+        for each in self.patches:
+            each.stop()
+        self.directory.cleanup()
+
+    @staticmethod
+    def shift_timestamps(aligner, df, source_path):
+        df['start_time'] += 0.25
+        df['end_time'] += 0.25
+
+    def run_pipeline(self, alignment, segments):
+        """Runs the transcript, align and enrich stages and returns the transcript and the enriched transcript."""
+        processor = DataProcessor(self.directory.name, 'transcript', 'video')
+        processor.artifacts = ArtifactStore(os.path.join(self.directory.name, 'artifacts'))
+        df = processor.create_dataframe()
+
+        pipeline = self.pipeline.VideoAnalysisPipeline(0)
+        pipeline.preprocessor = processor
+        with patch.object(self.pipeline, 'AUDIO_ALIGNMENT', alignment):
+            timestamps = pipeline.align(df, 'video.mp4')
+        sentiment = pd.DataFrame(0.0, index=df.index, columns=['emotion_score', 'positive_score', 'negative_score'])
+        return df, pipeline.enrich(df, sentiment, np.array(segments), timestamps)
+
+    def test_toggle_alignment(self):
+        df, enriched = self.run_pipeline(True, [0, 0, 1, 1])
+        np.testing.assert_allclose(df['start_time'], self.estimates)
+        np.testing.assert_allclose(enriched['start_time'], self.estimates + 0.25)
+
+        # the warm start loads the artifact, but not the aligned timestamps of the previous run
+        df, enriched = self.run_pipeline(False, [0, 1, 1, 2])
+        self.assertIn('segment', df.columns)
+        np.testing.assert_allclose(df['start_time'], self.estimates)
+        np.testing.assert_allclose(enriched['start_time'], self.estimates)
+        np.testing.assert_allclose(enriched['end_time'], self.estimates + [1.0, 2.0, 1.5, 0.5])
+
+        # changed segments are saved although the artifact already has a segment column
+        df, enriched = self.run_pipeline(True, [0, 1, 1, 2])
+        self.assertEqual(df['segment'].tolist(), [0, 1, 1, 2])
+        np.testing.assert_allclose(enriched['start_time'], self.estimates + 0.25)
+
+
 if __name__ == '__main__':
     unittest.main()
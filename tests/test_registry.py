@@ -0,0 +1,50 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.registry import ResourceRegistry
+
+
+class TestResourceRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ResourceRegistry()
+        self.loads = 0
+        self.lock = threading.Lock()
+
+    def slow_factory(self):
+        with self.lock:
+            self.loads += 1
+        time.sleep(0.05)
+        return object()
+
+    def test_loads_once_under_concurrency(self):
+        self.registry.register('model', self.slow_factory)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            resources = list(pool.map(lambda _: self.registry.get('model'), range(16)))
+
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(all(resource is resources[0] for resource in resources))
+
+    def test_lazy_registration_and_warm_up(self):
+        self.registry.register('model', self.slow_factory)
+        self.assertEqual(self.loads, 0)
+
+        self.registry.get('stop_words', lambda: {'a'})
+        load_times = self.registry.warm_up()
+
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(set(load_times), {'model', 'stop_words'})
+
+    def test_clear_keeps_factories(self):
+        self.registry.register('model', self.slow_factory)
+        first = self.registry.get('model')
+        self.registry.clear()
+
+        self.assertIsNot(self.registry.get('model'), first)
+        self.assertEqual(self.loads, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from scipy.signal import argrelextrema
+
+from app.analytics.segmenter import TextSegmenter, StreamingSegmenter, activation_weights
+
+
+class TestTextSegmenter(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        topics = rng.normal(size=(8, 32))
+        vectors = np.repeat(topics, 15, axis=0) + rng.normal(scale=0.8, size=(120, 32))
+        self.embeddings = TextSegmenter.normalize(vectors)
+        self.df = pd.DataFrame({'sentence': [f's{i}' for i in range(120)], 'embedding_row': np.arange(120)})
+        self.segmenter = TextSegmenter(self.df, self.embeddings)
+
+    def test_segment_offsets_match_segments(self):
+        segments = self.df['segment'].to_numpy()
+        offsets = self.segmenter.segment_offsets
+
+        self.assertEqual(offsets[0], 0)
+        self.assertEqual(offsets[-1], len(self.df))
+        for segment in range(segments.max() + 1):
+            self.assertTrue((segments[offsets[segment]:offsets[segment + 1]] == segment).all())
+
+    def test_get_consecutive(self):
+        segments = self.df['segment']
+        for index in [0, 50, 119]:
+            paragraph = segments[index]
+            expected = self.df[segments.between(max(paragraph - 1, 0), paragraph + 2)].index.tolist()
+            self.assertEqual(self.segmenter.get_consecutive(index, 1, 2), expected)
+
+    def test_batch_matches_single_queries(self):
+        indices = [3, 40, 77, 119]
+        batch = self.segmenter.get_n_closest_batch(indices, n=2)
+
+        for index in indices:
+            closest = TextSegmenter.top_n_closest(self.embeddings[index], self.embeddings, 2)
+            segments = self.df.loc[closest, 'segment'].unique()
+            expected = self.df[self.df['segment'].isin(segments)].index.tolist()
+            self.assertEqual(batch[index], expected)
+            self.assertEqual(self.segmenter.get_n_closest(index, n=2), expected)
+
+    def test_banded_activation_matches_full_matrix(self):
+        similarities = self.embeddings @ self.embeddings.T
+        weights = activation_weights(10)
+        expected = np.zeros(len(similarities))
+        for k in range(1, 11):
+            expected[:-k] += similarities.diagonal(k) * weights[k - 1]
+
+        activated = self.segmenter.activate_similarities(self.embeddings, p_size=10)
+
+        np.testing.assert_allclose(activated, expected, atol=1e-5)
+        np.testing.assert_array_equal(argrelextrema(activated, np.less, order=2)[0],
+                                      argrelextrema(expected, np.less, order=2)[0])
+
+    def test_streaming_matches_batch(self):
+        streaming = StreamingSegmenter()
+        for start in range(0, 120, 7):
+            streaming.append(self.embeddings[start:start + 7])
+            self.assertTrue(set(streaming.split_points) <= set(np.flatnonzero(np.diff(self.df['segment'])) + 1))
+        streaming.finish()
+
+        np.testing.assert_array_equal(streaming.segments(), self.df['segment'].to_numpy())
+
+
+if __name__ == '__main__':
+    unittest.main()
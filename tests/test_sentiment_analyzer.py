@@ -1,13 +1,22 @@
+import os
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, PropertyMock
+import numpy as np
 import pandas as pd
+import torch
 
 from app.analytics.sentiment_analyzer import SentimentAnalyzer
+from app.services.registry import registry
+from app.services.vector_cache import VectorCache
 from config.config import SENTIMENT_MODEL
 
 
 class TestSentimentAnalyzer(unittest.TestCase):
     def setUp(self):
+        # Models are shared through the registry, start every test without loaded models
+        registry.clear()
+
         # Mocking the sentiment model initialization to avoid actual model loading
         self.init_patch = patch('app.analytics.sentiment_analyzer.AutoModelForSequenceClassification.from_pretrained')
         self.mock_init = self.init_patch.start()
@@ -26,20 +35,33 @@ class TestSentimentAnalyzer(unittest.TestCase):
         self.init_patch.stop()
         self.tokenizer_patch.stop()
         self.logging_patch.stop()
+        registry.clear()
 
     def test_init(self):
-        """Test the initialization of the SentimentAnalyzer."""
+        """Test that the model and tokenizer are loaded lazily and only once per process."""
+        self.mock_init.assert_not_called()
+        self.mock_tokenizer.assert_not_called()
+
+        self.sentiment_analyzer.warm_up()
+        SentimentAnalyzer().warm_up()
+
         self.mock_init.assert_called_once_with(SENTIMENT_MODEL)
         self.mock_tokenizer.assert_called_once_with(SENTIMENT_MODEL)
-        self.mock_logging.assert_called_once()
+        self.assertEqual(set(registry.load_times), {'sentiment_tokenizer', 'sentiment_model:fp32'})
+        self.assertIs(self.sentiment_analyzer.model, SentimentAnalyzer().model)
+
+    def test_unknown_backend(self):
+        """Test that an unsupported backend is rejected."""
+        with self.assertRaises(ValueError):
+            SentimentAnalyzer(backend='fp16')
 
     def test_apply_to_dataframe(self):
         """Test the apply_to_dataframe method."""
         # Mock a sample DataFrame
         df = pd.DataFrame({'sentence': ['This is a test sentence.', 'Another test sentence.']})
 
-        # Mocking the predict_sentiment method to avoid actual sentiment prediction
-        self.sentiment_analyzer.predict_sentiment = MagicMock(return_value={'negative': 0.1, 'neutral': 0.2, 'positive': 0.7})
+        # Mocking the predict_batch method to avoid actual sentiment prediction
+        self.sentiment_analyzer.predict_batch = MagicMock(return_value=np.array([[0.1, 0.2, 0.7], [0.6, 0.3, 0.1]]))
 
         self.sentiment_analyzer.apply_to_dataframe(df)
 
@@ -47,9 +69,42 @@ class TestSentimentAnalyzer(unittest.TestCase):
         self.assertTrue('emotion_score' in df.columns)
         self.assertTrue('positive_score' in df.columns)
         self.assertTrue('negative_score' in df.columns)
+        np.testing.assert_allclose(df['emotion_score'], [0.8, 0.7])
+        np.testing.assert_allclose(df['positive_score'], [0.7, 0.1])
+        np.testing.assert_allclose(df['negative_score'], [0.1, 0.6])
+
+        # Check if all sentences were predicted in one batched call
+        self.sentiment_analyzer.predict_batch.assert_called_once_with(df['sentence'].tolist())
+
+    def test_cached_scores_skip_the_model(self):
+        """Test that only sentences missing from the score cache are sent to the model."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sentiment.npz')
+            analyzer = SentimentAnalyzer(cache=VectorCache(path, max_entries=100))
+            analyzer.predict_batch = MagicMock(side_effect=lambda texts: np.array([[0.1, 0.2, 0.7]] * len(texts)))
+            analyzer.predict_cached(['One.', 'Two.'])
+
+            rerun = SentimentAnalyzer(cache=VectorCache(path, max_entries=100))
+            rerun.predict_batch = MagicMock(side_effect=lambda texts: np.array([[0.5, 0.4, 0.1]] * len(texts)))
+            scores = rerun.predict_cached(['Two.', 'Three.', 'One.'])
+
+        rerun.predict_batch.assert_called_once_with(['Three.'])
+        np.testing.assert_allclose(scores, [[0.1, 0.2, 0.7], [0.5, 0.4, 0.1], [0.1, 0.2, 0.7]])
+
+    def test_predict_batch_keeps_input_order(self):
+        """Test that length-sorted batching returns scores in the input order."""
+        texts = ['a much longer sentence than the others', 'short', 'middle sized one']
+        self.sentiment_analyzer.batch_size = 2
+        tokenizer = MagicMock(side_effect=lambda batch, **kwargs: {'texts': batch})
+        model = MagicMock(side_effect=lambda texts: MagicMock(
+            logits=torch.tensor([[float(len(text)), 0.0, 0.0] for text in texts])))
+
+        with patch.object(SentimentAnalyzer, 'tokenizer', new_callable=PropertyMock, return_value=tokenizer), \
+                patch.object(SentimentAnalyzer, 'model', new_callable=PropertyMock, return_value=model):
+            scores = self.sentiment_analyzer.predict_batch(texts)
 
-        # Check if the sentiment prediction method was called for each sentence
-        self.assertEqual(self.sentiment_analyzer.predict_sentiment.call_count, 2)
+        self.assertEqual(model.call_count, 2)
+        self.assertTrue(scores[0, 0] > scores[2, 0] > scores[1, 0])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from app.analytics.summarizer import TextSummarizer
+
+
+class TestTextSummarizer(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.summarizer = TextSummarizer(method='embedding')
+        # a dominant topic of 30 sentences and 10 unrelated sentences
+        topic = rng.normal(size=32)
+        vectors = np.vstack([topic + rng.normal(scale=0.5, size=(30, 32)), rng.normal(size=(10, 32))])
+        self.embeddings = TextSummarizer.normalize(vectors)
+        self.df = pd.DataFrame({'sentence': [f's{i}' for i in range(40)], 'embedding_row': np.arange(40)},
+                               index=np.arange(100, 140))
+
+    def test_textrank_prefers_central_sentences(self):
+        summary = self.summarizer.summarize(self.df, 5, self.embeddings)
+
+        self.assertEqual(len(summary), 5)
+        self.assertEqual(summary, sorted(summary))
+        self.assertTrue(all(100 <= index < 130 for index in summary))
+
+    def test_textrank_without_iterations(self):
+        df = self.df.copy()
+        df.loc[[105, 133], 'sentence'] = 'a much longer sentence with more words'
+
+        self.assertEqual(self.summarizer.textrank(df, self.embeddings, 2, max_iterations=0), [105, 133])
+
+    def test_similarity_graph_is_sparse_and_symmetric(self):
+        graph = self.summarizer.similarity_graph(self.embeddings, neighbours=4, block_size=16)
+
+        self.assertEqual(graph.diagonal().sum(), 0)
+        self.assertLessEqual(graph.nnz, 2 * 4 * 40)
+        self.assertEqual(abs(graph - graph.T).sum(), 0)
+
+    def test_embedding_method_requires_embeddings(self):
+        with self.assertRaises(ValueError):
+            self.summarizer.summarize(self.df, 5)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            TextSummarizer(method='lexrank')
+
+
+if __name__ == '__main__':
+    unittest.main()
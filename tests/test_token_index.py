@@ -0,0 +1,34 @@
+import unittest
+from collections import Counter
+
+from app.analytics.base_processor import BaseTextProcessor
+from app.analytics.token_index import TokenIndex
+
+
+class TestTokenIndex(unittest.TestCase):
+    def setUp(self):
+        self.sentences = ["Hello, world!", "", "Is the World round?", "hello hello again."]
+        self.index = TokenIndex.from_sentences(self.sentences)
+
+    def test_matches_tokenize(self):
+        expected = [BaseTextProcessor.tokenize(sentence) for sentence in self.sentences]
+
+        self.assertEqual(self.index.token_lists(), expected)
+        self.assertEqual(self.index.lengths().tolist(), [len(tokens) for tokens in expected])
+        self.assertEqual(self.index.vocabulary.tolist(), ['hello', 'world', 'is', 'the', 'round', 'again'])
+
+    def test_most_common_matches_counter(self):
+        words = BaseTextProcessor.tokenize(' '.join(self.sentences))
+        expected = [word for word, _ in Counter(word for word in words if word != 'the').most_common(4)]
+
+        self.assertEqual(self.index.most_common(4, exclude={'the'}), expected)
+
+    def test_empty(self):
+        index = TokenIndex.from_sentences([])
+
+        self.assertEqual(index.lengths().tolist(), [])
+        self.assertEqual(index.most_common(3), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from app.services.vector_cache import VectorCache
+
+
+class TestVectorCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.npz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key_depends_on_model_and_text(self):
+        self.assertEqual(VectorCache.key('model', 'text'), VectorCache.key('model', 'text'))
+        self.assertNotEqual(VectorCache.key('model', 'text'), VectorCache.key('other', 'text'))
+        self.assertNotEqual(VectorCache.key('model', 'text'), VectorCache.key('model', 'other'))
+
+    def test_roundtrip_and_stats(self):
+        cache = VectorCache(self.path, max_entries=10)
+        cache.put_many(['a', 'b'], [[1.0, 2.0], [3.0, 4.0]])
+        cache.save()
+
+        reloaded = VectorCache(self.path, max_entries=10)
+        a, missing = reloaded.get_many(['a', 'c'])
+
+        self.assertEqual(a.dtype, np.float32)
+        self.assertEqual(a.tolist(), [1.0, 2.0])
+        self.assertIsNone(missing)
+        self.assertEqual(reloaded.stats(), {'hits': 1, 'misses': 1, 'entries': 2})
+
+    def test_evicts_least_recently_used(self):
+        cache = VectorCache(self.path, max_entries=2)
+        cache.put_many(['a', 'b'], [[1.0], [2.0]])
+        cache.get_many(['a'])
+        cache.put_many(['c'], [[3.0]])
+
+        self.assertEqual(list(cache.entries.keys()), ['a', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
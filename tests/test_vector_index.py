@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from app.analytics.base_processor import BaseTextProcessor
+from app.analytics.vector_index import FlatIndex, IVFIndex, VectorIndex, create_index
+
+
+class TestVectorIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        centers = rng.normal(size=(20, 24))
+        self.vectors = BaseTextProcessor.normalize(np.repeat(centers, 50, axis=0) + rng.normal(size=(1000, 24)) * 0.3)
+        self.queries = self.vectors[::97]
+
+    def test_flat_matches_brute_force(self):
+        index = FlatIndex(24)
+        index.add(self.vectors[:600])
+        index.add(self.vectors[600:])
+
+        scores, ids = index.search(self.queries, 5)
+
+        np.testing.assert_array_equal(ids, np.argsort(-(self.queries @ self.vectors.T), axis=1)[:, :5])
+        self.assertTrue((np.diff(scores, axis=1) <= 0).all())
+
+    def test_ivf_recall(self):
+        index = IVFIndex(24, lists=16, probes=4)
+        index.add(self.vectors)
+
+        exact_index = FlatIndex(24)
+        exact_index.add(self.vectors)
+
+        _, ids = index.search(self.queries, 10)
+        _, exact = exact_index.search(self.queries, 10)
+
+        recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(ids, exact)])
+        self.assertGreater(recall, 0.9)
+
+    def test_ivf_incremental_add_and_persistence(self):
+        index = IVFIndex(24, lists=8, probes=8)
+        index.add(self.vectors[:500])
+        index.add(self.vectors[500:], ids=np.arange(500, 1000) + 10_000)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.npz')
+            index.save(path)
+            restored = VectorIndex.load(path)
+
+        self.assertIsInstance(restored, IVFIndex)
+        self.assertEqual(len(restored), 1000)
+        _, ids = restored.search(self.vectors[700], 1)
+        self.assertEqual(ids[0][0], 10_700)
+
+    def test_ivf_adds_one_vector_at_a_time(self):
+        bulk = IVFIndex(24, lists=8, probes=2)
+        bulk.add(self.vectors[:256])  # trains on the first 256 vectors, like the index below
+        bulk.add(self.vectors[256:])
+        single = IVFIndex(24, lists=8, probes=2)
+        single.add(self.vectors[:256])
+        for vector in self.vectors[256:]:
+            single.add(vector)
+
+        self.assertEqual(len(single), 1000)
+        self.assertEqual(sum(map(len, single.members)), 1000)
+        for assignment, members in enumerate(single.members):
+            np.testing.assert_array_equal(np.argmax(single.vectors[members] @ single.centroids.T, axis=1), assignment)
+        np.testing.assert_array_equal(single.search(self.queries, 5)[1], bulk.search(self.queries, 5)[1])
+
+    def test_search_is_abstract(self):
+        with self.assertRaises(TypeError):
+            VectorIndex(24)
+
+    def test_top_n_closest_uses_index(self):
+        index = create_index(24, 'flat')
+        index.add(self.vectors)
+
+        from_index = BaseTextProcessor.top_n_closest(self.vectors[5], None, n=3, index=index)
+        from_matrix = BaseTextProcessor.top_n_closest(self.vectors[5], self.vectors, n=3)
+
+        np.testing.assert_array_equal(from_index, from_matrix)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+import subprocess
+import numpy as np
+import pandas as pd
+import imageio_ffmpeg
+from moviepy.editor import VideoFileClip
+
+from app.video_editor import VideoEditor
+
+
+def make_video(path, seconds, fps=24):
+    """Writes a small test pattern video with a sine tone."""
+    subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+                    '-f', 'lavfi', '-i', f'testsrc=size=160x120:rate={fps}',
+                    '-f', 'lavfi', '-i', 'sine=frequency=440',
+                    '-t', str(seconds), '-c:v', 'libx264', '-g', str(fps), '-pix_fmt', 'yuv420p',
+                    '-c:a', 'aac', path], check=True)
+
+
+class TestVideoEditor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.source_path = os.path.join(cls.directory.name, 'source.mp4')
+        make_video(cls.source_path, 6)
+        cls.df = pd.DataFrame({'start_time': [0.0, 1.0, 2.5, 4.0], 'end_time': [1.0, 2.5, 4.0, 5.5]},
+                              index=[10, 11, 12, 13])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_plan(self):
+        self.assertEqual(VideoEditor.plan(self.df, (12, 10)), [(2.5, 4.0), (0.0, 1.0)])
+        self.assertEqual(VideoEditor.plan(self.df, (10, 11, 12)), [(0.0, 4.0)])
+
+    def test_coalesce(self):
+        times = np.array([[0.0, 1.0], [1.2, 2.0], [2.9, 3.5], [1.0, 1.5], [5.0, 6.0]])
+        self.assertEqual(VideoEditor.coalesce(times, 0.5), [(0.0, 2.0), (2.9, 3.5), (1.0, 1.5), (5.0, 6.0)])
+        self.assertEqual(VideoEditor.coalesce(times, 1.0), [(0.0, 3.5), (1.0, 1.5), (5.0, 6.0)])
+        self.assertEqual(VideoEditor.coalesce(times, 0.0), [(0.0, 1.0), (1.2, 2.0), (2.9, 3.5), (1.0, 1.5), (5.0, 6.0)])
+        self.assertEqual(VideoEditor.coalesce(times[:0], 1.0), [])
+
+    def test_create_videos_in_parallel(self):
+        editor = VideoEditor(self.source_path, workers=2, fps=12)
+        paths = editor.create_videos(self.df, [(10, 11), (13,), (11, 12)], 'video', save_path=self.directory.name)
+
+        self.assertEqual([os.path.basename(path) for path in paths], ['video_0.mp4', 'video_1.mp4', 'video_2.mp4'])
+        for path, expected in zip(paths, [2.5, 1.5, 3.0]):
+            with VideoFileClip(path) as clip:
+                self.assertAlmostEqual(clip.duration, expected, delta=0.2)
+            self.assertEqual(editor.stats[path]['frames'], round(expected * 12))
+            self.assertGreater(editor.stats[path]['fps'], 0)
+
+    def test_probe_keyframes(self):
+        editor = VideoEditor(self.source_path)
+        np.testing.assert_allclose(editor.probe_keyframes(), [0, 1, 2, 3, 4, 5])
+
+    def test_split_cut(self):
+        keyframes = np.array([0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(VideoEditor.split_cut((0.9, 3.5), keyframes, 0.2), [(1.0, 3.0, True), (3.0, 3.5, False)])
+        self.assertEqual(VideoEditor.split_cut((2.3, 4.7), keyframes, 0.2),
+                         [(2.3, 3.0, False), (3.0, 4.0, True), (4.0, 4.7, False)])
+        self.assertEqual(VideoEditor.split_cut((1.1, 3.9), keyframes, 0.2), [(1.0, 4.0, True)])
+        self.assertEqual(VideoEditor.split_cut((1.5, 1.8), keyframes, 0.2), [(1.5, 2.0, False)])
+        self.assertEqual(VideoEditor.split_cut((1.5, 1.8), np.array([]), 0.2), [(1.5, 1.8, False)])
+
+    def test_split_short_cut(self):
+        keyframes = np.array([0.0, 2.0, 4.0, 6.0])
+        # both boundaries would snap onto keyframe 2, or the start past the original end
+        self.assertEqual(VideoEditor.split_cut((1.7, 2.3), keyframes, 0.5), [(1.7, 2.3, False)])
+        self.assertEqual(VideoEditor.split_cut((1.6, 1.9), keyframes, 0.5), [(1.6, 1.9, False)])
+        self.assertEqual(VideoEditor.split_cut((2.1, 2.4), keyframes, 0.5), [(2.1, 2.4, False)])
+        self.assertEqual(VideoEditor.split_cut((1.8, 2.9), keyframes, 0.5), [(2.0, 2.9, False)])
+
+    def test_fast_cut(self):
+        editor = VideoEditor(self.source_path, workers=2, fast_cut=True, keyframe_tolerance=0.2)
+        paths = editor.create_videos(self.df, [(11, 12), (13,)], 'fast', save_path=self.directory.name)
+
+        for path, expected in zip(paths, [3.0, 1.5]):
+            with VideoFileClip(path) as clip:
+                self.assertAlmostEqual(clip.duration, expected, delta=0.2)
+                self.assertEqual(clip.fps, 24)
+            self.assertEqual(editor.stats[path]['frames'], round(expected * 24))
+        # both sentences form one span, which is copied between keyframes 1 and 4
+        self.assertAlmostEqual(editor.stats[paths[0]]['copied'], 1.0)
+
+    def test_fast_cut_sub_second_sentence(self):
+        df = pd.DataFrame({'start_time': [1.9], 'end_time': [2.2]}, index=[20])
+        editor = VideoEditor(self.source_path, workers=1, fast_cut=True, keyframe_tolerance=0.5)
+        path, = editor.create_videos(df, [(20,)], 'short', save_path=self.directory.name)
+
+        with VideoFileClip(path) as clip:
+            self.assertAlmostEqual(clip.duration, 0.3, delta=0.1)
+        self.assertEqual(editor.stats[path]['copied'], 0.0)
+
+    def test_render_in_process(self):
+        editor = VideoEditor(self.source_path, workers=1, fps=12)
+        path = os.path.join(self.directory.name, 'single.mp4')
+        self.assertEqual(editor.render([[(1.0, 2.0)]], [path]), [path])
+        with VideoFileClip(path) as clip:
+            self.assertAlmostEqual(clip.duration, 1.0, delta=0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
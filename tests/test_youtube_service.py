@@ -1,3 +1,4 @@
+import os
 import unittest
 from unittest.mock import patch, MagicMock
 from app.services.youtube_service import YouTubeService
@@ -13,10 +14,13 @@ class TestYouTubeService(unittest.TestCase):
         expected_video_id = "abcdefg"
         self.assertEqual(YouTubeService.extract_video_id(url), expected_video_id)
 
+    @patch('app.services.youtube_service.os.makedirs')
     @patch('app.services.youtube_service.YouTube')
-    def test_download_video(self, mock_youtube):
+    def test_download_video(self, mock_youtube, mock_makedirs):
         mock_stream = MagicMock()
-        mock_stream.download = MagicMock(return_value=None)
+        mock_stream.url = "https://example.com/video.mp4"
+        mock_stream.filesize = 1024
+        self.youtube_service.downloader = MagicMock()
         mock_streams = MagicMock()
         mock_streams.filter.return_value = mock_streams
         mock_streams.order_by.return_value = mock_streams
@@ -27,7 +31,8 @@ class TestYouTubeService(unittest.TestCase):
         video_id = "abcdefg"
         save_path = "path/to/save"
         self.youtube_service.download_video(video_id, save_path)
-        mock_stream.download.assert_called_once_with(output_path=save_path, filename=f"{video_id}.mp4")
+        self.youtube_service.downloader.download.assert_called_once_with(
+            "https://example.com/video.mp4", os.path.join(save_path, f"{video_id}.mp4"), size=1024)
 
     @patch('app.services.youtube_service.build')
     def test_get_comments(self, mock_build):